@@ -1,20 +1,84 @@
-
 """
     Сборщик статей
     Описание:
         Набор инструментов для загрузки статей с поддерживаемых сайтов и манипуляции с ними.
+        Модули пакета загружаются при первом обращении к их именам (artcollector.ArticleCollection,
+        artcollector.sites и т. д.), поэтому импорт пакета не тянет за собой requests и bs4.
     Версия 0.6
     © Михаил Духонин
     22.12.2022 - 22.01.2023
 
 """
 
-from artcollector.art_collection import *
-from artcollector.sites import *
-from artcollector.to_frm import *
+from importlib import import_module
 
 __all__ = [
     'art_collection',
     'sites',
     'to_frm'
 ]
+
+# Имя -> модуль пакета, в котором оно определено.
+_LAZY = {
+    'ArticleCollection': 'art_collection',
+    'LOADED': 'art_collection',
+    'DUPLICATE': 'art_collection',
+    'FAILED': 'art_collection',
+    'SKIPPED': 'art_collection',
+    'Article': 'article',
+    'ArchiveFetcher': 'archive',
+    'PageArchive': 'archive',
+    'Checkpoint': 'checkpoint',
+    'Crawler': 'crawler',
+    'Fetcher': 'fetcher',
+    'ResponseTooLarge': 'fetcher',
+    'HttpCache': 'http_cache',
+    'Metrics': 'metrics',
+    'JsonFileSink': 'metrics',
+    'PrometheusFileSink': 'metrics',
+    'ExtractionError': 'rules',
+    'SiteRegistry': 'registry',
+    'SearchIndex': 'search',
+    'DEFAULT_PARSER': 'sites',
+    'ExtArt': 'sites',
+    'ExtractArticleData': 'sites',
+    'ExtractHabrArticle': 'sites',
+    'ExtractNakedscienceArticle': 'sites',
+    'ExtractTassArticle': 'sites',
+    'ExtractInoSMIArticle': 'sites',
+    'MemoryStorage': 'storage',
+    'SQLiteStorage': 'storage',
+    'ArticleView': 'views',
+    'HostThrottle': 'throttle',
+    'EXPORTERS': 'to_frm',
+    'exporter': 'to_frm',
+    'export': 'to_frm',
+    'to_txt': 'to_frm',
+    'iter_txt': 'to_frm',
+    'write_txt': 'to_frm',
+    'write_jsonl': 'to_frm',
+    'write_csv': 'to_frm',
+    'normalize_url': 'urls'
+}
+
+_MODULES = {
+    'aclogger', 'archive', 'art_collection', 'article', 'checkpoint', 'crawler', 'dates', 'fetcher',
+    'http_cache', 'metrics', 'parse_pool', 'registry', 'rules', 'search', 'sites', 'storage', 'throttle',
+    'to_frm', 'urls', 'views'
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(import_module(f'{__name__}.{_LAZY[name]}'), name)
+    elif name in _MODULES:
+        value = import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | _MODULES)
@@ -1,40 +1,154 @@
-""" Настройка логгера для пакета artcollector """
+""" Настройка логгера для пакета artcollector.
+    Импорт модуля ничего не настраивает: журналы подключаются вызовом setup()
+    или автоматически при создании первого ExtArt или ArticleCollection (см. auto_setup).
+    Каталог и файл журнала создаются при первой записи в него, а не при настройке.
+    Записи передаются в журналы через очередь в отдельном потоке (QueueHandler/QueueListener),
+    поэтому потоки загрузки не ждут записи в файл.
 
-from pathlib import Path
-from logging import FileHandler, getLogger, DEBUG, Formatter, StreamHandler, ERROR
-from locale import setlocale, LC_TIME
+"""
 
-setlocale(LC_TIME, 'Russian_Russia.1251')
+import atexit
+import os
+from logging import DEBUG, ERROR, FileHandler, Filter, Formatter, NullHandler, StreamHandler, getLogger
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
 
 # Список модулей для которых требуется создание логгера.
 loggers = [
+    'archive',
     'art_collection',
+    'checkpoint',
+    'crawler',
+    'fetcher',
+    'http_cache',
+    'metrics',
+    'parse_pool',
+    'registry',
+    'search',
     'sites',
+    'storage',
+    'throttle',
     'to_frm'
 ]
 
+# Каталог журналов (относительно текущего каталога).
+LOG_DIR = 'logs'
+
+# Настраивать журналы автоматически при первом использовании пакета.
+# Приложение, которое настраивает logging само, может отключить это: aclogger.AUTO_SETUP = False.
+# Автоматическая настройка также пропускается, если у логгера 'artcollector' уже есть обработчики.
+AUTO_SETUP = True
+
 formatter = Formatter(
     fmt='%(levelname)s\t%(asctime)s\t%(module)s\t%(message)s',
-    datefmt='%d %B %Y, %H:%M:%S, %A'
+    datefmt='%d.%m.%Y, %H:%M:%S'
 )
 
 ac_logger = getLogger('artcollector')
-ach = StreamHandler()
-ach.setFormatter(formatter)
-ach.setLevel(ERROR)
-ac_logger.addHandler(ach)
-
-if not Path.joinpath(Path.cwd(), 'logs').exists():
-    Path.mkdir(Path.joinpath(Path.cwd(), 'logs'))
-
-for lgrs in loggers:
-    log_file_handler = FileHandler(
-        filename=Path.joinpath(Path.cwd(), 'logs', f'{lgrs}.log'),
-        encoding='utf-8',
-        mode='w' # Журналы перезаписываются каждый сеанс.
-    )
-    log_file_handler.setFormatter(formatter)
-    log_file_handler.setLevel(DEBUG)
-    log = getLogger(f'{ac_logger.name}.{lgrs}')
-    log.addHandler(log_file_handler)
-    log.setLevel(DEBUG)
+# Пока журналы не настроены, записи пакета никуда не выводятся.
+ac_logger.addHandler(NullHandler())
+
+
+class _DelayedFileHandler(FileHandler):
+    """ Файловый обработчик, который создаёт каталог и открывает файл журнала
+    только при первой записи. Файл всегда открывается на дописывание: если журнал нужно
+    перезаписать (mode='w'), прежний файл очищается сразу, чтобы записи дочерних процессов,
+    сделанные до первой записи основного процесса, не пропали. """
+
+    def __init__(self, filename: str, mode: str) -> None:
+        if mode == 'w' and os.path.exists(filename):
+            os.truncate(filename, 0)
+        super().__init__(filename, mode='a', encoding='utf-8', delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+_lock = Lock()
+_handler = None
+_listener = None
+_pid = None
+
+
+def setup(log_dir: str | None=None, level: int=DEBUG) -> QueueListener:
+    """ Настраивает журналы пакета: ошибки выводятся в stderr, все записи модуля - в файл
+    log_dir/<модуль>.log. Повторный вызов в том же процессе ничего не меняет.
+
+    Журналы перезаписываются каждый сеанс, файл создаётся при первой записи в него.
+    Дочерние процессы (например, ParsePool) дописывают в журналы основного процесса.
+
+    """
+
+    global _handler, _listener, _pid
+
+    with _lock:
+        if _handler is not None and _pid == os.getpid():
+            return _listener
+
+        # Обработчик, унаследованный от родительского процесса, заменяется своим:
+        # поток разбора очереди в дочерний процесс не переходит.
+        if _handler is not None:
+            ac_logger.removeHandler(_handler)
+
+        from multiprocessing import parent_process
+        mode = 'w' if parent_process() is None else 'a'
+
+        log_dir = os.path.join(os.getcwd(), log_dir or LOG_DIR)
+
+        stream_handler = StreamHandler()
+        stream_handler.setFormatter(formatter)
+        stream_handler.setLevel(ERROR)
+        handlers = [stream_handler]
+
+        for lgrs in loggers:
+            log_file_handler = _DelayedFileHandler(os.path.join(log_dir, f'{lgrs}.log'), mode)
+            log_file_handler.setFormatter(formatter)
+            log_file_handler.setLevel(DEBUG)
+            log_file_handler.addFilter(Filter(f'{ac_logger.name}.{lgrs}'))
+            handlers.append(log_file_handler)
+
+        queue = SimpleQueue()
+        _listener = QueueListener(queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        _handler = QueueHandler(queue)
+        ac_logger.addHandler(_handler)
+        ac_logger.setLevel(level)
+
+        if _pid is None:
+            atexit.register(shutdown)
+        _pid = os.getpid()
+
+        return _listener
+
+
+def auto_setup():
+    """ Настраивает журналы при первом использовании пакета, если это не отключено (AUTO_SETUP). """
+
+    if _handler is not None and _pid == os.getpid():
+        return
+    if not AUTO_SETUP:
+        return
+    if _handler is None and any(not isinstance(h, NullHandler) for h in ac_logger.handlers):
+        return
+
+    setup()
+
+
+def shutdown():
+    """ Дописывает записи из очереди и закрывает журналы. """
+
+    global _handler, _listener
+
+    with _lock:
+        if _handler is None or _pid != os.getpid():
+            return
+
+        ac_logger.removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _handler = None
+        _listener = None
@@ -0,0 +1,386 @@
+""" Модуль archive.
+    Описание: Архив загруженных страниц.
+        Каждая страница записывается сжатой отдельным элементом gzip в конец файла-сегмента
+        в формате WARC (запись resource со ссылкой, временем загрузки, кодировкой и кодом ответа),
+        поэтому сегменты читаются и сторонними инструментами для WARC.
+        Индекс SQLite хранит для каждой ссылки сегмент и смещение записи, а страницы читаются
+        из сегментов, отображённых в память (mmap). По архиву коллекцию можно собрать заново
+        без обращения к сети (ArticleCollection.load_from_archive), например после исправления
+        класса сайта.
+
+"""
+
+import mmap
+import zlib
+from datetime import datetime, timezone
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import NamedTuple
+from uuid import uuid4
+
+from requests.exceptions import RequestException
+
+import artcollector.aclogger
+from artcollector.metrics import NULL_METRICS, Metrics
+from artcollector.urls import normalize_url
+
+log = getLogger(__name__)
+
+# Заголовки ответа сервера, которые сохраняются в записи архива.
+SAVED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class NotArchived(RequestException):
+    """ Страницы нет в архиве. """
+
+
+class ArchivedPage(NamedTuple):
+    """ Страница из архива. """
+
+    url: str
+    body: bytes
+    encoding: str | None
+    status: int
+    fetched: datetime
+    headers: dict
+
+
+class PageArchive:
+    """ Архив страниц: каталог с файлами-сегментами archive-NNNNN.warc.gz и индексом.
+
+    path: каталог архива.
+    segment_bytes: размер сегмента, после которого страницы пишутся в следующий.
+
+    Более поздняя запись страницы заменяет в индексе более раннюю.
+    Индекс записывается на диск каждые COMMIT_EVERY страниц, при переходе к новому сегменту
+    и при закрытии архива; страницы, записанные в сегменты, но не попавшие в индекс
+    из-за аварийного завершения, восстанавливаются при следующем открытии,
+    а недописанная запись отрезается.
+
+    """
+
+    SEGMENT_BYTES = 256 * 1024 * 1024
+    COMMIT_EVERY = 100
+    # Размер части, которыми читается сегмент при восстановлении индекса.
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, path: str | Path='archive', segment_bytes: int=SEGMENT_BYTES) -> None:
+
+        # Указатель архива хранится в SQLite; модуль нужен только открытому архиву.
+        import sqlite3
+
+        self.path = Path(path)
+        self.segment_bytes = segment_bytes
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = Lock()
+        self._maps = {}
+        self._pending = 0
+        self._db = sqlite3.connect(self.path / 'index.sqlite', check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'key TEXT PRIMARY KEY, url TEXT, segment INTEGER, offset INTEGER, length INTEGER, '
+            'fetched REAL)'
+        )
+        self._db.commit()
+
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 0
+        self._recover()
+        self._file = open(self._segment_path(self._segment), 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        return self._locate(url) is not None
+
+    def store(self, url: str, body: bytes, encoding: str | None=None, status: int=200,
+              headers=None):
+        """ Записывает страницу в архив.
+        headers: заголовки ответа сервера; сохраняются только SAVED_HEADERS. """
+
+        fetched = datetime.now(timezone.utc)
+
+        fields = [
+            ('WARC-Type', 'resource'),
+            ('WARC-Record-ID', f'<urn:uuid:{uuid4()}>'),
+            ('WARC-Date', fetched.strftime(_DATE_FORMAT)),
+            ('WARC-Target-URI', url),
+            ('Content-Type', f'text/html; charset={encoding}' if encoding else 'text/html'),
+            ('X-Status', str(status))
+        ]
+        for name in SAVED_HEADERS:
+            value = (headers or {}).get(name)
+            if value:
+                fields.append((f'X-Header-{name}', ' '.join(value.split())))
+        fields.append(('Content-Length', str(len(body))))
+
+        head = 'WARC/1.0\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in fields) + '\r\n'
+        record = _compress(head.encode('utf-8') + body + b'\r\n\r\n')
+
+        with self._lock:
+            if self._file.tell() and self._file.tell() + len(record) > self.segment_bytes:
+                self._next_segment()
+
+            offset = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+
+            self._index(url, self._segment, offset, len(record), fetched.timestamp())
+
+    def get(self, url: str) -> ArchivedPage | None:
+        """ Возвращает страницу из архива или None, если её там нет. """
+
+        location = self._locate(url)
+        if location is None:
+            return
+
+        segment, offset, length = location
+        return _parse(self._read(segment, offset, length))
+
+    def urls(self):
+        """ Перебирает ссылки страниц архива в порядке записи. """
+
+        with self._lock:
+            rows = self._db.execute('SELECT url FROM pages ORDER BY segment, offset').fetchall()
+        for (url,) in rows:
+            yield url
+
+    def pages(self):
+        """ Перебирает страницы архива (ArchivedPage) в порядке записи. """
+
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT segment, offset, length FROM pages ORDER BY segment, offset').fetchall()
+        for location in rows:
+            yield _parse(self._read(*location))
+
+    def stats(self) -> dict:
+        """ Количество страниц, сегментов и объём сегментов в байтах. """
+
+        segments = self._segments()
+        return {
+            'pages': len(self),
+            'segments': len(segments),
+            'bytes': sum(self._segment_path(segment).stat().st_size for segment in segments)
+        }
+
+    def rebuild_index(self):
+        """ Строит индекс заново по содержимому сегментов (например, если файл индекса утерян). """
+
+        with self._lock:
+            self._db.execute('DELETE FROM pages')
+            for segment in self._segments():
+                self._scan(segment, 0)
+            self._db.commit()
+            self._pending = 0
+
+        log.info('Индекс архива %s перестроен: %s страниц', self.path, len(self))
+
+    def flush(self):
+        """ Записывает индекс на диск. """
+
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self):
+        """ Закрывает сегменты и индекс архива. """
+
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps.clear()
+            self._db.commit()
+            self._db.close()
+
+    def _locate(self, url: str) -> tuple | None:
+        with self._lock:
+            return self._db.execute('SELECT segment, offset, length FROM pages WHERE key = ?',
+                (normalize_url(url),)).fetchone()
+
+    def _index(self, url: str, segment: int, offset: int, length: int, fetched: float):
+        self._db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+            (normalize_url(url), url, segment, offset, length, fetched))
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        """ Читает и распаковывает запись из сегмента, отображённого в память.
+        Отображение сегмента, который с тех пор вырос, создаётся заново. """
+
+        with self._lock:
+            segment_map = self._maps.get(segment)
+            if segment_map is None or len(segment_map) < offset + length:
+                if segment_map is not None:
+                    segment_map.close()
+                with open(self._segment_path(segment), 'rb') as file:
+                    segment_map = self._maps[segment] = mmap.mmap(
+                        file.fileno(), 0, access=mmap.ACCESS_READ)
+            data = segment_map[offset:offset + length]
+
+        return zlib.decompress(data, wbits=31)
+
+    def _recover(self):
+        """ Добавляет в индекс записи, которые в него не попали: с конца последнего сегмента,
+        известного индексу, и из всех более поздних сегментов. Недописанная запись отрезается. """
+
+        last = self._db.execute('SELECT COALESCE(MAX(segment), 0) FROM pages').fetchone()[0]
+        found = False
+
+        for segment in self._segments():
+            if segment < last:
+                continue
+
+            path = self._segment_path(segment)
+            start = self._db.execute(
+                'SELECT COALESCE(MAX(offset + length), 0) FROM pages WHERE segment = ?',
+                (segment,)).fetchone()[0]
+
+            if path.stat().st_size <= start:
+                continue
+
+            end = self._scan(segment, start)
+            found = True
+
+            if end < path.stat().st_size:
+                log.warning('Недописанная запись в конце сегмента %s отброшена', path)
+                with open(path, 'r+b') as file:
+                    file.truncate(end)
+
+        if found:
+            self._db.commit()
+            self._pending = 0
+
+    def _scan(self, segment: int, start: int) -> int:
+        """ Добавляет в индекс записи сегмента, начиная со смещения start.
+        Возвращает смещение конца последней целой записи. """
+
+        found = 0
+
+        with open(self._segment_path(segment), 'rb') as file:
+            offset = start
+            while True:
+                file.seek(offset)
+                decompressor = zlib.decompressobj(wbits=31)
+                parts = []
+                read = 0
+                while not decompressor.eof:
+                    chunk = file.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    read += len(chunk)
+                    try:
+                        parts.append(decompressor.decompress(chunk))
+                    except zlib.error:
+                        break
+
+                if not decompressor.eof:
+                    break
+
+                length = read - len(decompressor.unused_data)
+                page = _parse(b''.join(parts))
+                self._index(page.url, segment, offset, length, page.fetched.timestamp())
+                offset += length
+                found += 1
+
+        if found:
+            log.info('В индекс архива добавлено %s страниц из сегмента %s', found, segment)
+        return offset
+
+    def _next_segment(self):
+        # Индекс записывается при переходе к новому сегменту, чтобы после аварийного
+        # завершения просматривать заново не больше одного сегмента.
+        self._db.commit()
+        self._pending = 0
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), 'ab')
+        log.debug('Архив %s: новый сегмент %s', self.path, self._segment)
+
+    def _segments(self) -> list:
+        paths = self.path.glob('archive-[0-9][0-9][0-9][0-9][0-9].warc.gz')
+        return sorted(int(path.name[8:13]) for path in paths)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f'archive-{segment:05}.warc.gz'
+
+
+class ArchiveFetcher:
+    """ Загрузчик, отдающий страницы из архива вместо сети (замена Fetcher для ExtArt).
+    Страница, которой нет в архиве, вызывает NotArchived.
+
+    archive: архив страниц.
+    metrics: сборщик показателей (Metrics).
+
+    """
+
+    def __init__(self, archive: PageArchive, metrics: Metrics | None=None) -> None:
+        self.archive = archive
+        self.metrics = metrics or NULL_METRICS
+
+    def get(self, link: str) -> str:
+        """ Возвращает текст страницы из архива. """
+
+        body, encoding = self.get_raw(link)
+        return body.decode(encoding or 'utf-8', errors='replace')
+
+    def get_raw(self, link: str) -> tuple[bytes, str | None]:
+        """ Возвращает HTML-код страницы из архива в байтах и её кодировку. """
+
+        page = self.archive.get(link)
+        if page is None:
+            raise NotArchived(f'Страницы {link} нет в архиве')
+        return page.body, page.encoding
+
+    def close(self):
+        pass
+
+
+def _compress(data: bytes) -> bytes:
+    """ Сжимает данные отдельным элементом gzip. """
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _parse(record: bytes) -> ArchivedPage:
+    """ Разбирает распакованную запись архива. """
+
+    head, _, rest = record.partition(b'\r\n\r\n')
+
+    fields = {}
+    for line in head.decode('utf-8').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        fields[name.strip().lower()] = value.strip()
+
+    body = rest[:int(fields['content-length'])]
+    _, _, encoding = fields.get('content-type', '').partition('charset=')
+    headers = {name: fields[f'x-header-{name.lower()}']
+               for name in SAVED_HEADERS if f'x-header-{name.lower()}' in fields}
+
+    return ArchivedPage(
+        fields['warc-target-uri'],
+        body,
+        encoding or None,
+        int(fields.get('x-status', 200)),
+        datetime.strptime(fields['warc-date'], _DATE_FORMAT).replace(tzinfo=timezone.utc),
+        headers
+    )
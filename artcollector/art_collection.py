@@ -6,73 +6,510 @@
 
 """
 
+import sys
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from logging import getLogger
+from os import PathLike, fspath
+from threading import BoundedSemaphore, Lock
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
 import artcollector.aclogger
+from artcollector.checkpoint import Checkpoint
+from artcollector.crawler import Crawler
+from artcollector.search import SearchIndex
 from artcollector.sites import ExtArt
-from artcollector.to_frm import to_txt
+from artcollector.storage import MemoryStorage, SQLiteStorage
+from artcollector.to_frm import export
+from artcollector.urls import normalize_url
+from artcollector.views import ArticleView
+
+if TYPE_CHECKING:
+    from artcollector.archive import PageArchive
 
 log = getLogger(__name__)
 
+# Статусы загрузки отдельных ссылок в отчёте load_report.
+LOADED = 'loaded'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
 class ArticleCollection:
-    """ Коллекция статей """
+    """ Коллекция статей.
+
+    collection_name: название коллекции.
+    art_factor: экземпляр ExtArt, через который загружаются статьи.
+        Если не указан, создаётся свой с настройками по умолчанию.
+        Для загрузки во много потоков стоит передать ExtArt
+        с pool_maxsize не меньше числа потоков.
+    storage: хранилище статей (см. модуль storage). По умолчанию статьи хранятся в памяти.
+        Коллекцию в базе SQLite удобнее открывать методом open.
+    search_path: файл поискового индекса коллекции. Если не указан, индекс хранится только в памяти.
+
+    """
+
+    # Сколько загруженных статей накапливать перед записью в хранилище.
+    BATCH_SIZE = 100
+
+    def __init__(self, collection_name: str='Статьи', art_factor: ExtArt | None=None,
+                 storage=None, search_path: str | None=None) -> None:
 
-    def __init__(self, collection_name: str='Статьи') -> None:
+        artcollector.aclogger.auto_setup()
 
         self.collection_name = collection_name
 
-        self._collection_data = []
+        self.art_factor = art_factor or ExtArt()
+
+        self._storage = storage if storage is not None else MemoryStorage()
+
+        self._search_path = search_path
+        self._search_index = None
+
+        self._load_report = []
+
+    @classmethod
+    def open(cls, path: str, collection_name: str | None=None, art_factor: ExtArt | None=None):
+        """ Открывает коллекцию, хранящуюся в базе SQLite (если базы нет, она создаётся).
+        Название коллекции сохраняется в базе; collection_name задаёт новое название.
+        Поисковый индекс хранится рядом с базой, в файле с расширением .search. """
+
+        storage = SQLiteStorage(path)
+
+        if collection_name:
+            storage.name = collection_name
 
-        self._collection_urls = []
+        return cls(storage.name or 'Статьи', art_factor, storage, f'{path}.search')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def __iter__(self):
-        return iter(self._collection_data)
+        return iter(self._storage)
 
     def __getitem__(self, value):
-        return self._collection_data[value]
+        if isinstance(value, str):
+            return self._storage.get_url(normalize_url(value))
+        return self._storage.get(value)
+
+    def __contains__(self, value):
+        if isinstance(value, str):
+            return self._storage.has_url(normalize_url(value))
+        return value in self._storage
 
     def __len__(self):
-        return len(self._collection_data)
+        return len(self._storage)
+
+    @property
+    def metrics(self):
+        """ Возвращает сборщик показателей загрузки (см. ExtArt и модуль metrics). """
+
+        return self.art_factor.metrics
+
+    @property
+    def storage(self):
+        """ Возвращает хранилище статей коллекции. """
+
+        return self._storage
+
+    def find(self, source: str | None=None, author: str | None=None, tag: str | None=None,
+             since: datetime | None=None, until: datetime | None=None):
+        """ Отдаёт статьи коллекции, подходящие под все указанные условия.
+        source: полное имя источника или сайт (например, 'tass.ru');
+        author: автор;
+        tag: тег (без учёта регистра);
+        since, until: границы даты публикации (включительно). """
+
+        return self._storage.find(source=source, author=author, tag=tag, since=since, until=until)
+
+    def view(self, collection_name: str | None=None) -> ArticleView:
+        """ Возвращает представление всей коллекции (см. модуль views). """
+
+        return ArticleView(self, collection_name)
+
+    def filter(self, where=None, source: str | None=None, author: str | None=None,
+               tag: str | None=None, since: datetime | None=None,
+               until: datetime | None=None) -> ArticleView:
+        """ Возвращает ленивое представление статей, подходящих под условия (см. ArticleView.filter). """
 
-    def load_from_urls(self, path_to_urls: str) -> int:
+        return self.view().filter(where, source=source, author=author, tag=tag, since=since,
+            until=until)
+
+    def sort(self, key='published', reverse: bool=False) -> ArticleView:
+        """ Возвращает ленивое представление статей, упорядоченных по key (см. ArticleView.sort).
+        По умолчанию - по дате публикации. """
+
+        return self.view().sort(key, reverse)
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """ Возвращает поисковый индекс коллекции.
+        При первом обращении индекс загружается из файла search_path (или создаётся)
+        и дополняется статьями, которых в нём нет. Дальше он пополняется вместе с коллекцией. """
+
+        if self._search_index is None:
+            index = SearchIndex.load(self._search_path) if self._search_path else SearchIndex()
+            if len(index) > len(self):
+                log.warning('Поисковый индекс %s не соответствует коллекции и будет построен заново',
+                    self._search_path)
+                index = SearchIndex()
+            index.update(self)
+            self._search_index = index
+        return self._search_index
+
+    def search(self, query: str, limit: int=10, source: str | None=None, tag: str | None=None,
+               since: datetime | None=None, until: datetime | None=None) -> list:
+        """ Полнотекстовый поиск по коллекции (см. SearchIndex.search).
+        Возвращает список пар (статья, оценка) по убыванию оценки. """
+
+        index = self.search_index
+
+        return [(self[index.link(doc)], score) for doc, score in
+                index.search(query, limit, source=source, tag=tag, since=since, until=until)]
+
+    def save_search_index(self):
+        """ Сохраняет поисковый индекс в файл search_path, если индекс построен. """
+
+        if self._search_index is not None and self._search_path:
+            self._search_index.save(self._search_path)
+
+    def add(self, articles) -> int:
+        """ Добавляет статьи в коллекцию одним пакетом. Статьи, уже присутствующие в коллекции, пропускаются.
+        Возвращает количество добавленных статей. """
+
+        added = self._storage.add(articles)
+
+        if added and self._search_index is not None:
+            self._search_index.update(self)
+
+        return added
+
+    def close(self):
+        """ Сохраняет поисковый индекс и закрывает хранилище коллекции. """
+
+        self.save_search_index()
+        self._storage.close()
+
+    @property
+    def load_report(self) -> list:
+        """ Возвращает результаты последней загрузки:
+        список кортежей (ссылка, статус) в порядке следования ссылок.
+        Статусы: LOADED, DUPLICATE, FAILED, SKIPPED. """
+
+        return self._load_report
+
+    def load_from_urls(self, path_to_urls, workers: int=1, per_host: int | None=None,
+                       processes: int | None=None, checkpoint: str | None=None,
+                       retry_failed: bool=False) -> int:
         """ Получает путь к файлу со ссылками,
         Извлекает данные статей по этим ссылкам,
         Добавляет их в коллекцию,
-        Возвращает количество добавленных статей. """
+        Возвращает количество добавленных статей.
+
+        path_to_urls: путь к файлу со ссылками (по одной в строке; файл .gz читается со сжатием),
+            '-' - стандартный ввод, или любой итерируемый объект со ссылками (см. iter_from_urls).
+        workers: количество потоков загрузки. При workers=1 статьи загружаются последовательно.
+        per_host: наибольшее число одновременных запросов к одному сайту (по умолчанию не ограничено).
+        processes: количество процессов для разбора страниц. Если указано, потоки только
+            загружают страницы, а извлечение статей выполняется в пуле процессов (ParsePool).
+        checkpoint: путь к журналу загрузки (см. модуль checkpoint). В журнал записывается
+            состояние каждой ссылки, и повторный вызов с тем же журналом продолжает прерванную
+            загрузку: загруженные ссылки пропускаются, а ссылки, которые не удалось загрузить,
+            пропускаются (статус SKIPPED), если не задан retry_failed.
+            Продолжение имеет смысл для коллекции в базе SQLite (см. open): статьи коллекции
+            в памяти после перезапуска теряются, и такие ссылки загружаются заново.
+        retry_failed: повторить загрузку ссылок, отмеченных в журнале как не загруженные.
+
+        Статьи добавляются в коллекцию в порядке следования ссылок в файле.
+        Ссылки сравниваются в нормализованном виде (normalize_url), поэтому статья,
+        уже присутствующая в коллекции, повторно не загружается.
+        Результат по каждой ссылке доступен в load_report.
+        Статьи записываются в хранилище пакетами по BATCH_SIZE.
+        Исключение при извлечении отдельной статьи не прерывает загрузку: ссылка отмечается как FAILED.
 
-        art_factor = ExtArt()
-        size = len(self._collection_data)
+        """
+
+        size = len(self)
+
+        for _ in self.iter_from_urls(path_to_urls, workers=workers, per_host=per_host,
+                                     processes=processes, checkpoint=checkpoint,
+                                     retry_failed=retry_failed):
+            pass
+
+        return len(self) - size
+
+    def iter_from_urls(self, urls, workers: int=1, per_host: int | None=None,
+                       processes: int | None=None, checkpoint: str | None=None,
+                       retry_failed: bool=False, art_factor: ExtArt | None=None):
+        """ Загружает статьи по ссылкам urls, добавляет их в коллекцию и отдаёт (Article)
+        по мере загрузки, не дожидаясь конца списка.
+
+        urls: итерируемый объект со ссылками (список, генератор, открытый файл),
+            путь к файлу со ссылками (файл .gz читается со сжатием) или '-' - стандартный ввод.
+            Ссылки читаются по мере загрузки, пустые строки пропускаются.
+
+        art_factor: экземпляр ExtArt для этой загрузки вместо art_factor коллекции.
+
+        Остальные параметры и порядок статей - как у load_from_urls.
+        Вперёд читается не больше workers * 2 ссылок: пока отданная статья не обработана,
+        загрузка следующих приостанавливается, поэтому список ссылок может быть любой длины.
+        Отданная статья уже есть в коллекции, но в хранилище записывается вместе со своим пакетом.
+        Если перебор прерван, загруженные статьи всё равно записываются в хранилище.
+
+        """
+
+        art_factor = art_factor or self.art_factor
+        self._load_report = []
 
         try:
-            with open(path_to_urls, 'r', encoding='utf-8') as file_urls:
-                urls = map(str.strip, file_urls.readlines())
+            source = _open_urls(urls)
         except (FileNotFoundError, FileExistsError):
-            log.fatal('Файл %s не существует или не найден', path_to_urls, exc_info=True)
-            return len(self._collection_data) - size
+            log.fatal('Файл %s не существует или не найден', urls, exc_info=True)
+            return
+
+        journal = Checkpoint(checkpoint) if checkpoint else None
+        limiter = _HostLimiter(per_host)
+        queued = set()
+
+        def tasks(lines):
+            # Повторы отсекаются до отправки в пул, чтобы не загружать одну статью дважды.
+            # Вместо признака повтора передаётся статус ссылки, которую загружать не нужно.
+            for url in map(str.strip, lines):
+                if not url:
+                    continue
+                key = normalize_url(url)
+                if key in queued or self._storage.has_url(key):
+                    skip = DUPLICATE
+                elif journal is not None and not retry_failed and journal.is_failed(url):
+                    skip = SKIPPED
+                else:
+                    skip = None
+                queued.add(key)
+                yield url, skip
+
+        def extract(task):
+            # Возвращает пару (статья или страница для пула процессов, описание ошибки).
+            url, skip = task
+            if skip:
+                return None, None
+            try:
+                with limiter(url):
+                    if processes:
+                        return art_factor.fetch_page(url)
+                    return art_factor.extract(url)
+            except Exception as error:
+                log.error('Ошибка при загрузке статьи %s', url, exc_info=True)
+                return None, f'{type(error).__name__}: {error}'
+
+        def parsed(results):
+            # Страницы извлекаются в пуле процессов; ошибка загрузки страницы
+            # сохраняется в метке, так как пул о ней не знает.
+            pages = (((task, error), task[0], page) for task, (page, error) in results)
+            for (task, fetch_error), art, error in parse_pool.imap(pages):
+                yield task, (art, fetch_error or error)
+
+        if processes:
+            # Пул процессов нужен не всегда, поэтому модуль загружается только здесь.
+            # Процессы извлекают статьи с тем же разборщиком и реестром сайтов, что и art_factor.
+            from artcollector.parse_pool import ParsePool
+            pool = ParsePool(processes, art_factor.metrics, art_factor.parser, art_factor.registry)
+        else:
+            pool = nullcontext()
+
+        batch = []
+        # Ссылки статей пакета: отмечаются в журнале после записи пакета в хранилище.
+        batch_urls = []
+
+        def flush():
+            self.add(batch)
+            if journal is not None:
+                journal.done(batch_urls)
+                journal.flush()
+            batch.clear()
+            batch_urls.clear()
+
+        with source as lines, pool as parse_pool:
+
+            results = _ordered_map(extract, tasks(lines), workers)
+            if parse_pool:
+                results = parsed(results)
+
+            try:
+                for (url, skip), (art, error) in results:
+                    if skip == DUPLICATE:
+                        log.info('Статья по ссылке %s уже присутствует в коллекции', url)
+                        self._load_report.append((url, DUPLICATE))
+                    elif skip == SKIPPED:
+                        log.info('Статья по ссылке %s пропущена: в прошлый раз она не загрузилась (%s)',
+                            url, journal.status(url)[1])
+                        self._load_report.append((url, SKIPPED))
+                    elif art:
+                        batch.append(art)
+                        batch_urls.append(url)
+                        self._load_report.append((url, LOADED))
+                        if len(batch) >= self.BATCH_SIZE:
+                            flush()
+                        yield art
+                    else:
+                        log.warning('Статья по ссылке %s не выгрузилась: %s', url, error)
+                        self._load_report.append((url, FAILED))
+                        if journal is not None:
+                            journal.failed(url, error or 'статья не извлечена')
+            finally:
+                # Уже загруженные статьи сохраняются, даже если загрузка прервалась.
+                flush()
+                if journal is not None:
+                    journal.close()
+                self.save_search_index()
+                art_factor.metrics.flush()
+
+    async def aiter_from_urls(self, urls, workers: int=1, per_host: int | None=None,
+                              processes: int | None=None, checkpoint: str | None=None,
+                              retry_failed: bool=False):
+        """ Асинхронный вариант iter_from_urls: async for art in collection.aiter_from_urls(urls).
+        Загрузка идёт в отдельном потоке и не блокирует цикл событий; следующая статья
+        загружается, когда запрошена предыдущая. Если перебор прерывается досрочно,
+        генератор стоит закрыть (contextlib.aclosing), чтобы статьи сразу записались в хранилище. """
+
+        # asyncio нужен только здесь, поэтому модуль загружается при первом вызове.
+        import asyncio
+
+        articles = self.iter_from_urls(urls, workers=workers, per_host=per_host, processes=processes,
+                                       checkpoint=checkpoint, retry_failed=retry_failed)
+        loop = asyncio.get_running_loop()
+        end = object()
+
+        # Перебор всегда идёт в одном и том же потоке.
+        with ThreadPoolExecutor(max_workers=1) as thread:
+            try:
+                while (art := await loop.run_in_executor(thread, next, articles, end)) is not end:
+                    yield art
+            finally:
+                await loop.run_in_executor(thread, articles.close)
+
+    def load_from_archive(self, archive: 'PageArchive', urls=None, workers: int=1,
+                          processes: int | None=None, checkpoint: str | None=None,
+                          retry_failed: bool=False) -> int:
+        """ Извлекает статьи из архива страниц (см. модуль archive) без обращения к сети
+        и добавляет их в коллекцию. Возвращает количество добавленных статей.
+
+        urls: ссылки, статьи по которым нужно извлечь (как в load_from_urls).
+            По умолчанию - все страницы архива в порядке их записи.
 
-        for url in urls:
-            if url in self._collection_urls:
-                log.info('Статья по ссылке %s уже присутствует в коллекции', url)
-                continue
+        Остальные параметры - как у load_from_urls. Ссылки, страниц которых нет в архиве,
+        отмечаются как FAILED. Разборщик, показатели и реестр сайтов берутся из art_factor коллекции.
 
-            art = art_factor(url)
-            if art:
-                self._collection_data.append(art)
-                self._collection_urls.append(url)
-            else:
-                log.warning('Статья по ссылке %s не выгрузилась', url)
+        """
+
+        from artcollector.archive import ArchiveFetcher
+
+        factor = self.art_factor
+        archived = ExtArt(fetcher=ArchiveFetcher(archive), parser=factor.parser,
+            metrics=factor.metrics, registry=factor.registry)
+        size = len(self)
+
+        for _ in self.iter_from_urls(archive.urls() if urls is None else urls, workers=workers,
+                                     processes=processes, checkpoint=checkpoint,
+                                     retry_failed=retry_failed, art_factor=archived):
+            pass
 
         return len(self) - size
 
-    def to(self, frm: str='txt'):
-        """ Конвертирует коллекцию в указанный формат. """
+    def crawl(self, seeds, max_depth: int=2, max_pages: int=1000, workers: int=4, per_host: int=1,
+              delay: float=1.0, order: str='newest', follow: str | None=None) -> int:
+        """ Пополняет коллекцию обходом сайтов по ссылкам из статей, начиная со ссылок seeds
+        (см. Crawler). Статьи, уже присутствующие в коллекции, не загружаются повторно,
+        но ссылки из них участвуют в обходе.
+        Возвращает количество добавленных статей. """
 
-        formats = {
-            'txt': to_txt
-        }
+        crawler = Crawler(self.art_factor, max_depth=max_depth, max_pages=max_pages, workers=workers,
+            per_host=per_host, delay=delay, order=order, follow=follow)
+        size = len(self)
+        batch = []
 
-        if frm in formats:
-            return formats[frm](self)
-        else:
-            log.error('Неизвестный формат %s', frm)
-            return
+        try:
+            for art in crawler.crawl(seeds, known=self):
+                batch.append(art)
+                if len(batch) >= self.BATCH_SIZE:
+                    self.add(batch)
+                    batch = []
+        finally:
+            self.add(batch)
+            self.save_search_index()
+            self.art_factor.metrics.flush()
+
+        return len(self) - size
+
+    def to(self, frm: str='txt', stream=None, path: str | None=None, compress: str | None=None,
+           append: bool=False):
+        """ Конвертирует коллекцию в указанный формат (txt, jsonl, csv или другой из EXPORTERS).
+        Если передан поток stream или путь к файлу path, выгрузка записывается в него по частям
+        и метод возвращает количество записанных символов.
+        compress и append - сжатие и дописывание файла (см. to_frm.export). """
+
+        return export(self, frm, stream=stream, path=path, compress=compress, append=append)
+
+
+class _HostLimiter:
+    """ Ограничивает число одновременных запросов к одному сайту. """
+
+    def __init__(self, limit: int | None) -> None:
+        self._limit = limit
+        self._semaphores = {}
+        self._lock = Lock()
+
+    def __call__(self, url: str):
+        if not self._limit:
+            return nullcontext()
+
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = BoundedSemaphore(self._limit)
+            return self._semaphores[host]
+
+
+def _open_urls(source):
+    """ Возвращает контекстный менеджер, отдающий итерируемый объект со строками-ссылками:
+    путь к файлу (.gz - сжатому gzip), '-' - стандартный ввод, иначе сам source. """
+
+    if isinstance(source, (str, PathLike)):
+        if source == '-':
+            return nullcontext(sys.stdin)
+        if fspath(source).endswith('.gz'):
+            import gzip
+            return gzip.open(source, 'rt', encoding='utf-8')
+        return open(source, 'r', encoding='utf-8')
+    return nullcontext(source)
+
+
+def _ordered_map(func, items, workers: int):
+    """ Аналог map, выполняющий func в пуле из workers потоков.
+    Отдаёт пары (элемент, результат) в исходном порядке элементов.
+    Одновременно в работе держит не более workers * 2 задач,
+    поэтому items может быть ленивым итератором любой длины.
+
+    """
+
+    if workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(func, item)))
+            if len(pending) >= workers * 2:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
@@ -0,0 +1,134 @@
+""" Модуль article.
+    Описание: Компактная запись статьи.
+        Классы сайтов разбирают страницу и возвращают запись Article,
+        в которой остаются только извлечённые данные, без деревьев страницы.
+
+"""
+
+from datetime import datetime
+
+# Ключи info, общие для всех сайтов. Остальные ключи - дополнительные данные сайта.
+BASE_KEYS = ('source', 'date', 'author', 'headline', 'link', 'text', 'links')
+
+
+class Article:
+    """ Статья, извлечённая со страницы.
+        Предоставляет те же свойства и доступ по ключу (art['tags']), что и классы сайтов.
+
+    """
+
+    __slots__ = ('_source_name', '_date', '_author', '_headline', '_link', '_text', '_links',
+                 '_extra')
+
+    FRM = "%d.%m.%Y %H:%M"
+
+    def __init__(self, source_name: str, date: datetime, author: str | None, headline: str,
+                 link: str, text: str, links: list, extra: dict | None=None) -> None:
+
+        self._source_name = source_name
+        self._date = date
+        self._author = author
+        self._headline = headline
+        self._link = link
+        self._text = text
+        self._links = links
+        # Дополнительные данные сайта (теги, аннотация). Пустой словарь не хранится.
+        self._extra = extra or None
+
+    def __getitem__(self, key: str):
+        match key:
+            case 'source':
+                return self._source_name
+            case 'date':
+                return self.date
+            case 'author':
+                return self._author
+            case 'headline':
+                return self._headline
+            case 'link':
+                return self._link
+            case 'text':
+                return self._text
+            case 'links':
+                return self._links
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __str__(self) -> str:
+        return (f"{self.source_name}, {self.date} "
+        f"{self.headline} <Полный текст> {self.link}")
+
+    def __repr__(self) -> str:
+        return f'Article({self._link!r})'
+
+    @property
+    def date(self):
+        """ Возвращает дату """
+
+        return self._date.strftime(self.FRM)
+
+    @property
+    def published(self) -> datetime:
+        """ Возвращает дату публикации в виде datetime """
+
+        return self._date
+
+    @property
+    def source_name(self):
+        """ Возвращает полное имя источника """
+
+        return self._source_name
+
+    @property
+    def link(self):
+        """ Возвращает ссылку на статью """
+
+        return self._link
+
+    @property
+    def author(self):
+        """ Возвращает автора статьи (если имеется) """
+
+        return self._author
+
+    @property
+    def headline(self):
+        """ Возвращает заголовок статьи """
+
+        return self._headline
+
+    @property
+    def full_text(self):
+        """ Возвращает полный текст статьи """
+
+        return self._text
+
+    @property
+    def info(self) -> dict:
+        """ Возвращает полную информацию о статье в виде словаря, включая дополнительные данные. """
+
+        info = {
+            'source': self._source_name,
+            'date': self.date,
+            'author': self._author,
+            'headline': self._headline,
+            'link': self._link,
+            'text': self._text,
+            'links': self._links
+        }
+        if self._extra:
+            info.update(self._extra)
+        return info
+
+    @property
+    def extra(self) -> dict:
+        """ Возвращает дополнительные данные сайта (теги, аннотацию и т. п.) """
+
+        return self._extra or {}
+
+    @property
+    def links(self):
+        """ Возвращает список ссылок из статьи. """
+
+        return self._links
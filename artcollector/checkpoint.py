@@ -0,0 +1,139 @@
+""" Модуль checkpoint.
+    Описание: Журнал пакетной загрузки статей.
+        Для каждой ссылки в журнал дописывается строка с её состоянием: загружена (done)
+        или не загружена с указанием причины (failed). Ссылки, которых нет в журнале,
+        ещё не обработаны. По журналу прерванную загрузку можно продолжить с того же места.
+
+"""
+
+import os
+from logging import getLogger
+from pathlib import Path
+
+import artcollector.aclogger
+from artcollector.urls import normalize_url
+
+log = getLogger(__name__)
+
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Checkpoint:
+    """ Журнал загрузки: текстовый файл, в который только дописываются строки
+    «состояние<TAB>ссылка<TAB>причина». Более поздняя строка о ссылке заменяет более раннюю.
+    Запись буферизуется и сбрасывается на диск методом flush (коллекция вызывает его
+    после записи каждого пакета статей в хранилище).
+
+    path: путь к файлу журнала. Если файл есть, состояние ссылок читается из него.
+
+    """
+
+    # Во сколько раз число строк журнала может превышать число ссылок в нём
+    # прежде, чем журнал будет переписан без устаревших строк.
+    COMPACT_RATIO = 2
+
+    def __init__(self, path: str | Path) -> None:
+
+        self.path = Path(path)
+        self._status = {}
+
+        lines = self._read()
+        if lines > max(len(self._status) * self.COMPACT_RATIO, 1000):
+            self._compact()
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._status)
+
+    def status(self, url: str) -> tuple | None:
+        """ Возвращает состояние ссылки (DONE или FAILED, причина) или None, если ссылка ещё не обработана. """
+
+        return self._status.get(normalize_url(url))
+
+    def is_failed(self, url: str) -> bool:
+        """ Проверяет, что ссылка отмечена как не загруженная. """
+
+        state = self._status.get(normalize_url(url))
+        return state is not None and state[0] == FAILED
+
+    def done(self, urls):
+        """ Отмечает ссылки как загруженные. """
+
+        for url in urls:
+            self._write(DONE, url, '')
+
+    def failed(self, url: str, reason: str=''):
+        """ Отмечает ссылку как не загруженную по причине reason. """
+
+        self._write(FAILED, url, ' '.join(reason.split()))
+
+    def stats(self) -> dict:
+        """ Количество ссылок в каждом состоянии. """
+
+        counts = {DONE: 0, FAILED: 0}
+        for status, _ in self._status.values():
+            counts[status] += 1
+        return counts
+
+    def flush(self):
+        """ Сбрасывает записанные строки на диск. """
+
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def _write(self, status: str, url: str, reason: str):
+        self._status[normalize_url(url)] = (status, reason)
+        self._file.write(f'{status}\t{url}\t{reason}\n')
+
+    def _read(self) -> int:
+        """ Читает журнал. Возвращает число строк в нём.
+        Недописанная последняя строка (после аварийного завершения) отрезается. """
+
+        lines = 0
+        complete = 0
+
+        try:
+            file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return lines
+
+        with file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                complete += len(line)
+                lines += 1
+                status, _, rest = line.decode('utf-8', errors='replace').rstrip('\n').partition('\t')
+                url, _, reason = rest.partition('\t')
+                if status in (DONE, FAILED) and url:
+                    self._status[normalize_url(url)] = (status, reason)
+
+        if complete < self.path.stat().st_size:
+            log.warning('Недописанная строка в конце журнала %s отброшена', self.path)
+            os.truncate(self.path, complete)
+
+        log.debug('Журнал %s: %s', self.path, self.stats())
+        return lines
+
+    def _compact(self):
+        """ Переписывает журнал, оставляя по одной строке на ссылку. """
+
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            for key, (status, reason) in self._status.items():
+                file.write(f'{status}\t{key}\t{reason}\n')
+        os.replace(tmp_path, self.path)
+
+        log.debug('Журнал %s сжат до %s строк', self.path, len(self._status))
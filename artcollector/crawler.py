@@ -0,0 +1,241 @@
+""" Модуль crawler.
+    Описание: Обход сайтов по ссылкам из статей.
+        Начиная с заданных ссылок, загружает статьи и ставит в очередь найденные в них ссылки
+        на поддерживаемые сайты (см. модуль registry). Очередь не допускает повторов,
+        обход ограничен глубиной и количеством страниц, к одному сайту обращения идут
+        не чаще заданного.
+
+"""
+
+import heapq
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import count
+from logging import getLogger
+from time import monotonic, sleep
+from urllib.parse import urljoin, urlsplit
+
+import artcollector.aclogger
+from artcollector.sites import ExtArt
+from artcollector.storage import timestamp
+from artcollector.urls import normalize_url
+
+log = getLogger(__name__)
+
+
+class Crawler:
+    """ Обходчик сайтов.
+
+    art_factor: экземпляр ExtArt, через который загружаются статьи.
+    max_depth: наибольшая глубина перехода по ссылкам (у начальных ссылок глубина 0).
+    max_pages: наибольшее количество загружаемых страниц.
+    workers: количество потоков загрузки.
+    per_host: наибольшее число одновременных запросов к одному сайту.
+    delay: наименьший промежуток в секундах между запросами к одному сайту.
+    order: порядок обхода очереди:
+        'newest' - сначала ссылки из самых свежих статей (по умолчанию),
+        'depth' - по уровням, сначала ближайшие к начальным ссылкам.
+    follow: регулярное выражение; если задано, в очередь ставятся только подходящие ссылки.
+
+    """
+
+    ORDERS = ('newest', 'depth')
+
+    def __init__(self, art_factor: ExtArt | None=None, max_depth: int=2, max_pages: int=1000,
+                 workers: int=4, per_host: int=1, delay: float=1.0, order: str='newest',
+                 follow: str | None=None) -> None:
+
+        if order not in self.ORDERS:
+            raise ValueError(f'Неизвестный порядок обхода {order!r}')
+
+        self.art_factor = art_factor or ExtArt()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = workers
+        self.per_host = per_host
+        self.delay = delay
+        self.order = order
+        self.follow = re.compile(follow) if follow else None
+
+        self.stats = {}
+
+    def crawl(self, seeds, known=None):
+        """ Обходит сайты, начиная со ссылок seeds, и отдаёт загруженные статьи (Article)
+        по мере загрузки.
+
+        known: коллекция уже загруженных статей (например, ArticleCollection).
+            Статьи из неё повторно не загружаются и не отдаются, но ссылки из них
+            ставятся в очередь, поэтому обход можно продолжить с прежних начальных ссылок.
+
+        Количество загруженных страниц, статей, неудач и известных статей - в stats.
+
+        """
+
+        self.stats = {'fetched': 0, 'articles': 0, 'failed': 0, 'known': 0}
+
+        frontier = _Frontier()
+        seen = set()
+        order = count()
+
+        def enqueue(url, depth, parent=None):
+            key = normalize_url(url)
+            if key in seen:
+                return
+            seen.add(key)
+            # Статьи, уже присутствующие в коллекции, не загружаются, но раскрываются.
+            if known is not None and url in known:
+                self.stats['known'] += 1
+                expand(known[url], depth)
+                return
+            if self.order == 'newest':
+                # Начальные ссылки идут первыми, затем ссылки из более свежих статей.
+                rank = (-timestamp(parent.published) if parent else float('-inf'), depth)
+            else:
+                rank = (depth,)
+            frontier.push((rank, next(order), url, depth))
+
+        def expand(art, depth):
+            if depth >= self.max_depth:
+                return
+            for link in art.links:
+                url = urljoin(art.link, link)
+                if self._acceptable(url):
+                    enqueue(url, depth + 1, art)
+
+        for url in seeds:
+            url = url.strip()
+            if url:
+                enqueue(url, 0)
+
+        hosts = _Politeness(self.per_host, self.delay)
+        running = {}
+        submitted = 0
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while frontier or running:
+
+                while frontier and submitted < self.max_pages and len(running) < self.workers:
+                    task = frontier.pop(hosts.ready)
+                    if task is None:
+                        break
+                    _, _, url, depth = task
+                    hosts.acquire(url)
+                    running[pool.submit(self._fetch, url)] = (url, depth)
+                    submitted += 1
+
+                waiting = frontier and submitted < self.max_pages
+
+                if not running:
+                    if not waiting:
+                        break
+                    # Все сайты из очереди выдерживают паузу между запросами: ждём ближайший.
+                    sleep(hosts.wait_time())
+                    continue
+
+                # Ожидание завершения загрузки, но не дольше паузы ближайшего сайта из очереди.
+                done, _ = wait(running, timeout=hosts.wait_time() or None if waiting else None,
+                               return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    url, depth = running.pop(future)
+                    hosts.release(url)
+                    self.stats['fetched'] += 1
+
+                    art = future.result()
+                    if art is None:
+                        self.stats['failed'] += 1
+                        continue
+
+                    self.stats['articles'] += 1
+                    expand(art, depth)
+                    yield art
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        log.info('Обход завершён: %s', self.stats)
+
+    def _fetch(self, url: str):
+        """ Загружает статью. Ошибка на отдельной странице не останавливает обход. """
+
+        try:
+            return self.art_factor(url)
+        except Exception:
+            log.warning('Не удалось извлечь статью %s', url, exc_info=True)
+            return
+
+    def _acceptable(self, url: str) -> bool:
+        """ Проверяет, что ссылку нужно ставить в очередь. """
+
+        if urlsplit(url).scheme not in ('http', 'https'):
+            return False
+        if self.follow and not self.follow.search(url):
+            return False
+        return self.art_factor.supports(url)
+
+
+class _Frontier:
+    """ Очередь ссылок на обход, разбитая по сайтам: выбор следующей ссылки
+    не зависит от числа ссылок в очереди, а только от числа сайтов. """
+
+    def __init__(self) -> None:
+        self._heaps = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, task: tuple):
+        """ Добавляет задачу (порядок, номер, ссылка, глубина). """
+
+        heapq.heappush(self._heaps.setdefault(_host(task[2]), []), task)
+        self._size += 1
+
+    def pop(self, ready):
+        """ Извлекает первую по порядку задачу среди сайтов, для которых ready(сайт) истинно.
+        Возвращает None, если таких задач нет. """
+
+        best = None
+        for host, heap in self._heaps.items():
+            if heap and (best is None or heap[0] < best[0]) and ready(host):
+                best = heap
+
+        if best is None:
+            return
+        self._size -= 1
+        return heapq.heappop(best)
+
+
+class _Politeness:
+    """ Учитывает число запросов к каждому сайту и время последнего запроса. """
+
+    def __init__(self, limit: int, delay: float) -> None:
+        self._limit = limit
+        self._delay = delay
+        self._active = {}
+        self._next = {}
+
+    def ready(self, host: str) -> bool:
+        """ Проверяет, можно ли сейчас отправить запрос к сайту. """
+
+        return self._active.get(host, 0) < self._limit and self._next.get(host, 0) <= monotonic()
+
+    def acquire(self, url: str):
+        """ Учитывает запрос к сайту ссылки. """
+
+        host = _host(url)
+        self._active[host] = self._active.get(host, 0) + 1
+        self._next[host] = monotonic() + self._delay
+
+    def release(self, url: str):
+        self._active[_host(url)] -= 1
+
+    def wait_time(self) -> float:
+        """ Время до того, как освободится ближайший сайт, ожидающий паузы. """
+
+        now = monotonic()
+        return max(min((t - now for t in self._next.values() if t > now), default=0), 0)
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or '').removeprefix('www.')
@@ -0,0 +1,114 @@
+""" Модуль dates.
+    Описание: Разбор дат публикации, не зависящий от локали.
+        Названия месяцев (русские и английские, полные, в родительном падеже и сокращённые)
+        заменяются номерами по встроенной таблице, поэтому форматы с %b и %B разбираются
+        одинаково в любой локали и в любом потоке, без вызова setlocale.
+        Дата без часового пояса получает часовой пояс сайта.
+
+"""
+
+import re
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+
+# Московское время (без перехода на летнее время с 2014 года).
+MSK = timezone(timedelta(hours=3), 'MSK')
+
+_RU_MONTHS = (
+    ('январь', 'января', 'янв'),
+    ('февраль', 'февраля', 'фев', 'февр'),
+    ('март', 'марта', 'мар'),
+    ('апрель', 'апреля', 'апр'),
+    ('май', 'мая'),
+    ('июнь', 'июня', 'июн'),
+    ('июль', 'июля', 'июл'),
+    ('август', 'августа', 'авг'),
+    ('сентябрь', 'сентября', 'сен', 'сент'),
+    ('октябрь', 'октября', 'окт'),
+    ('ноябрь', 'ноября', 'ноя', 'нояб'),
+    ('декабрь', 'декабря', 'дек')
+)
+
+_EN_MONTHS = (
+    ('january', 'jan'),
+    ('february', 'feb'),
+    ('march', 'mar'),
+    ('april', 'apr'),
+    ('may',),
+    ('june', 'jun'),
+    ('july', 'jul'),
+    ('august', 'aug'),
+    ('september', 'sep', 'sept'),
+    ('october', 'oct'),
+    ('november', 'nov'),
+    ('december', 'dec')
+)
+
+# Название месяца в нижнем регистре -> номер месяца.
+MONTHS = {
+    name: number
+    for table in (_RU_MONTHS, _EN_MONTHS)
+    for number, names in enumerate(table, 1)
+    for name in names
+}
+
+_WORD = re.compile(r'[^\W\d_]+')
+
+
+@lru_cache(maxsize=None)
+def _compile(frm: str) -> tuple:
+    """ Возвращает формат, в котором названия месяцев заменены номером (%m),
+    и признак того, что в строке даты нужно заменять названия месяцев. """
+
+    if '%b' not in frm and '%B' not in frm:
+        return frm, False
+    return frm.replace('%B', '%m').replace('%b', '%m'), True
+
+
+def _month_number(match) -> str:
+    number = MONTHS.get(match[0].casefold().replace('ё', 'е'))
+    return f'{number:02d}' if number else match[0]
+
+
+def replace_months(text: str) -> str:
+    """ Заменяет названия месяцев в строке их номерами: '17 января 2023' -> '17 01 2023'. """
+
+    return _WORD.sub(_month_number, text)
+
+
+def parse_date(text: str, formats, tz: tzinfo | None=timezone.utc) -> datetime:
+    """ Разбирает строку даты, перебирая форматы strptime по порядку.
+
+    text: строка даты.
+    formats: формат или последовательность форматов. %b и %B означают название месяца
+        на русском или английском языке.
+    tz: часовой пояс даты, в которой он не указан. None - оставить дату без часового пояса.
+
+    Возвращает дату (datetime). Если строка не подходит ни под один формат, вызывает ValueError.
+
+    """
+
+    if isinstance(formats, str):
+        formats = (formats,)
+
+    replaced = None
+
+    for frm in formats:
+        pattern, named = _compile(frm)
+        if named:
+            if replaced is None:
+                replaced = replace_months(text)
+            value = replaced
+        else:
+            value = text
+
+        try:
+            date = datetime.strptime(value, pattern)
+        except ValueError:
+            continue
+
+        if date.tzinfo is None and tz is not None:
+            date = date.replace(tzinfo=tz)
+        return date
+
+    raise ValueError(f'Дата {text!r} не соответствует форматам {tuple(formats)}')
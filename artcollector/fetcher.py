@@ -0,0 +1,323 @@
+""" Модуль fetcher.
+    Описание: Загрузка страниц по сети через общий сеанс с пулом соединений.
+        Тело ответа читается частями и не больше заданного объёма,
+        кодировка страницы определяется по заголовкам, объявлению в начале страницы
+        или по прежним страницам того же сайта, без угадывания по всему тексту.
+
+"""
+
+import codecs
+import re
+from logging import getLogger
+from threading import Lock
+from time import perf_counter, sleep
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, HTTPError, RequestException, Timeout
+
+import artcollector.aclogger
+from artcollector.metrics import NULL_METRICS, Metrics
+from artcollector.throttle import HostThrottle, retry_after
+
+if TYPE_CHECKING:
+    from artcollector.archive import PageArchive
+    from artcollector.http_cache import HttpCache
+
+log = getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent':
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/106.0.0.0 YaBrowser/22.11.5.715 Yowser/2.5 Safari/537.36'
+}
+
+# Кодировка страниц, для которых её не удалось определить.
+DEFAULT_ENCODING = 'utf-8'
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+class ResponseTooLarge(RequestException):
+    """ Ответ сервера больше допустимого объёма (Fetcher.max_bytes). """
+
+
+class Fetcher:
+    """ Загружает страницы через общий сеанс requests.
+        Соединения с сайтами держатся открытыми (keep-alive) и переиспользуются
+        для всех статей, загружаемых через этот объект.
+
+    timeout: таймаут запроса в секундах.
+    headers: заголовки, дополняющие или заменяющие DEFAULT_HEADERS.
+    pool_connections: количество сайтов, для которых хранится пул соединений.
+    pool_maxsize: наибольшее число соединений с одним сайтом.
+    session: готовый сеанс requests, если его нужно настроить самостоятельно.
+    cache: дисковый кэш ответов (HttpCache). Без него страницы всегда загружаются заново.
+    metrics: сборщик показателей (Metrics): время этапов fetch, response, download и decode,
+        объём загруженных данных и ошибки по сайтам. По умолчанию показатели не собираются.
+    throttle: управление запросами к сайтам (HostThrottle): ограничение частоты, повторы
+        после неудач и временное отключение неотвечающих сайтов. По умолчанию - HostThrottle()
+        с повтором до трёх раз и без ограничения частоты.
+    max_bytes: наибольший объём страницы в байтах (после распаковки). Загрузка страницы
+        большего объёма прерывается с ошибкой ResponseTooLarge. None - без ограничения.
+    archive: архив страниц (PageArchive). Если указан, каждая загруженная страница
+        записывается в него вместе с кодом ответа и заголовками; страницы из кэша -
+        если их ещё нет в архиве.
+
+    """
+
+    # Размер части, которыми читается тело ответа.
+    CHUNK_SIZE = 64 * 1024
+    # Наибольший объём страницы по умолчанию.
+    MAX_BYTES = 10 * 1024 * 1024
+    # Сколько байт от начала страницы просматривается в поисках объявления кодировки.
+    META_SCAN = 4096
+
+    def __init__(self, timeout: float=10, headers: dict | None=None, pool_connections: int=10,
+                 pool_maxsize: int=10, session: requests.Session | None=None,
+                 cache: 'HttpCache | None'=None, metrics: Metrics | None=None,
+                 throttle: HostThrottle | None=None, max_bytes: int | None=MAX_BYTES,
+                 archive: 'PageArchive | None'=None) -> None:
+
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        # Кодировки страниц по сайтам: для страниц, в которых кодировка не указана.
+        self._hints = {}
+        self.cache = cache
+        self.archive = archive
+        self.metrics = metrics or NULL_METRICS
+        self.throttle = throttle or HostThrottle()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+
+        if headers:
+            session.headers.update(headers)
+
+        self.session = session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, link: str) -> str:
+        """ Загружает страницу по ссылке и возвращает её текст (см. get_raw). """
+
+        body, encoding = self.get_raw(link)
+
+        with self.metrics.timer('decode', _site(link) if self.metrics.enabled else ''):
+            return self._decode(body, encoding)
+
+    def get_raw(self, link: str) -> tuple[bytes, str]:
+        """ Загружает страницу по ссылке и возвращает её HTML-код в байтах и кодировку.
+        Если задан кэш, свежая копия берётся из него, а устаревшая перепроверяется на сервере. """
+
+        metrics = self.metrics
+        site = _site(link)
+
+        entry = self.cache.lookup(link) if self.cache else None
+
+        if entry and self.cache.is_fresh(entry):
+            self.cache.hit()
+            metrics.count('cache_hits', site)
+            return self._cached(link, entry, site)
+
+        if self.cache:
+            self.cache.miss()
+
+        try:
+            response, body = self._request(link, entry.validators() if entry else None)
+        except Timeout:
+            metrics.count('fetch_errors', site)
+            log.fatal('На ссылке %s сработал таймауд', link, exc_info=True)
+            raise
+        except ConnectionError:
+            metrics.count('fetch_errors', site)
+            log.fatal('Не удалось соединиться с %s', link, exc_info=True)
+            raise
+        except ResponseTooLarge:
+            metrics.count('fetch_errors', site)
+            log.fatal('Страница %s больше %s байт, загрузка прервана', link, self.max_bytes)
+            raise
+
+        if entry and response.status_code == 304:
+            self.cache.refresh(link)
+            metrics.count('revalidated', site)
+            return self._cached(link, entry, site)
+
+        try:
+            response.raise_for_status()
+        except HTTPError:
+            metrics.count('fetch_errors', site)
+            log.fatal('Ссылка %s Битая. Код ошибки %s.', link, response.status_code,
+            exc_info=True)
+            raise
+
+        metrics.count('bytes', site, len(body))
+        encoding = self._encoding(response.headers, body, site)
+
+        if self.cache:
+            self.cache.store(link, body, encoding,
+                response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        if self.archive is not None:
+            self.archive.store(link, body, encoding, response.status_code, response.headers)
+
+        return body, encoding
+
+    def _cached(self, link: str, entry, site: str) -> tuple[bytes, str]:
+        """ Возвращает страницу из кэша, добавляя её в архив, если её там ещё нет. """
+
+        encoding = entry.encoding or self._encoding({}, entry.body, site)
+
+        if self.archive is not None and link not in self.archive:
+            self.archive.store(link, entry.body, encoding)
+
+        return entry.body, encoding
+
+    def _request(self, link: str, headers: dict | None):
+        """ Отправляет запрос с учётом ограничений сайта (throttle) и читает тело ответа.
+        После ответа 429 или 5xx, таймаута или обрыва соединения запрос повторяется
+        с паузой, пока это разрешает throttle.
+        Возвращает последний полученный ответ и его тело (None, если тело не читалось). """
+
+        metrics = self.metrics
+        site = _site(link)
+        attempt = 0
+
+        while True:
+            self.throttle.wait(site)
+
+            start = perf_counter()
+            try:
+                response = self.session.get(link, timeout=self.timeout, headers=headers, stream=True)
+                if response.status_code != 429 and response.status_code < 500:
+                    body = self._read(response, link)
+                else:
+                    body = None
+                    response.close()
+            except (Timeout, ConnectionError) as error:
+                delay = self.throttle.failure(site, attempt)
+                if delay is None:
+                    raise
+                reason = type(error).__name__
+            else:
+                if metrics.enabled:
+                    # response.elapsed - время до получения заголовков ответа
+                    # (соединение, TLS, ожидание сервера), остальное - получение тела страницы.
+                    elapsed = perf_counter() - start
+                    waited = response.elapsed.total_seconds()
+                    metrics.observe('fetch', site, elapsed)
+                    metrics.observe('response', site, waited)
+                    metrics.observe('download', site, max(elapsed - waited, 0))
+
+                if body is not None:
+                    self.throttle.success(site)
+                    return response, body
+
+                if response.status_code == 429:
+                    metrics.count('throttled', site)
+                delay = self.throttle.failure(site, attempt, retry_after(response),
+                    throttled=response.status_code == 429)
+                if delay is None:
+                    return response, body
+                reason = f'код {response.status_code}'
+
+            metrics.count('retries', site)
+            log.warning('Запрос %s не удался (%s), повтор через %.1f с', link, reason, delay)
+            sleep(delay)
+            attempt += 1
+
+    def _read(self, response, link: str) -> bytes:
+        """ Читает тело ответа частями по CHUNK_SIZE. Если оно больше max_bytes,
+        чтение прерывается с ошибкой ResponseTooLarge. """
+
+        limit = self.max_bytes
+
+        try:
+            length = response.headers.get('Content-Length', '')
+            if limit is not None and length.isdigit() and int(length) > limit:
+                raise ResponseTooLarge(f'Страница {link} больше {limit} байт', response=response)
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(self.CHUNK_SIZE):
+                size += len(chunk)
+                if limit is not None and size > limit:
+                    raise ResponseTooLarge(f'Страница {link} больше {limit} байт', response=response)
+                chunks.append(chunk)
+        finally:
+            # Прочитанный до конца ответ возвращает соединение в пул, прерванный - закрывает его.
+            response.close()
+
+        return b''.join(chunks)
+
+    def _encoding(self, headers, body: bytes, site: str) -> str:
+        """ Определяет кодировку страницы: по заголовку Content-Type, метке BOM
+        или объявлению <meta charset> в начале страницы. Найденная кодировка запоминается
+        для сайта и используется для его страниц, в которых она не указана.
+        Если и так определить не удалось - DEFAULT_ENCODING. """
+
+        match = _HEADER_CHARSET.search(headers.get('Content-Type', ''))
+        encoding = _codec(match[1]) if match else None
+
+        if encoding is None:
+            encoding = next((name for bom, name in _BOMS if body.startswith(bom)), None)
+
+        if encoding is None:
+            match = _META_CHARSET.search(body, 0, self.META_SCAN)
+            encoding = _codec(match[1].decode('ascii')) if match else None
+
+        if encoding is not None:
+            self._hints[site] = encoding
+            return encoding
+
+        return self._hints.get(site, DEFAULT_ENCODING)
+
+    def close(self):
+        """ Закрывает все соединения сеанса. """
+
+        self.session.close()
+
+    @staticmethod
+    def _decode(body: bytes, encoding: str | None) -> str:
+        return body.decode(encoding or DEFAULT_ENCODING, errors='replace')
+
+
+def _codec(name: str) -> str | None:
+    """ Каноническое имя кодировки или None, если Python её не знает. """
+
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return
+
+
+def _site(link: str) -> str:
+    """ Сайт ссылки для показателей (без www.). """
+
+    return (urlsplit(link).hostname or '').removeprefix('www.')
+
+
+_default_fetcher = None
+_default_lock = Lock()
+
+def default_fetcher() -> Fetcher:
+    """ Возвращает общий для пакета загрузчик,
+    которым пользуются статьи, созданные без явно указанного загрузчика. """
+
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
@@ -0,0 +1,225 @@
+""" Модуль http_cache.
+    Описание: Дисковый кэш загруженных страниц.
+        Тела ответов хранятся в отдельных файлах, сведения о них - в индексе SQLite.
+        Устаревшие записи перепроверяются условными запросами (ETag/Last-Modified),
+        при превышении объёма вытесняются давно не использованные записи.
+
+"""
+
+import os
+import time
+from hashlib import sha1
+from logging import getLogger
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import NamedTuple
+
+import artcollector.aclogger
+from artcollector.urls import normalize_url
+
+log = getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    """ Запись кэша. """
+
+    url: str
+    body: bytes
+    encoding: str | None
+    etag: str | None
+    last_modified: str | None
+    stored: float
+
+    def validators(self) -> dict:
+        """ Возвращает заголовки условного запроса для перепроверки записи. """
+
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """ Дисковый кэш ответов сервера.
+
+    path: каталог кэша.
+    ttl: время в секундах, в течение которого запись считается свежей и отдаётся без запроса.
+    max_bytes: наибольший суммарный объём тел ответов.
+
+    Счётчики обращений доступны через stats.
+
+    """
+
+    def __init__(self, path: str | Path='cache', ttl: float=24 * 60 * 60,
+                 max_bytes: int=1024 ** 3) -> None:
+
+        # Модуль sqlite3 загружается при создании первого кэша.
+        import sqlite3
+
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = Lock()
+        self._db = sqlite3.connect(self.path / 'index.sqlite', check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, url TEXT, encoding TEXT, etag TEXT, last_modified TEXT, '
+            'stored REAL, accessed REAL, size INTEGER)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self._db.commit()
+
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> dict:
+        """ Возвращает счётчики кэша:
+        hits - свежие записи, отданные без запроса;
+        revalidated - записи, подтверждённые сервером (304 Not Modified);
+        misses - обращения, для которых в кэше не нашлось свежей записи
+            (записи нет или она устарела и перепроверяется на сервере);
+        evictions - вытесненные записи;
+        entries и bytes - количество и объём записей в кэше.
+
+        """
+
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': self._size
+            }
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """ Возвращает запись для ссылки или None, если её нет в кэше. """
+
+        key = self._key(url)
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT url, encoding, etag, last_modified, stored FROM entries WHERE key = ?',
+                (key,)).fetchone()
+            if not row:
+                return
+
+            try:
+                body = self._body_path(key).read_bytes()
+            except FileNotFoundError:
+                log.warning('Файл кэша для %s пропал, запись удалена', url)
+                self._delete(key)
+                self._db.commit()
+                return
+
+            self._db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+
+        return CacheEntry(row[0], body, *row[1:])
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """ Проверяет, можно ли отдать запись без обращения к серверу. """
+
+        return time.time() - entry.stored < self.ttl
+
+    def hit(self):
+        """ Учитывает обращение, обслуженное свежей записью. """
+
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        """ Учитывает обращение, для которого нет свежей записи. """
+
+        with self._lock:
+            self.misses += 1
+
+    def refresh(self, url: str):
+        """ Продлевает срок жизни записи, подтверждённой сервером. """
+
+        now = time.time()
+        with self._lock:
+            self.revalidated += 1
+            self._db.execute('UPDATE entries SET stored = ?, accessed = ? WHERE key = ?',
+                (now, now, self._key(url)))
+            self._db.commit()
+
+    def store(self, url: str, body: bytes, encoding: str | None=None,
+              etag: str | None=None, last_modified: str | None=None):
+        """ Сохраняет ответ сервера и при необходимости вытесняет старые записи. """
+
+        key = self._key(url)
+        path = self._body_path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        # Запись через временный файл, чтобы прерванная запись не оставила обрезанное тело.
+        # Файл свой у каждого потока: одну страницу могут сохранять несколько потоков сразу.
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{get_ident()}.tmp')
+        tmp_path.write_bytes(body)
+
+        now = time.time()
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._delete(key, remove_file=False)
+            self._db.execute(
+                'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, normalize_url(url), encoding, etag, last_modified, now, now, len(body)))
+            self._size += len(body)
+            self._evict()
+            self._db.commit()
+
+    def clear(self):
+        """ Удаляет все записи кэша. """
+
+        with self._lock:
+            for (key,) in self._db.execute('SELECT key FROM entries').fetchall():
+                self._delete(key)
+            self._db.commit()
+
+    def close(self):
+        """ Закрывает индекс кэша. """
+
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return sha1(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def _delete(self, key: str, remove_file: bool=True):
+        row = self._db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return
+        self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        self._size -= row[0]
+        if remove_file:
+            self._body_path(key).unlink(missing_ok=True)
+
+    def _evict(self):
+        """ Вытесняет давно не использованные записи, пока объём не уложится в max_bytes. """
+
+        if self._size <= self.max_bytes:
+            return
+
+        rows = self._db.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall()
+        for key, size in rows:
+            if self._size <= self.max_bytes:
+                break
+            self._delete(key)
+            self.evictions += 1
+            log.debug('Запись кэша %s вытеснена (%s байт)', key, size)
@@ -0,0 +1,205 @@
+""" Модуль metrics.
+    Описание: Замеры времени этапов загрузки и извлечения статей и счётчики по сайтам.
+        Этапы: fetch (запрос целиком), response (до получения заголовков ответа, включая DNS и TLS),
+        download (получение тела), decode, parse и шаги извлечения (_ext_date, _ext_text и т. д.).
+        Счётчики: bytes, articles, failures и др.
+        Выключенный сборщик (NULL_METRICS) ничего не замеряет и почти не тратит времени.
+
+"""
+
+import json
+import os
+from contextlib import nullcontext
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+
+import artcollector.aclogger
+
+log = getLogger(__name__)
+
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    """ Замер времени одного этапа. """
+
+    __slots__ = ('_metrics', '_stage', '_site', '_start')
+
+    def __init__(self, metrics, stage: str, site: str) -> None:
+        self._metrics = metrics
+        self._stage = stage
+        self._site = site
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._stage, self._site, perf_counter() - self._start)
+
+
+class Metrics:
+    """ Сборщик показателей.
+
+    enabled: собирать ли показатели.
+    sinks: приёмники (JsonFileSink, PrometheusFileSink или любой объект с методом write(snapshot)),
+        в которые показатели записываются методом flush.
+
+    """
+
+    def __init__(self, enabled: bool=True, sinks: list | None=None) -> None:
+
+        self.enabled = enabled
+        self.sinks = list(sinks or [])
+        self._lock = Lock()
+        # (этап, сайт) -> [количество, суммарное время, наибольшее время]
+        self._timings = {}
+        # (счётчик, сайт) -> значение
+        self._counters = {}
+
+    def timer(self, stage: str, site: str=''):
+        """ Возвращает контекстный менеджер, замеряющий время этапа stage для сайта site. """
+
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, site)
+
+    def observe(self, stage: str, site: str, seconds: float):
+        """ Учитывает замер времени этапа. """
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            timing = self._timings.get((stage, site))
+            if timing is None:
+                self._timings[(stage, site)] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                if seconds > timing[2]:
+                    timing[2] = seconds
+
+    def count(self, name: str, site: str='', value: int=1):
+        """ Увеличивает счётчик name для сайта site на value. """
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._counters[(name, site)] = self._counters.get((name, site), 0) + value
+
+    def snapshot(self) -> dict:
+        """ Возвращает показатели в виде словаря:
+        {'timings': {этап: {сайт: {'count', 'total', 'max', 'avg'}}}, 'counters': {счётчик: {сайт: значение}}}. """
+
+        with self._lock:
+            timings = {}
+            for (stage, site), (count, total, peak) in self._timings.items():
+                timings.setdefault(stage, {})[site] = {
+                    'count': count, 'total': total, 'max': peak, 'avg': total / count
+                }
+
+            counters = {}
+            for (name, site), value in self._counters.items():
+                counters.setdefault(name, {})[site] = value
+
+        return {'timings': timings, 'counters': counters}
+
+    def raw(self) -> tuple:
+        """ Возвращает накопленные данные для передачи между процессами (см. merge). """
+
+        with self._lock:
+            return dict(self._timings), dict(self._counters)
+
+    def merge(self, raw: tuple):
+        """ Добавляет данные, полученные методом raw другого сборщика (например, из процесса ParsePool). """
+
+        if not self.enabled:
+            return
+
+        timings, counters = raw
+        with self._lock:
+            for key, (count, total, peak) in timings.items():
+                timing = self._timings.setdefault(key, [0, 0.0, 0.0])
+                timing[0] += count
+                timing[1] += total
+                timing[2] = max(timing[2], peak)
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        """ Обнуляет показатели. """
+
+        with self._lock:
+            self._timings.clear()
+            self._counters.clear()
+
+    def flush(self):
+        """ Записывает текущие показатели во все приёмники. """
+
+        if not self.enabled or not self.sinks:
+            return
+
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink.write(snapshot)
+            except OSError:
+                log.error('Не удалось записать показатели в %s', sink, exc_info=True)
+
+
+# Выключенный сборщик, используемый по умолчанию.
+NULL_METRICS = Metrics(enabled=False)
+
+
+def _write_atomic(path: Path, text: str):
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+class JsonFileSink:
+    """ Записывает показатели в файл JSON (файл перезаписывается целиком). """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def __repr__(self) -> str:
+        return f'JsonFileSink({str(self.path)!r})'
+
+    def write(self, snapshot: dict):
+        _write_atomic(self.path, json.dumps(snapshot, ensure_ascii=False, indent=2))
+
+
+class PrometheusFileSink:
+    """ Записывает показатели в текстовом формате Prometheus
+    (например, для textfile collector в node_exporter). """
+
+    def __init__(self, path: str | Path, prefix: str='artcollector') -> None:
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def __repr__(self) -> str:
+        return f'PrometheusFileSink({str(self.path)!r})'
+
+    def write(self, snapshot: dict):
+        lines = []
+
+        # Строки одного показателя в этом формате должны идти подряд после его описания TYPE.
+        for metric, field, kind in (('stage_seconds_total', 'total', 'counter'),
+                                    ('stage_calls_total', 'count', 'counter'),
+                                    ('stage_seconds_max', 'max', 'gauge')):
+            lines.append(f'# TYPE {self.prefix}_{metric} {kind}')
+            for stage, sites in snapshot['timings'].items():
+                for site, timing in sites.items():
+                    lines.append(f'{self.prefix}_{metric}{{stage="{stage}",site="{site}"}} {timing[field]}')
+
+        for name, sites in snapshot['counters'].items():
+            lines.append(f'# TYPE {self.prefix}_{name}_total counter')
+            for site, value in sites.items():
+                lines.append(f'{self.prefix}_{name}_total{{site="{site}"}} {value}')
+
+        _write_atomic(self.path, '\n'.join(lines) + '\n')
@@ -0,0 +1,180 @@
+""" Модуль parse_pool.
+    Описание: Разбор загруженных страниц и извлечение статей в пуле процессов.
+        Разбор HTML упирается в процессор и не распараллеливается потоками из-за GIL,
+        поэтому страницы раздаются процессам, а обратно передаются только компактные
+        записи статей (Article).
+
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from logging import getLogger
+from urllib.parse import urlsplit
+
+import artcollector.aclogger
+from artcollector.metrics import NULL_METRICS, Metrics
+from artcollector.registry import SITES, SiteRegistry
+from artcollector.sites import ExtArt
+
+log = getLogger(__name__)
+
+# Фабрика статей процесса-обработчика. Создаётся при запуске процесса (см. init_worker),
+# а если процесс запущен без неё - при первой странице.
+_worker_factor = None
+
+
+def init_worker(parser: str='', sites: dict | None=None):
+    """ Создаёт фабрику статей процесса-обработчика с разборщиком parser и реестром сайтов,
+    построенным по sites (см. SiteRegistry.spec). Если sites не указан, используется
+    реестр по умолчанию (registry.SITES). """
+
+    global _worker_factor
+    registry = SiteRegistry(sites, entry_points=False) if sites is not None else None
+    _worker_factor = ExtArt(parser=parser, registry=registry)
+
+
+def extract_page(link: str, raw_data: str | bytes, collect_metrics: bool=False):
+    """ Извлекает статью из HTML-кода страницы. Выполняется в процессе-обработчике.
+    Возвращает кортеж (статья или None, описание ошибки или None, показатели или None).
+    Показатели (Metrics.raw) собираются по одной странице, если collect_metrics истинно.
+    Исключения не выпускаются наружу, чтобы одна плохая страница не останавливала пакет. """
+
+    global _worker_factor
+    if _worker_factor is None:
+        _worker_factor = ExtArt()
+
+    metrics = _worker_factor.metrics = Metrics() if collect_metrics else NULL_METRICS
+
+    try:
+        art, error = _worker_factor.extract(link, raw_data)
+    except Exception as exc:
+        art, error = None, f'{type(exc).__name__}: {exc}'
+        metrics.count('failures', _failure_site(link))
+
+    return art, error, metrics.raw() if collect_metrics else None
+
+
+def _failure_site(link: str) -> str:
+    """ Сайт, к которому относится неудача: SOURCE_SITE класса сайта,
+    а если сайт ссылки не поддерживается - имя хоста. """
+
+    site_class = _worker_factor.registry.for_url(link)
+    if site_class is not None:
+        return site_class.SOURCE_SITE
+
+    try:
+        return (urlsplit(link).hostname or '').removeprefix('www.')
+    except ValueError:
+        return ''
+
+
+def _finished(future) -> bool:
+    """ Задача выполнена и вернула результат (а не ошибку пула). """
+
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+class ParsePool:
+    """ Пул процессов для извлечения статей из загруженных страниц.
+
+    processes: количество процессов (по умолчанию - по числу ядер).
+    metrics: сборщик показателей, в который добавляются показатели извлечения из процессов.
+    parser: разборщик HTML для всех статей (как у ExtArt).
+    registry: реестр сайтов (как у ExtArt). Процессы получают его содержимое (SiteRegistry.spec)
+        при запуске и строят по нему свой реестр.
+
+    """
+
+    def __init__(self, processes: int | None=None, metrics: Metrics | None=None, parser: str='',
+                 registry: SiteRegistry | None=None) -> None:
+
+        self.processes = processes
+        self.metrics = metrics or NULL_METRICS
+        self._window = (processes or os.cpu_count() or 1) * 4
+        # Реестр по умолчанию есть в каждом процессе, его содержимое не передаётся.
+        sites = registry.spec() if registry is not None and registry is not SITES else None
+        self._initargs = (parser, sites)
+        self._pool = self._new_pool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def imap(self, pages):
+        """ Получает итератор кортежей (метка, ссылка, HTML-код или None),
+        отдаёт кортежи (метка, статья или None, описание ошибки или None) в исходном порядке.
+        Для страницы без HTML-кода (None) ошибка тоже None: причину знает вызывающий код.
+        Метка передаётся без изменений и нужна вызывающему коду для сопоставления результатов.
+        Одновременно в работе держится ограниченное число страниц. """
+
+        pending = deque()
+
+        for tag, link, raw_data in pages:
+            future = self._submit(link, raw_data) if raw_data is not None else None
+            pending.append([tag, link, raw_data, future])
+            if len(pending) >= self._window:
+                yield self._result(pending.popleft(), pending)
+
+        while pending:
+            yield self._result(pending.popleft(), pending)
+
+    def close(self):
+        """ Завершает процессы пула. """
+
+        self._pool.shutdown()
+
+    def _result(self, task, pending):
+        tag, link, raw_data, future = task
+
+        if future is None:
+            return tag, None, None
+
+        try:
+            art, error, metrics = future.result()
+        except BrokenProcessPool:
+            art, error, metrics = self._recover(link, raw_data, pending)
+
+        if error:
+            log.debug('Не удалось извлечь статью из %s: %s', link, error)
+        if metrics:
+            self.metrics.merge(metrics)
+
+        return tag, art, error
+
+    def _recover(self, link, raw_data, pending):
+        """ Продолжает работу после аварийного завершения процесса.
+        Неизвестно, на какой из страниц в работе это случилось, поэтому первая страница очереди
+        (link) повторяется в новом пуле одна: непригодной она считается, только если процесс
+        снова завершится на ней. Затем в новый пул отправляются все страницы в работе,
+        кроме уже обработанных. Возвращает результат для link, как extract_page. """
+
+        log.warning('Процесс обработки аварийно завершился, страница %s проверяется отдельно', link)
+        self._restart()
+
+        try:
+            result = self._submit(link, raw_data).result()
+        except BrokenProcessPool:
+            log.error('Процесс обработки аварийно завершился на странице %s', link)
+            self._restart()
+            result = None, 'процесс обработки аварийно завершился', None
+
+        for task in pending:
+            if task[3] is not None and not _finished(task[3]):
+                task[3] = self._submit(task[1], task[2])
+
+        return result
+
+    def _restart(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.processes, initializer=init_worker,
+                                   initargs=self._initargs)
+
+    def _submit(self, link, raw_data):
+        return self._pool.submit(extract_page, link, raw_data, self.metrics.enabled)
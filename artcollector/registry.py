@@ -0,0 +1,201 @@
+""" Модуль registry.
+    Описание: Реестр поддерживаемых сайтов.
+        Сопоставляет сайту ссылки класс извлечения статей (потомок ExtractArticleData).
+        Сайт ищется по имени хоста и его родительским доменам (m.habr.com -> habr.com),
+        класс можно указать строкой 'модуль:Класс' - тогда модуль импортируется
+        при первой ссылке на этот сайт.
+        Сторонние пакеты добавляют свои сайты через точки входа группы 'artcollector.sites'
+        (имя - домен, значение - 'модуль:Класс'), например в pyproject.toml:
+
+            [project.entry-points."artcollector.sites"]
+            "example.com" = "example_sites.example:ExtractExampleArticle"
+
+"""
+
+import os
+import weakref
+from importlib import import_module
+from logging import getLogger
+from threading import Lock
+from urllib.parse import urlsplit
+
+import artcollector.aclogger
+
+log = getLogger(__name__)
+
+# Группа точек входа, через которую сторонние пакеты добавляют сайты.
+ENTRY_POINT_GROUP = 'artcollector.sites'
+
+# Реестры процесса: после fork их блокировки создаются заново (см. _after_fork).
+_registries = weakref.WeakSet()
+
+
+class SiteRegistry:
+    """ Реестр сайтов: домен -> класс извлечения статей.
+
+    sites: начальный словарь домен -> класс сайта или строка 'модуль:Класс'.
+    entry_points: добавлять сайты сторонних пакетов из точек входа ENTRY_POINT_GROUP.
+        Точки входа читаются при первом поиске сайта. Сайты, добавленные явно,
+        точками входа не переопределяются.
+
+    """
+
+    # Сколько хостов помнить: при обходе сайтов встречается много неподдерживаемых хостов.
+    CACHE_SIZE = 4096
+
+    def __init__(self, sites: dict | None=None, entry_points: bool=True) -> None:
+
+        self._targets = {}
+        self._hosts = {}
+        self._entry_points = entry_points
+        self._lock = Lock()
+        _registries.add(self)
+
+        for domain, target in (sites or {}).items():
+            self.register(domain, target)
+
+    def register(self, domain: str, target):
+        """ Добавляет сайт domain. Ссылки на его поддомены тоже относятся к нему.
+        target: класс сайта или строка 'модуль:Класс'. """
+
+        with self._lock:
+            self._targets[_domain(domain)] = target
+            self._hosts.clear()
+
+    def unregister(self, domain: str):
+        """ Удаляет сайт domain из реестра. """
+
+        with self._lock:
+            self._targets.pop(_domain(domain), None)
+            self._hosts.clear()
+
+    def spec(self) -> dict:
+        """ Словарь домен -> класс сайта или строка 'модуль:Класс', по которому создаётся
+        такой же реестр в другом процессе: SiteRegistry(spec, entry_points=False).
+        Сайты из точек входа включаются в словарь. """
+
+        self._load_entry_points()
+        with self._lock:
+            return dict(self._targets)
+
+    def domains(self) -> list:
+        """ Список доменов поддерживаемых сайтов. """
+
+        self._load_entry_points()
+        return sorted(self._targets)
+
+    def resolve(self, host: str):
+        """ Возвращает класс сайта для имени хоста или None, если сайт не поддерживается. """
+
+        try:
+            return self._hosts[host]
+        except KeyError:
+            pass
+
+        self._load_entry_points()
+
+        with self._lock:
+            domain = _domain(host)
+            while domain and domain not in self._targets:
+                domain = domain.partition('.')[2]
+            target = self._targets.get(domain) if domain else None
+
+        site_class = self._load(domain, target) if isinstance(target, str) else target
+
+        with self._lock:
+            if len(self._hosts) >= self.CACHE_SIZE:
+                self._hosts.clear()
+            self._hosts[host] = site_class
+
+        return site_class
+
+    def for_url(self, link: str):
+        """ Возвращает класс сайта ссылки или None. """
+
+        try:
+            host = urlsplit(link).hostname
+        except ValueError:
+            return
+        return self.resolve(host) if host else None
+
+    def _load(self, domain: str, target: str):
+        """ Импортирует класс сайта, заданный строкой 'модуль:Класс'. """
+
+        module_name, _, attrs = target.partition(':')
+
+        try:
+            site_class = import_module(module_name)
+            for attr in filter(None, attrs.split('.')):
+                site_class = getattr(site_class, attr)
+        except Exception:
+            log.error('Не удалось загрузить класс сайта %s (%s)', domain, target, exc_info=True)
+            site_class = None
+        else:
+            log.debug('Загружен класс сайта %s: %s', domain, target)
+
+        with self._lock:
+            # Класс запоминается, чтобы модуль не импортировался повторно,
+            # а сайт, класс которого не загрузился, исключается из реестра.
+            if self._targets.get(domain) is target:
+                if site_class is None:
+                    del self._targets[domain]
+                else:
+                    self._targets[domain] = site_class
+
+        return site_class
+
+    def _load_entry_points(self):
+        """ Добавляет сайты из точек входа сторонних пакетов (один раз). """
+
+        if not self._entry_points:
+            return
+
+        # importlib.metadata нужен только при первом поиске сайта.
+        from importlib.metadata import entry_points
+
+        with self._lock:
+            if not self._entry_points:
+                return
+            self._entry_points = False
+
+            try:
+                found = entry_points(group=ENTRY_POINT_GROUP)
+            except Exception:
+                log.error('Не удалось прочитать точки входа %s', ENTRY_POINT_GROUP, exc_info=True)
+                return
+
+            for point in found:
+                domain = _domain(point.name)
+                if domain in self._targets:
+                    log.warning('Сайт %s из пакета %s уже поддерживается и не переопределяется',
+                        domain, point.value)
+                    continue
+                self._targets[domain] = point.value
+                log.debug('Сайт %s добавлен из точки входа %s', domain, point.value)
+            self._hosts.clear()
+
+
+def _after_fork():
+    """ Пересоздаёт блокировки реестров в дочернем процессе. Процессы ParsePool создаются,
+    пока потоки загрузки ищут сайты, и блокировка, которую в момент fork держал другой поток,
+    в дочернем процессе иначе не освободилась бы никогда. """
+
+    for registry in _registries:
+        registry._lock = Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _domain(host: str) -> str:
+    return host.lower().strip('.').removeprefix('www.')
+
+
+# Реестр по умолчанию: сайты пакета и сайты из точек входа.
+SITES = SiteRegistry({
+    'habr.com': 'artcollector.sites:ExtractHabrArticle',
+    'naked-science.ru': 'artcollector.sites:ExtractNakedscienceArticle',
+    'tass.ru': 'artcollector.sites:ExtractTassArticle',
+    'inosmi.ru': 'artcollector.sites:ExtractInoSMIArticle'
+})
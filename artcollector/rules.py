@@ -0,0 +1,289 @@
+""" Модуль rules.
+    Описание: Декларативные правила извлечения статей.
+        Сайт описывается словарём RULES в своём классе: селекторы полей, форматы дат,
+        пропускаемые блоки текста и способ оформления каждого блока.
+        Правила компилируются один раз при создании класса сайта
+        и затем используются для всех его страниц.
+
+    Формат RULES:
+
+        'date': поле даты. Помимо ключей обычного поля:
+            'format' - формат strptime или список форматов, перебираемых по порядку
+                (%b и %B - русское или английское название месяца независимо от локали, см. модуль dates);
+            'prepare' - имя метода класса сайта, приводящего строку даты к формату.
+        'author', 'headline': обычные поля.
+        'text': правило полного текста (см. TextRule).
+        'extra': словарь дополнительных полей (теги, аннотация и т. п.),
+            которые попадают в info статьи.
+
+    Обычное поле (FieldRule):
+        'select' - CSS-селектор элемента внутри основного блока статьи;
+        'attr' - взять значение атрибута, а не текст элемента;
+        'all' - собрать список значений всех найденных элементов;
+        'sep' - разделитель строк при получении текста элемента;
+        'strip_each' - обрезать пробелы у каждой строки элемента, а не у текста целиком;
+        'replace' - список замен (старое, новое), применяемых к тексту;
+        'split' - разбить текст на список по разделителю;
+        'required' - отсутствие элемента (или его атрибута attr) считается ошибкой
+            (по умолчанию True).
+
+"""
+
+import re
+
+import soupsieve
+from bs4 import Comment, NavigableString, Tag
+
+
+class ExtractionError(ValueError):
+    """ На странице не найден обязательный элемент или его значение не разобрано. """
+
+
+# Селектор, состоящий только из перечисления имён тегов: 'h1, h2, h3'.
+_TAG_NAMES = re.compile(r'[a-z][a-z0-9]*(\s*,\s*[a-z][a-z0-9]*)*')
+
+
+class Selector:
+    """ Скомпилированный CSS-селектор.
+        Перечисления имён тегов проверяются по имени, без обращения к soupsieve.
+
+    """
+
+    __slots__ = ('css', '_names', '_pattern')
+
+    def __init__(self, css: str) -> None:
+
+        self.css = css
+
+        if _TAG_NAMES.fullmatch(css):
+            self._names = [name.strip() for name in css.split(',')]
+            self._pattern = None
+        else:
+            self._names = None
+            self._pattern = soupsieve.compile(css)
+
+    def __repr__(self) -> str:
+        return f'Selector({self.css!r})'
+
+    def match(self, element) -> bool:
+        """ Проверяет, подходит ли элемент под селектор. """
+
+        if self._names is not None:
+            return element.name in self._names
+        return self._pattern.match(element)
+
+    def select_one(self, tree):
+        """ Возвращает первый подходящий элемент дерева или None. """
+
+        if self._names is not None:
+            return tree.find(self._names)
+        return self._pattern.select_one(tree)
+
+    def select(self, tree) -> list:
+        """ Возвращает все подходящие элементы дерева. """
+
+        if self._names is not None:
+            return tree.find_all(self._names)
+        return self._pattern.select(tree)
+
+
+def element_text(element, sep: str='', strip_each: bool=False) -> str:
+    """ Возвращает текст элемента страницы, в том числе отдельной строки. """
+
+    if isinstance(element, Tag):
+        return element.get_text(sep, strip=strip_each)
+    return str(element).strip() if strip_each else str(element)
+
+
+class FieldRule:
+    """ Правило извлечения одного поля статьи. """
+
+    __slots__ = ('name', 'selector', 'attr', 'all', 'sep', 'strip_each', 'replace', 'split',
+                 'required', 'formats', 'prepare')
+
+    def __init__(self, name: str, spec: dict) -> None:
+
+        self.name = name
+        self.selector = Selector(spec['select'])
+        self.attr = spec.get('attr')
+        self.all = spec.get('all', False)
+        self.sep = spec.get('sep', '')
+        self.strip_each = spec.get('strip_each', False)
+        self.replace = tuple(spec.get('replace', ()))
+        self.split = spec.get('split')
+        self.required = spec.get('required', True)
+
+        formats = spec.get('format', ())
+        self.formats = (formats,) if isinstance(formats, str) else tuple(formats)
+        self.prepare = spec.get('prepare')
+
+    def extract(self, tree):
+        """ Возвращает значение поля (или список значений для all) из дерева страницы. """
+
+        if self.all:
+            values = (self._value(element) for element in self.selector.select(tree))
+            return [value for value in values if value is not None]
+
+        element = self.selector.select_one(tree)
+        if element is None:
+            if self.required:
+                raise ExtractionError(f'Не найден элемент {self.selector.css} поля {self.name}')
+            return
+
+        value = self._value(element)
+        if value is None and self.required:
+            raise ExtractionError(
+                f'У элемента {self.selector.css} поля {self.name} нет атрибута {self.attr}')
+        return value
+
+    def _value(self, element):
+        """ Значение поля в элементе или None, если у элемента нет атрибута attr. """
+
+        if self.attr:
+            return element.get(self.attr)
+
+        value = element_text(element, self.sep, self.strip_each).strip()
+        for old, new in self.replace:
+            value = value.replace(old, new)
+
+        return value.split(self.split) if self.split else value
+
+
+def _render_pre(element):
+    return '\n' + element_text(element) + '\n' * 2
+
+def _render_heading(element):
+    return '\n' + element_text(element, strip_each=True) + '\n' * 2
+
+def _render_list(element):
+    return '\n* ' + element_text(element, '\n* ', strip_each=True) + '\n' * 2
+
+def _render_lines(element):
+    return element_text(element, '\n', strip_each=True) + '\n'
+
+def _render_text(element):
+    return element_text(element) + '\n'
+
+def _render_strip(element):
+    return element_text(element).strip() + '\n'
+
+
+# Способы оформления блоков текста.
+# 'skip' - блок пропускается; имя, начинающееся с '_', - метод класса сайта,
+# получающий блок и возвращающий его текст.
+RENDERERS = {
+    'pre': _render_pre,
+    'heading': _render_heading,
+    'list': _render_list,
+    'lines': _render_lines,
+    'text': _render_text,
+    'strip': _render_strip,
+    'skip': None
+}
+
+
+class TextRule:
+    """ Правило извлечения полного текста статьи.
+
+    Ключи правила:
+        'select' - CSS-селектор блока текста;
+        'blocks' - список пар (селектор, оформление) для дочерних элементов блока текста.
+            Применяется первая подходящая пара, оформление - ключ RENDERERS или имя метода;
+        'default' - оформление элементов, не подошедших ни под одну пару (по умолчанию 'text');
+        'skip' - список селекторов элементов, которые удаляются до обработки;
+        'strings' - обрабатывать текст, лежащий прямо в блоке вне тегов (по умолчанию True);
+        'breaks' - заменять <br> внутри элементов переводами строк, а повторные <br> удалять;
+        'links' - дописывать адреса ссылок к их тексту и собирать их в links статьи
+            (по умолчанию True).
+
+    """
+
+    __slots__ = ('selector', 'blocks', 'default', 'skip', 'strings', 'breaks', 'links')
+
+    def __init__(self, spec: dict) -> None:
+
+        self.selector = Selector(spec['select'])
+        self.blocks = tuple((Selector(css), self._check(kind)) for css, kind in spec.get('blocks', ()))
+        self.default = self._check(spec.get('default', 'text'))
+        self.skip = tuple(Selector(css) for css in spec.get('skip', ()))
+        self.strings = spec.get('strings', True)
+        self.breaks = spec.get('breaks', False)
+        self.links = spec.get('links', True)
+
+    @staticmethod
+    def _check(kind: str) -> str:
+        if kind not in RENDERERS and not kind.startswith('_'):
+            raise ValueError(f'Неизвестное оформление блока текста: {kind}')
+        return kind
+
+    def extract(self, tree, article) -> str:
+        """ Собирает полный текст статьи из дерева страницы.
+        article - статья, в links которой добавляются ссылки и чьи методы оформляют блоки. """
+
+        source_text = self.selector.select_one(tree)
+        if source_text is None:
+            raise ExtractionError(f'Не найден блок текста {self.selector.css}')
+
+        text = ''
+
+        for content in list(source_text.contents):
+
+            if isinstance(content, Comment):
+                continue
+            if isinstance(content, NavigableString):
+                if not self.strings:
+                    continue
+            elif any(skip.match(content) for skip in self.skip):
+                continue
+
+            kind = self._kind(content)
+
+            if kind == 'skip':
+                continue
+            if kind.startswith('_'):
+                text += getattr(article, kind)(content)
+                continue
+
+            if self.links:
+                article.link_processing(content, article.links)
+            if self.breaks and isinstance(content, Tag):
+                self._process_breaks(content)
+
+            text += RENDERERS[kind](content)
+
+        return text.strip().replace('\n\r\n', '\n').replace('\n' * 3, '\n' * 2)
+
+    def _kind(self, content) -> str:
+        if isinstance(content, Tag):
+            for selector, kind in self.blocks:
+                if selector.match(content):
+                    return kind
+        return self.default
+
+    @staticmethod
+    def _process_breaks(content: Tag):
+        for br in content.find_all('br'):
+            if br.next_element is not None and br.next_element.name == 'br':
+                br.decompose()
+            else:
+                br.replace_with('\n')
+
+
+class SiteRules:
+    """ Скомпилированные правила сайта. """
+
+    __slots__ = ('date', 'author', 'headline', 'text', 'extra')
+
+    def __init__(self, spec: dict) -> None:
+
+        self.date = FieldRule('date', spec['date']) if 'date' in spec else None
+        self.author = FieldRule('author', spec['author']) if 'author' in spec else None
+        self.headline = FieldRule('headline', spec['headline']) if 'headline' in spec else None
+        self.text = TextRule(spec['text']) if 'text' in spec else None
+        self.extra = {name: FieldRule(name, field) for name, field in spec.get('extra', {}).items()}
+
+
+def compile_rules(spec: dict) -> SiteRules | None:
+    """ Компилирует словарь правил сайта. Возвращает None для пустых правил. """
+
+    return SiteRules(spec) if spec else None
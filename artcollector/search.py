@@ -0,0 +1,331 @@
+""" Модуль search.
+    Описание: Полнотекстовый поиск по коллекции статей.
+        Обратный индекс по заголовку, аннотации, тегам и полному тексту статей
+        с ранжированием BM25 и отбором по источнику, тегу и дате публикации.
+        Служебные слова (STOPWORDS) не индексируются. Статьи каждого слова запроса
+        просматриваются по убыванию вклада слова в оценку, и поиск останавливается, как только
+        ни одна непросмотренная статья не может попасть в результат (алгоритм порога Фейгина).
+        Списки частых слов строятся при первом поиске и хранятся до пополнения индекса.
+        Отбор по источнику и тегу сужает круг статей до подсчёта оценок.
+        Индекс пополняется по мере добавления статей и сохраняется в файл рядом с коллекцией.
+
+"""
+
+import os
+import pickle
+import re
+from array import array
+from collections import Counter
+from datetime import datetime
+from heapq import nlargest
+from itertools import repeat
+from logging import getLogger
+from math import log as ln
+from operator import add, itemgetter
+from pathlib import Path
+
+import artcollector.aclogger
+from artcollector.storage import article_site, timestamp
+
+log = getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_word(word: str) -> str:
+    """ Приводит слово к виду, в котором оно хранится в индексе: нижний регистр, ё заменена на е. """
+
+    return word.casefold().replace('ё', 'е')
+
+
+def tokenize(text: str) -> list:
+    """ Разбивает текст на нормализованные слова. """
+
+    return _WORD.findall(normalize_word(text)) if text else []
+
+
+class SearchIndex:
+    """ Обратный индекс статей с ранжированием BM25.
+        Статьи нумеруются в порядке добавления, номер совпадает с позицией статьи в коллекции.
+
+    """
+
+    # Вес совпадения в каждом поле статьи.
+    FIELDS = {'headline': 3, 'annotation': 2, 'tags': 2, 'text': 1}
+
+    # Параметры BM25.
+    K1 = 1.2
+    B = 0.75
+
+    # Служебные слова: встречаются почти в каждой статье и не влияют на порядок результатов.
+    STOPWORDS = frozenset((
+        'а', 'без', 'бы', 'был', 'была', 'были', 'было', 'быть', 'в', 'во', 'вот', 'все', 'всех',
+        'где', 'да', 'для', 'до', 'его', 'ее', 'ей', 'если', 'есть', 'еще', 'же', 'за', 'и', 'из',
+        'или', 'им', 'их', 'к', 'как', 'ко', 'когда', 'кто', 'ли', 'между', 'мы', 'на', 'над',
+        'не', 'нет', 'ни', 'но', 'о', 'об', 'он', 'она', 'они', 'оно', 'от', 'по', 'под', 'после',
+        'при', 'про', 'с', 'со', 'так', 'также', 'то', 'того', 'тоже', 'только', 'у', 'уже',
+        'чем', 'что', 'чтобы', 'это', 'этот', 'эти', 'этого', 'этой', 'я',
+        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of',
+        'on', 'or', 'that', 'the', 'this', 'to', 'was', 'were', 'with'
+    ))
+
+    # Списки по убыванию вклада запоминаются для слов, встречающихся не меньше чем
+    # в IMPACT_MIN статьях, но не больше чем для IMPACT_CACHE слов.
+    IMPACT_MIN = 256
+    IMPACT_CACHE = 32
+    # Во сколько раз статей источника и тега должно быть меньше, чем статей со словами запроса,
+    # чтобы оценки считались только для них, без просмотра списков слов.
+    CANDIDATES_RATIO = 16
+    # Сколько первых статей каждого списка просматривается до первой проверки порога.
+    # Дальше просматриваемая часть удваивается.
+    FIRST_BLOCK = 64
+
+    VERSION = 2
+
+    def __init__(self) -> None:
+
+        # Слово -> (номера статей, частоты слова в них).
+        self._postings = {}
+        # Источник (полное имя и сайт) и тег -> номера статей по возрастанию.
+        self._by_source = {}
+        self._by_tag = {}
+
+        self._links = []
+        self._dates = array('d')
+        self._lengths = array('I')
+        self._total_length = 0
+
+        # Слово -> (размер индекса, списки слова, см. _impact). Не сохраняется в файл.
+        self._impacts = {}
+
+    def __len__(self):
+        return len(self._links)
+
+    def add(self, art):
+        """ Добавляет статью в индекс. """
+
+        doc = len(self._links)
+        counts = Counter()
+
+        for field, weight in self.FIELDS.items():
+            value = art.info.get(field) if field != 'text' else art.full_text
+            if isinstance(value, list):
+                value = ' '.join(v for v in value if v)
+            for word in tokenize(value):
+                counts[word] += weight
+
+        for word in self.STOPWORDS.intersection(counts):
+            del counts[word]
+
+        for word, freq in counts.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = (array('I'), array('I'))
+            postings[0].append(doc)
+            postings[1].append(freq)
+
+        for source in {art.source_name, article_site(art)}:
+            self._by_source.setdefault(source, array('I')).append(doc)
+        for tag in {normalize_word(t) for t in art.info.get('tags') or () if t}:
+            self._by_tag.setdefault(tag, array('I')).append(doc)
+
+        length = sum(counts.values())
+        self._links.append(art.link)
+        self._dates.append(timestamp(art.published))
+        self._lengths.append(length)
+        self._total_length += length
+
+    def update(self, articles, chunk: int=1000):
+        """ Добавляет в индекс статьи коллекции, которых в нём ещё нет.
+        articles - последовательность статей коллекции с доступом по срезу.
+        Статьи читаются порциями по chunk штук. """
+
+        while len(self) < len(articles):
+            for art in articles[len(self):len(self) + chunk]:
+                self.add(art)
+
+    def search(self, query: str, limit: int=10, source: str | None=None, tag: str | None=None,
+               since: datetime | None=None, until: datetime | None=None) -> list:
+        """ Ищет статьи по словам запроса.
+
+        query: строка запроса. Статья подходит, если в ней есть хотя бы одно слово запроса.
+            Служебные слова (STOPWORDS) в запросе не учитываются.
+        limit: наибольшее количество результатов.
+        source: полное имя источника или сайт (например, 'tass.ru').
+        tag: тег статьи.
+        since, until: границы даты публикации (включительно).
+
+        Возвращает: список пар (номер статьи, оценка) по убыванию оценки.
+
+        """
+
+        words = set(tokenize(query)) - self.STOPWORDS
+        terms = [self._impact(word) for word in words if word in self._postings]
+        if not terms or limit <= 0:
+            return []
+
+        check = self._filter(since, until)
+
+        candidates = self._candidates(source, tag)
+        if candidates is not None:
+            # Статей источника и тега намного меньше, чем статей со словами запроса:
+            # оценки считаются только для них.
+            if len(candidates) * len(terms) * self.CANDIDATES_RATIO < sum(
+                    len(docs) for docs, _, _ in terms):
+                docs = list(filter(check, candidates) if check else candidates)
+                found = ((doc, score) for doc, score in zip(docs, _scores(docs, terms)) if score)
+                return nlargest(limit, found, key=itemgetter(1))
+
+            allowed = set(candidates)
+            check = allowed.__contains__ if check is None else (
+                lambda doc, dates=check: doc in allowed and dates(doc))
+
+        # Списки слов просматриваются по убыванию вклада частями, каждая следующая вдвое больше.
+        # Статья, не попавшая ни в одну просмотренную часть, получит не больше суммы вкладов
+        # на границе частей - когда эта сумма не превышает худшей оценки в результате,
+        # поиск заканчивается.
+        found = []
+        seen = set()
+        start, end = 0, max(limit, self.FIRST_BLOCK)
+
+        while True:
+            docs = set()
+            for impact_docs, _, _ in terms:
+                docs.update(impact_docs[start:end])
+            docs -= seen
+            seen |= docs
+
+            docs = list(filter(check, docs) if check else docs)
+            found = nlargest(limit, found + list(zip(docs, _scores(docs, terms))),
+                             key=itemgetter(1))
+
+            threshold = sum(impacts[end] for _, impacts, _ in terms if end < len(impacts))
+            if not threshold or len(found) == limit and found[-1][1] >= threshold:
+                return found
+
+            # Глубина, на которой сумма вкладов точно опустится до худшей оценки результата.
+            if len(found) == limit:
+                start, end = end, min(end * 2, _depth(terms, found[-1][1], end))
+            else:
+                start, end = end, end * 2
+
+    def link(self, doc: int) -> str:
+        """ Возвращает ссылку статьи по её номеру в индексе. """
+
+        return self._links[doc]
+
+    def save(self, path: str | Path):
+        """ Сохраняет индекс в файл. """
+
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+
+        with open(tmp_path, 'wb') as file:
+            state = {name: value for name, value in self.__dict__.items() if name != '_impacts'}
+            pickle.dump((self.VERSION, state), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        log.debug('Индекс из %s статей сохранён в %s', len(self), path)
+
+    @classmethod
+    def load(cls, path: str | Path):
+        """ Загружает индекс из файла. Если файла нет или он другой версии, возвращает пустой индекс. """
+
+        index = cls()
+
+        try:
+            with open(path, 'rb') as file:
+                version, state = pickle.load(file)
+        except FileNotFoundError:
+            return index
+
+        if version != cls.VERSION:
+            log.warning('Индекс %s устаревшей версии и будет построен заново', path)
+            return index
+
+        index.__dict__.update(state)
+        return index
+
+    def _impact(self, word: str) -> tuple:
+        """ Списки слова для поиска: статьи и оценки BM25 по слову в порядке убывания оценки
+        и словарь номер статьи -> оценка. Списки частых слов (IMPACT_MIN) запоминаются
+        и строятся заново после пополнения индекса. """
+
+        cached = self._impacts.get(word)
+        if cached is not None and cached[0] == len(self._links):
+            return cached[1]
+
+        docs, freqs = self._postings[word]
+
+        total = len(self._links)
+        idf = ln(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+        k1, b = self.K1, self.B
+        avg_length = self._total_length / total
+        lengths = self._lengths
+
+        scores = {doc: idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * lengths[doc] / avg_length))
+                  for doc, freq in zip(docs, freqs)}
+        order = sorted(scores, key=scores.__getitem__, reverse=True)
+        impact = (array('I', order), array('d', map(scores.__getitem__, order)), scores)
+
+        if len(docs) >= self.IMPACT_MIN:
+            if len(self._impacts) >= self.IMPACT_CACHE:
+                self._impacts.clear()
+            self._impacts[word] = (total, impact)
+        return impact
+
+    def _candidates(self, source, tag) -> array | list | None:
+        """ Номера статей источника и тега по возрастанию или None, если они не заданы. """
+
+        found = []
+        if source is not None:
+            found.append(self._by_source.get(source, ()))
+        if tag is not None:
+            found.append(self._by_tag.get(normalize_word(tag), ()))
+
+        if not found:
+            return
+        if len(found) == 1:
+            return found[0]
+        return sorted(set(found[0]).intersection(found[1]))
+
+    def _filter(self, since, until):
+        """ Возвращает проверку даты статьи по номеру или None, если границы не заданы. """
+
+        if since is None and until is None:
+            return
+
+        since_ts = timestamp(since) if since is not None else None
+        until_ts = timestamp(until) if until is not None else None
+
+        def check(doc: int) -> bool:
+            if since_ts is not None and self._dates[doc] < since_ts:
+                return False
+            if until_ts is not None and self._dates[doc] > until_ts:
+                return False
+            return True
+
+        return check
+
+
+def _scores(docs: list, terms: list) -> list:
+    """ Оценки статей docs по всем словам запроса (terms - списки слов, см. SearchIndex._impact). """
+
+    scores = [0.0] * len(docs)
+    for _, _, by_doc in terms:
+        scores = list(map(add, scores, map(by_doc.get, docs, repeat(0.0))))
+    return scores
+
+
+def _depth(terms: list, score: float, start: int) -> int:
+    """ Наименьшая глубина списков (не меньше start), на которой сумма вкладов слов
+    не больше score. """
+
+    low, high = start, max(len(impacts) for _, impacts, _ in terms)
+    while low < high:
+        middle = (low + high) // 2
+        if sum(impacts[middle] for _, impacts, _ in terms if middle < len(impacts)) <= score:
+            high = middle
+        else:
+            low = middle + 1
+    return low
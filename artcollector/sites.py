@@ -6,19 +6,35 @@
 """
 
 import re
-from datetime import datetime
-from locale import LC_TIME, setlocale
+from datetime import datetime, timezone
 from logging import getLogger
-from urllib.parse import unquote
+from urllib.parse import unquote, urlsplit
 
-import requests
-from requests.exceptions import HTTPError, ReadTimeout
-from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from requests.exceptions import RequestException
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 
 import artcollector.aclogger
+from artcollector.article import BASE_KEYS, Article
+from artcollector.dates import MSK, parse_date
+from artcollector.fetcher import Fetcher, default_fetcher
+from artcollector.metrics import NULL_METRICS, Metrics
+from artcollector.registry import SITES, SiteRegistry
+from artcollector.rules import ExtractionError, compile_rules
 
 log = getLogger(__name__)
 
+# Описание ошибки для ссылки, сайт которой не поддерживается (см. ExtArt.extract).
+UNSUPPORTED = 'сайт не поддерживается или ссылка некорректна'
+
+# Разборщик HTML по умолчанию: lxml, если он установлен, иначе встроенный html.parser.
+try:
+    import lxml
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+else:
+    DEFAULT_PARSER = 'lxml'
+
+
 class ExtractArticleData:
     """ Базовый класс, содержащий основную логику извлечения статей по ссылкам.
         Не предназначен для создания экземпляра.
@@ -33,35 +49,135 @@ class ExtractArticleData:
     MAIN_SEL = ''
     MAIN_ATTRS = {}
 
+    # Разборщик HTML для BeautifulSoup. Пустая строка - DEFAULT_PARSER.
+    PARSER = ''
+    # Разбирать только основной блок статьи (MAIN_FND/MAIN_ATTRS или простой MAIN_SEL).
+    # Шапка, подвал и скрипты страницы при этом в дерево не попадают.
+    MAIN_ONLY = True
+
     FRM = "%d.%m.%Y %H:%M"
 
-    def __init__(self, link: str) -> None:
+    # Часовой пояс дат сайта, в которых он не указан.
+    TIMEZONE = timezone.utc
+
+    # Декларативные правила извлечения (см. модуль rules).
+    # Если правила заданы, шаги _ext_* и _extra_data выполняются по ним.
+    RULES = {}
+    _rules = None
+
+    # Шаги извлечения данных статьи в порядке выполнения.
+    STEPS = ('_ext_date', '_ext_author', '_ext_headline', '_ext_text', '_get_info', '_extra_data')
+
+    def __init__(self, link: str, raw_data: str | bytes | None=None,
+                 fetcher: Fetcher | None=None, parser: str='', metrics: Metrics | None=None) -> None:
+        """ link: ссылка на статью.
+        raw_data: уже загруженный HTML-код страницы (строка или байты).
+            Если не указан, страница загружается по ссылке через fetcher
+            (или общий загрузчик пакета) и передаётся разборщику в байтах вместе с кодировкой.
+        parser: разборщик HTML, заменяющий PARSER класса.
+        metrics: сборщик показателей, в который записывается время разбора и каждого шага извлечения.
+
+        """
 
         self._link = link
+        metrics = metrics or NULL_METRICS
+
+        encoding = None
+        if raw_data is None:
+            raw_data, encoding = (fetcher or default_fetcher()).get_raw(self._link)
+
+        with metrics.timer('parse', self.SOURCE_SITE):
+            self._parse(raw_data, parser or self.PARSER or DEFAULT_PARSER, encoding)
+        self._extract(metrics)
+        self._release()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Правила компилируются один раз при создании класса сайта.
+        if 'RULES' in cls.__dict__:
+            cls._rules = compile_rules(cls.RULES)
+
+    @classmethod
+    def from_html(cls, link: str, raw_data: str | bytes):
+        """ Извлекает статью из уже загруженного HTML-кода без обращения к сети. """
+
+        return cls(link, raw_data=raw_data)
+
+    @classmethod
+    def strainer(cls) -> SoupStrainer | None:
+        """ Возвращает фильтр, оставляющий при разборе только основной блок статьи,
+        или None, если страницу нужно разбирать целиком.
+        Фильтр строится один раз для каждого класса. """
+
+        if '_strainer' not in cls.__dict__:
+            cls._strainer = cls._make_strainer() if cls.MAIN_ONLY else None
+        return cls._strainer
+
+    @classmethod
+    def _make_strainer(cls) -> SoupStrainer | None:
+        if cls.MAIN_FND:
+            return SoupStrainer(cls.MAIN_FND, attrs=cls.MAIN_ATTRS)
+
+        # Из MAIN_SEL фильтр строится только для простых селекторов вида tag, #id и .class.
+        # Для составных селекторов страница разбирается целиком.
+        if cls.MAIN_SEL and re.fullmatch(r'[#.]?[\w-]+', cls.MAIN_SEL):
+            match cls.MAIN_SEL[0]:
+                case '#':
+                    return SoupStrainer(attrs={'id': cls.MAIN_SEL[1:]})
+                case '.':
+                    return SoupStrainer(attrs={'class': cls.MAIN_SEL[1:]})
+                case _:
+                    return SoupStrainer(cls.MAIN_SEL)
 
-        try:
-            response = requests.get(self._link, timeout=10, headers={'User-Agent':
-            f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-            f'Chrome/106.0.0.0 YaBrowser/22.11.5.715 Yowser/2.5 Safari/537.36'})
-        except ReadTimeout:
-            log.fatal('На ссылке %s сработал таймауд', self._link, exc_info=True)
-            raise
+        return
 
-        try:
-            response.raise_for_status()
-        except HTTPError:
-            log.fatal('Ссылка %s Битая. Код ошибки %s.', self._link, response.status_code,
-            exc_info=True)
-            raise
+    def _parse(self, raw_data: str | bytes, parser: str=DEFAULT_PARSER, encoding: str | None=None):
+        """ Строит дерево страницы и находит в нём основной блок статьи.
+        encoding: кодировка страницы в байтах; без неё BeautifulSoup определяет кодировку сам.
+        Если основного блока на странице нет, вызывает ExtractionError. """
 
-        raw_data = response.text
+        if isinstance(raw_data, str):
+            encoding = None
 
-        self._html_tree = BeautifulSoup(raw_data, 'html.parser')
+        self._html_tree = BeautifulSoup(raw_data, parser, parse_only=self.strainer(),
+            from_encoding=encoding)
 
         if self.MAIN_FND:
             self._main_tree = self._html_tree.find(self.MAIN_FND, attrs=self.MAIN_ATTRS)
         elif self.MAIN_SEL:
-            self._main_tree = self._html_tree.select(self.MAIN_SEL)[0]
+            self._main_tree = self._html_tree.select_one(self.MAIN_SEL)
+        else:
+            return
+
+        if self._main_tree is None:
+            raise ExtractionError(f'Не найден основной блок статьи {self.MAIN_FND or self.MAIN_SEL}')
+
+    def _release(self):
+        """ Освобождает деревья страницы: после извлечения данных они не нужны. """
+
+        self._html_tree = None
+        self._main_tree = None
+
+    def to_article(self) -> Article:
+        """ Возвращает компактную запись статьи (Article) с извлечёнными данными. """
+
+        extra = {key: value for key, value in self._info.items() if key not in BASE_KEYS}
+
+        return Article(self._source_name, self._date, self._author, self._headline,
+            self._link, self._text, self._links, extra)
+
+    def _extract(self, metrics: Metrics=NULL_METRICS):
+        """ Извлекает данные статьи из разобранной страницы. """
+
+        self._init_fields()
+
+        for step in self.STEPS:
+            with metrics.timer(step, self.SOURCE_SITE):
+                getattr(self, step)()
+
+    def _init_fields(self):
+        """ Задаёт начальные значения полей статьи перед извлечением. """
 
         self._source_name = f'{self.SOURCE_NAME} ({self.SOURCE_SITE})'
         self._date = None
@@ -71,13 +187,6 @@ class ExtractArticleData:
         self._info = None
         self._links = []
 
-        self._ext_date()
-        self._ext_author()
-        self._ext_headline()
-        self._ext_text()
-        self._get_info()
-        self._extra_data()
-
     def __getitem__(self, key: str):
         return self._info[key]
 
@@ -86,16 +195,24 @@ class ExtractArticleData:
         f"{self.headline} <Полный текст> {self.link}")
 
     def _ext_date(self):
-        pass
+        if self._rules and self._rules.date:
+            rule = self._rules.date
+            source_date = rule.extract(self._main_tree)
+            if rule.prepare:
+                source_date = getattr(self, rule.prepare)(source_date)
+            self._date = self._parse_date(source_date, rule.formats)
 
     def _ext_author(self):
-        pass
+        if self._rules and self._rules.author:
+            self._author = self._rules.author.extract(self._main_tree)
 
     def _ext_headline(self):
-        pass
+        if self._rules and self._rules.headline:
+            self._headline = self._rules.headline.extract(self._main_tree)
 
     def _ext_text(self):
-        pass
+        if self._rules and self._rules.text:
+            self._text = self._rules.text.extract(self._main_tree, self)
 
     def _get_info(self):
         self._info = {
@@ -109,7 +226,19 @@ class ExtractArticleData:
         }
 
     def _extra_data(self):
-        pass
+        if self._rules:
+            self._info.update({
+                name: rule.extract(self._main_tree) for name, rule in self._rules.extra.items()
+            })
+
+    def _parse_date(self, source_date: str, formats: tuple):
+        """ Разбирает строку даты, перебирая форматы по порядку (см. dates.parse_date).
+        Дата без часового пояса получает часовой пояс сайта (TIMEZONE). """
+
+        try:
+            return parse_date(source_date, formats, self.TIMEZONE)
+        except ValueError as error:
+            raise ExtractionError(str(error)) from None
 
     @property
     def date(self):
@@ -117,6 +246,12 @@ class ExtractArticleData:
 
         return self._date.strftime(self.FRM)
 
+    @property
+    def published(self):
+        """ Возвращает дату публикации в виде datetime """
+
+        return self._date
+
     @property
     def source_name(self):
         """ Возвращает полное имя источника """
@@ -155,8 +290,7 @@ class ExtractArticleData:
 
     @property
     def links(self):
-        """ Возвращает список ссылок из статьи.
-        Предполагается использовать при реализации скрапера. """
+        """ Возвращает список ссылок из статьи (используется обходчиком, см. модуль crawler). """
 
         return self._links
 
@@ -190,74 +324,31 @@ class ExtractHabrArticle(ExtractArticleData):
     SOURCE_SITE = 'habr.com'
     MAIN_FND = 'article'
 
-    def _ext_date(self):
-
-        date_tag = 'time'
-        date_attr = 'datetime'
-        date_frm = "%Y-%m-%dT%H:%M:%S.%Z"
-
-        source_date = self._main_tree.find(date_tag)[date_attr]
-        date = datetime.strptime(f"{source_date[0:-5]}.UTC", date_frm)
-
-        self._date = date
-
-    def _ext_author(self):
-
-        author_tag = 'span'
-        author_attrs = {"class": "tm-user-info__user"}
-
-        author = self._main_tree.find(author_tag, attrs=author_attrs)
-
-        self._author = author.get_text().strip()
-
-    def _ext_headline(self):
-
-        hl_tag = 'h1'
-
-        headline = self._main_tree.find(hl_tag)
-
-        self._headline = headline.get_text().strip()
-
-    def _ext_text(self):
-
-        txt_sel = '#post-content-body > div:nth-child(1) > div > div'
-        source_text = self._main_tree.select(txt_sel)[0]
-        text = ''
-
-        for content in source_text.contents:
-
-            self.link_processing(content, self._links)
-
-            if content.name == 'br':
-                content.decompose()
-
-            for br in content.findAll('br'):
-                if br.name == 'br' and br.next_element.name == 'br':
-                    br.decompose()
-                else:
-                    br.replaceWith('\n')
-
-            match content.name:
-                case 'pre' | 'code':
-                    text += '\n' + content.getText() + '\n'*2
-                case 'h1' | 'h2' | 'h3' | 'h4' | 'h5' | 'h6':
-                    text += '\n' + content.getText(strip=True) + '\n'*2
-                case 'ol' | 'ul':
-                    text += '\n* ' + content.getText('\n* ', strip=True) + '\n' * 2
-                case _:
-                    if content.strings:
-                        text += content.getText().strip() + '\n'
-
-        self._text = text.strip().replace('\n\r\n', '\n').replace('\n'*3, '\n'*2)
-
-    def _extra_data(self):
-
-        tags_attrs = {'class': "tm-separated-list__list"}
-
-        source_tags = self._main_tree.find(attrs=tags_attrs)
-        tags = source_tags.getText('\n', strip=True).split('\n')
-
-        self._info.update({'tags': tags})
+    RULES = {
+        'date': {
+            'select': 'time',
+            'attr': 'datetime',
+            'format': ["%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z"]
+        },
+        'author': {'select': 'span.tm-user-info__user'},
+        'headline': {'select': 'h1'},
+        'text': {
+            'select': '#post-content-body > div:nth-child(1) > div > div',
+            'breaks': True,
+            'blocks': [
+                ('pre, code', 'pre'),
+                ('h1, h2, h3, h4, h5, h6', 'heading'),
+                ('ol, ul', 'list')
+            ],
+            'default': 'strip'
+        },
+        'extra': {
+            'tags': {
+                'select': '.tm-separated-list__list',
+                'sep': '\n', 'strip_each': True, 'split': '\n'
+            }
+        }
+    }
 
 
 class ExtractNakedscienceArticle(ExtractArticleData):
@@ -267,87 +358,34 @@ class ExtractNakedscienceArticle(ExtractArticleData):
     SOURCE_SITE = 'naked-science.ru'
     MAIN_SEL = '.content'
 
-    def _ext_date(self):
-
-        date_attrs = {"class": "echo_date"}
-        date_attr = 'data-published'
-        date_frm = "%Y-%m-%dT%H:%M:%S%z"
-
-        source_date = self._main_tree.find(attrs=date_attrs)[date_attr]
-        date = datetime.strptime(source_date, date_frm)
-
-        self._date = date
-
-    def _ext_author(self):
-
-        author_tag = 'div'
-        author_attrs = {"class": "meta-item_author"}
-
-        author = self._main_tree.find(author_tag, attrs=author_attrs)
-
-        self._author = author.get_text().strip()
-
-    def _ext_headline(self):
-
-        hl_tag = 'h1'
-
-        headline = self._main_tree.find(hl_tag)
-
-        self._headline = headline.get_text().strip()
-
-    def _ext_text(self):
-
-        txt_sel = '.body'
-
-        source_text = self._main_tree.select(txt_sel)[0]
-        text = ''
-
-        art_content = source_text.contents
-
-        for content in art_content:
-            if isinstance(content, (NavigableString, Comment)) or content.get('class', False) == ['ads_single']:
-                content.extract()
-        for content in art_content:
-            if isinstance(content, (NavigableString, Comment)) or content.get('class', False) == ['ads_single']:
-                content.extract()
-
-        for content in art_content:
-
-            self.link_processing(content, self._links)
-
-            match content.name:
-                case 'pre' | 'code':
-                    text += '\n' + content.getText() + '\n'*2
-                case 'h1' | 'h2' | 'h3' | 'h4' | 'h5' | 'h6':
-                    text += '\n' + content.getText(strip=True) + '\n'*2
-                case 'ol' | 'ul':
-                    text += '\n* ' + content.getText('\n* ', strip=True) + '\n' * 2
-                case 'div':
-                    if 'other-news-block' in content['class']:
-                        text += content.getText('\n', strip=True) + '\n'
-                    # else:
-                        # text += content.getText() + '\n'
-                case _:
-                    if content.strings:
-                        text += content.getText() + '\n'
-
-        self._text = text.strip().replace('\n\r\n', '\n').replace('\n'*3, '\n'*2)
-
-    def _extra_data(self):
-
-        tags_attr = '.terms-items'
-        ann_attr = '.post-lead'
-
-        source_tags = self._main_tree.select(tags_attr)[0]
-        source_ann = self._main_tree.select(ann_attr)[0]
-
-        tags = source_tags.getText('\n', strip=True).replace('# ', '').split('\n')
-        annotation = source_ann.getText(strip=True)
-
-        self._info.update({
-            'tags': tags,
-            'annotation': annotation
-            })
+    RULES = {
+        'date': {
+            'select': '.echo_date',
+            'attr': 'data-published',
+            'format': "%Y-%m-%dT%H:%M:%S%z"
+        },
+        'author': {'select': 'div.meta-item_author'},
+        'headline': {'select': 'h1'},
+        'text': {
+            'select': '.body',
+            'strings': False,
+            'skip': ['.ads_single'],
+            'blocks': [
+                ('pre, code', 'pre'),
+                ('h1, h2, h3, h4, h5, h6', 'heading'),
+                ('ol, ul', 'list'),
+                ('div.other-news-block', 'lines'),
+                ('div', 'skip')
+            ]
+        },
+        'extra': {
+            'tags': {
+                'select': '.terms-items',
+                'sep': '\n', 'strip_each': True, 'replace': [('# ', '')], 'split': '\n'
+            },
+            'annotation': {'select': '.post-lead', 'strip_each': True}
+        }
+    }
 
 
 class ExtractTassArticle(ExtractArticleData):
@@ -357,180 +395,210 @@ class ExtractTassArticle(ExtractArticleData):
     SOURCE_SITE = 'tass.ru'
     MAIN_FND = 'main'
 
-    def _ext_date(self):
-
-        date_tag = 'div'
-        date_attrs = {"class": [
-            'ds_ext_marker-kFsBk',
-            'ds_ext_marker--font_weight_medium-wX2ql',
-            'ds_ext_marker--color_secondary-z2ssC'
-            ]}
-
-        date_frm = "%d %b %Y %H:%M%z"
+    TIMEZONE = MSK
+
+    RULES = {
+        'date': {
+            'select': ('div.ds_ext_marker-kFsBk.ds_ext_marker--font_weight_medium-wX2ql'
+                '.ds_ext_marker--color_secondary-z2ssC'),
+            'strip_each': True,
+            'prepare': '_prepare_date',
+            'format': "%d %b %Y %H:%M"
+        },
+        'headline': {'select': 'h1'},
+        'text': {
+            'select': 'article',
+            'blocks': [
+                ('h1, h2, h3, h4, h5, h6', 'heading'),
+                ('ol, ul', 'list')
+            ]
+        },
+        'extra': {
+            'tags': {'select': 'a.Tags_tag__tRSPs', 'all': True}
+        }
+    }
 
-        source_date = self._main_tree.find(date_tag, attrs=date_attrs)
+    def _prepare_date(self, source_date: str) -> str:
+        """ Приводит дату в парсибельный вид. """
 
-        # Приводим дату в парсибельный вид.
-        date_list = source_date.getText(strip=True).replace('\xa0', ' ').split(' ')
-        date_list[1] = date_list[1][:3]
-        if not re.fullmatch('\d{4},', date_list[2]):
-            date_list.insert(2, str(datetime.now().year))
+        date_list = source_date.replace('\xa0', ' ').split(' ')
+        if len(date_list) < 3:
+            raise ExtractionError(f'Дата {source_date!r} не разобрана')
+        # После месяца может стоять запятая ('17 января, 10:15') или точка сокращения ('янв.').
+        date_list[1] = date_list[1].rstrip('.,')
+        if not re.fullmatch(r'\d{4},?', date_list[2]):
+            date_list.insert(2, str(datetime.now(MSK).year))
         else:
             date_list[2] = date_list[2][:-1] if date_list[2][-1] == ',' else date_list[2]
-        date_list[-1] += '+03:00'
-
-        # Поскольку дата по умолчанию в английском формате, а на сайте - по-русски,
-        # приходится менять локаль, сохраняя исходную, а затем её восстанавливать.
-
-        cur_format = setlocale(LC_TIME)
-        setlocale(LC_TIME, 'Russian_Russia.1251')
-        date = datetime.strptime(' '.join(date_list), date_frm)
-        self._date = date
-        setlocale(LC_TIME, cur_format)
-
-    def _ext_headline(self):
 
-        hl_tag = 'h1'
+        return ' '.join(date_list)
 
-        headline = self._main_tree.find(hl_tag)
 
-        self._headline = headline.get_text().strip()
+class ExtractInoSMIArticle(ExtractArticleData):
+    """ Извлечение статей с inosmi.ru. """
 
-    def _ext_text(self):
+    SOURCE_NAME = 'ИноСМИ'
+    SOURCE_SITE = 'inosmi.ru'
 
-        txt_tag = 'article'
-        source_text = self._main_tree.find(txt_tag)
-        text = ''
+    MAIN_SEL = '#content'
 
-        for content in source_text.contents:
+    TIMEZONE = MSK
+
+    RULES = {
+        'date': {'select': 'div[itemprop="datePublished"]', 'format': "%Y-%m-%dT%H:%M"},
+        'author': {'select': 'div.article__authors'},
+        'headline': {'select': 'h1'},
+        'text': {
+            'select': 'div.article__body',
+            'blocks': [
+                ('div[data-type="text"]', 'text'),
+                ('div[data-type="article"]', '_related_article')
+            ],
+            'default': 'skip'
+        },
+        'extra': {
+            'tags': {'select': 'div[itemprop="articleSection"]', 'all': True},
+            'annotation': {'select': 'div.article__announce-text', 'strip_each': True}
+        }
+    }
 
-            self.link_processing(content, self._links)
+    def _related_article(self, content) -> str:
+        """ Вставки отсылок к предыдущим статьям по теме. """
 
+        article_link = content.select_one('a.article__article-link[href]')
+        source = content.select_one('div.article__article-source')
+        info = content.select_one('div.article__article-info')
+        if article_link is None or source is None or info is None:
+            raise ExtractionError('Не разобрана вставка со ссылкой на статью по теме')
 
-            match content.name:
-                case 'h1' | 'h2' | 'h3' | 'h4' | 'h5' | 'h6':
-                    text += '\n' + content.getText(strip=True) + '\n'*2
-                case 'ol' | 'ul':
-                    text += '\n* ' + content.getText('\n* ', strip=True) + '\n' * 2
-                case _:
-                    if content.strings:
-                        text += content.getText() + '\n'
+        self._links.append(article_link['href'])
 
-        self._text = text.strip().replace('\n\r\n', '\n').replace('\n'*3, '\n'*2)
+        return ('\n' + article_link.getText('\n', strip=True) + '\n'
+            + source.getText(', ', strip=True) + ', '
+            + info.getText(strip=True) + '\n'
+            + 'https://inosmi.ru' + article_link['href'] + '\n'*2)
 
     def _extra_data(self):
 
-        tags_tag = 'a'
-        tags_attrs = {"class": "Tags_tag__tRSPs"}
-
-        source_tags = self._main_tree.findAll(tags_tag, attrs=tags_attrs)
-        tags = [t.string for t in source_tags]
-
-        self._info.update({'tags': tags})
-
-class ExtractInoSMIArticle(ExtractArticleData):
-    """ Извлечение статей с inosmi.ru. """
-
-    SOURCE_NAME = 'ИноСМИ'
-    SOURCE_SITE = 'inosmi.ru'
+        super()._extra_data()
 
-    MAIN_SEL = '#content'
-
-    def _ext_date(self):
-        date_tag = 'div'
-        date_attrs = {'itemprop': 'datePublished'}
-        date_frm = "%Y-%m-%dT%H:%M"
+        # Добавляем в список связанных ссылок ссылку на оригинал статьи.
+        original = self._main_tree.select_one('div.article__info-original a[href]')
+        if original is None:
+            raise ExtractionError('Не найдена ссылка на оригинал статьи')
+        self._links.append(original['href'])
 
-        source_date = self._main_tree.find(date_tag, attrs=date_attrs)
-        date = datetime.strptime(source_date.getText(), date_frm)
 
-        self._date = date
+class ExtArt:
+    """ Запускает нужный класс для загрузки статьи.
+        Все статьи загружаются через один загрузчик (Fetcher),
+        поэтому соединения с сайтами переиспользуются.
+
+    fetcher: готовый загрузчик. Если не указан, создаётся новый с параметрами
+        timeout, headers, pool_connections и pool_maxsize (см. Fetcher).
+    parser: разборщик HTML для всех статей (по умолчанию - свой у каждого класса сайта).
+    metrics: сборщик показателей (Metrics). Если указан, в нём собирается время каждого этапа
+        загрузки и извлечения, объём загруженных данных и количество удачных и неудачных статей
+        по сайтам. По умолчанию показатели не собираются.
+    registry: реестр поддерживаемых сайтов (см. модуль registry). По умолчанию - registry.SITES:
+        сайты пакета и сайты сторонних пакетов из точек входа 'artcollector.sites'.
 
-    def _ext_author(self):
-        author_tag = 'div'
-        author_attrs = {'class': 'article__authors'}
+    """
 
-        author = self._main_tree.find(author_tag, attrs=author_attrs)
+    def __init__(self, fetcher: Fetcher | None=None, timeout: float=10, headers: dict | None=None,
+                 pool_connections: int=10, pool_maxsize: int=10, parser: str='',
+                 metrics: Metrics | None=None, registry: SiteRegistry | None=None) -> None:
 
-        self._author = author.get_text().strip()
+        artcollector.aclogger.auto_setup()
 
-    def _ext_headline(self):
+        self.metrics = metrics or NULL_METRICS
+        self.fetcher = fetcher or Fetcher(timeout=timeout, headers=headers,
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, metrics=metrics)
+        if metrics and self.fetcher.metrics is NULL_METRICS:
+            self.fetcher.metrics = metrics
+        self.parser = parser
+        self.registry = registry or SITES
 
-        hl_tag = 'h1'
+    def __call__(self, link, raw_data: str | bytes | None=None, *args, **kwds) -> Article | None:
+        """ Возвращает статью (Article) по ссылке или None, если её не удалось получить.
+        Если передан raw_data (HTML-код страницы), статья извлекается из него без загрузки. """
 
-        headline = self._main_tree.find(hl_tag)
+        return self.extract(link, raw_data)[0]
 
-        self._headline = headline.get_text().strip()
+    def extract(self, link: str, raw_data: str | bytes | None=None) -> tuple:
+        """ То же, что вызов ExtArt, но возвращает пару (статья или None, описание ошибки или None),
+        чтобы причину неудачи можно было записать (например, в журнал загрузки). """
 
-    def _ext_text(self):
+        site_class = self.site_class(link)
 
-        txt_sel = 'div.article__body'
-        source_text = self._main_tree.select(txt_sel)[0]
-        text = ''
+        if not site_class:
+            self.metrics.count('unsupported')
+            return None, UNSUPPORTED
 
-        for content in source_text.contents:
-            if content.strings and content.name == 'div' and content.get('data-type', '') == 'text':
-                self.link_processing(content, self._links)
-                text += content.getText() + '\n'
-            if content.strings and content.name == 'div' and content.get('data-type', '') == 'article':
-                # Вставки отсылок к предыдущим статьям по теме.
-                text += '\n' + content.select('a.article__article-link')[0].getText('\n', strip=True) + '\n'
-                text += content.select('div.article__article-source')[0].getText(', ', strip=True) + ', '
-                text += content.select('div.article__article-info')[0].getText(strip=True) + '\n'
-                text += 'https://inosmi.ru' + content.select('a.article__article-link')[0]['href'] + '\n'*2
-                self._links.append(content.select('a.article__article-link')[0]['href'])
+        try:
+            art = site_class(link, raw_data=raw_data, fetcher=self.fetcher,
+                parser=self.parser, metrics=self.metrics).to_article()
+        except RequestException as error:
+            self.metrics.count('failures', site_class.SOURCE_SITE)
+            log.warning('Не удалось загрузить %s', link, exc_info=True)
+            return None, _describe(error)
+        except ExtractionError as error:
+            self.metrics.count('failures', site_class.SOURCE_SITE)
+            log.warning('Не удалось извлечь статью %s', link, exc_info=True)
+            return None, _describe(error)
 
-        self._text = text.strip().replace('\n'*3, '\n'*2)
+        self.metrics.count('articles', site_class.SOURCE_SITE)
+        return art, None
 
+    def fetch(self, link: str) -> str | None:
+        """ Загружает страницу поддерживаемого сайта без извлечения статьи.
+        Возвращает HTML-код страницы или None, если её не удалось получить. """
 
-    def _extra_data(self):
+        return self.fetch_page(link)[0]
 
-        tags_tag = 'div'
-        tags_attrs = {'itemprop': 'articleSection'}
-        ann_tag = 'div'
-        ann_attrs = {'class':'article__announce-text'}
+    def fetch_page(self, link: str) -> tuple:
+        """ То же, что fetch, но возвращает пару (HTML-код или None, описание ошибки или None). """
 
-        source_tags = self._main_tree.findAll(tags_tag, attrs=tags_attrs)
-        source_ann = self._main_tree.find(ann_tag, attrs=ann_attrs)
+        site_class = self.site_class(link)
 
-        tags = [t.string for t in source_tags]
-        annotation = source_ann.getText(strip=True)
+        if not site_class:
+            self.metrics.count('unsupported')
+            return None, UNSUPPORTED
 
-        # Добавляем в список связанных ссылок ссылку на оригинал статьи.
-        self._links.append(
-            self._main_tree.find('div', attrs={'class':'article__info-original'}).find('a')['href']
-        )
+        try:
+            return self.fetcher.get(link), None
+        except RequestException as error:
+            self.metrics.count('failures', site_class.SOURCE_SITE)
+            log.warning('Не удалось загрузить %s', link, exc_info=True)
+            return None, _describe(error)
 
-        self._info.update({
-            'tags': tags,
-            'annotation': annotation
-            })
+    def supports(self, link: str) -> bool:
+        """ Проверяет, поддерживается ли сайт ссылки. В отличие от site_class, ничего не записывает в журнал. """
 
+        return self.registry.for_url(link) is not None
 
-class ExtArt:
-    """ Запускает нужный класс для загрузки статьи """
+    def site_class(self, link: str):
+        """ Возвращает класс, поддерживающий сайт ссылки, или None. """
 
-    SITE_CLASS = {
-        'habr.com': ExtractHabrArticle,
-        'naked-science.ru': ExtractNakedscienceArticle,
-        'tass.ru': ExtractTassArticle,
-        'inosmi.ru': ExtractInoSMIArticle
-    }
+        try:
+            parts = urlsplit(link)
+            host = parts.hostname
+            # Нечисловой порт или порт вне диапазона делает ссылку некорректной.
+            parts.port
+        except ValueError:
+            host = None
+
+        if not host or parts.scheme not in ('http', 'https'):
+            log.warning('Некорректная ссылка %s', link)
+            return
 
-    def __call__(self, link, *args, **kwds):
+        site_class = self.registry.resolve(host)
+        if site_class is None:
+            log.warning('Ресурс %s не поддерживается', host)
+        return site_class
 
-        source = re.search(r'https?://w?w?w?\.?([\w\.-]*\.\w{2,})/', link)
 
-        if not source:
-            log.warning('Некорректная ссылка %s', link)
-            return
+def _describe(error: Exception) -> str:
+    """ Описание ошибки для журнала загрузки: тип и текст исключения. """
 
-        if source [1]in self.SITE_CLASS:
-            try:
-                return self.SITE_CLASS[source[1]](link)
-            except (HTTPError, ReadTimeout):
-                log.warning('Не удалось загрузить %s', link, exc_info=True)
-                return
-        else:
-            log.warning('Ресурс %s не поддерживается', source[1])
-            return
+    return f'{type(error).__name__}: {error}'
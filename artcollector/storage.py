@@ -0,0 +1,420 @@
+""" Модуль storage.
+    Описание: Хранилища статей коллекции.
+        MemoryStorage держит статьи в памяти (по умолчанию),
+        SQLiteStorage - в файле базы SQLite, что позволяет пополнять коллекцию
+        между запусками и просматривать её, не загружая целиком в память.
+        Оба хранилища ведут индексы по источнику, автору, тегу и дате публикации
+        и отдают номера подходящих статей (ids), по которым строятся представления (модуль views).
+
+"""
+
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from logging import getLogger
+from pathlib import Path
+from threading import RLock
+from urllib.parse import urlsplit
+
+import artcollector.aclogger
+from artcollector.article import BASE_KEYS, Article
+from artcollector.urls import normalize_url
+
+log = getLogger(__name__)
+
+
+def article_site(art) -> str:
+    """ Возвращает сайт статьи по её ссылке (без www.). """
+
+    return (urlsplit(art.link).hostname or '').removeprefix('www.')
+
+
+def article_tags(art) -> set:
+    """ Возвращает теги статьи для индекса (без учёта регистра). """
+
+    return {tag.casefold() for tag in art.extra.get('tags') or () if tag}
+
+
+def timestamp(date: datetime) -> float:
+    """ Возвращает метку времени даты. Дата без часового пояса считается датой в UTC. """
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+class MemoryStorage:
+    """ Хранилище статей в памяти: список статей и индексы нормализованных ссылок,
+    источников (полное имя и сайт), авторов, тегов и дат публикации.
+    Номер статьи (id) - её позиция в списке. """
+
+    def __init__(self) -> None:
+        self._articles = []
+        self._urls = {}
+        self._sources = {}
+        self._authors = {}
+        self._tags = {}
+        # Пары (метка времени публикации, номер статьи) по возрастанию.
+        self._dates = []
+
+    def __iter__(self):
+        return iter(self._articles)
+
+    def __len__(self):
+        return len(self._articles)
+
+    @property
+    def name(self) -> str | None:
+        """ Название коллекции, сохранённое в хранилище. В памяти не хранится. """
+
+        return
+
+    @name.setter
+    def name(self, value: str):
+        pass
+
+    def add(self, articles) -> int:
+        """ Добавляет статьи, ссылок которых ещё нет в хранилище. Возвращает количество добавленных. """
+
+        added = 0
+        for art in articles:
+            key = normalize_url(art.link)
+            if key in self._urls:
+                continue
+            position = len(self._articles)
+            self._urls[key] = position
+            self._articles.append(art)
+            self._index(art, position)
+            added += 1
+        return added
+
+    def _index(self, art, position: int):
+        for source in {art.source_name, article_site(art)}:
+            self._sources.setdefault(source, []).append(position)
+        if art.author is not None:
+            self._authors.setdefault(art.author, []).append(position)
+        for tag in article_tags(art):
+            self._tags.setdefault(tag, []).append(position)
+        insort(self._dates, (timestamp(art.published), position))
+
+    def get(self, index):
+        """ Возвращает статью по номеру или список статей по срезу. """
+
+        return self._articles[index]
+
+    def get_url(self, key: str):
+        """ Возвращает статью по нормализованной ссылке. Если её нет, вызывает KeyError. """
+
+        return self._articles[self._urls[key]]
+
+    def has_url(self, key: str) -> bool:
+        """ Проверяет наличие статьи с нормализованной ссылкой. """
+
+        return key in self._urls
+
+    def find(self, source: str | None=None, author: str | None=None, tag: str | None=None,
+             since: datetime | None=None, until: datetime | None=None):
+        """ Отдаёт статьи, подходящие под все указанные условия.
+        source: полное имя источника или сайт (например, 'tass.ru');
+        author: автор;
+        tag: тег (без учёта регистра);
+        since, until: границы даты публикации (включительно). """
+
+        return self.by_ids(self.ids(source=source, author=author, tag=tag, since=since, until=until))
+
+    def ids(self, source: str | None=None, author: str | None=None, tag: str | None=None,
+            since: datetime | None=None, until: datetime | None=None,
+            order: str | None=None, reverse: bool=False) -> list:
+        """ Возвращает номера статей, подходящих под условия (см. find), по индексам.
+        order: None - в порядке добавления, 'published' - по дате публикации.
+        reverse: обратный порядок. """
+
+        candidates = []
+
+        if source is not None:
+            candidates.append(self._sources.get(source, ()))
+        if author is not None:
+            candidates.append(self._authors.get(author, ()))
+        if tag is not None:
+            candidates.append(self._tags.get(tag.casefold(), ()))
+
+        dates = self._dates
+        if since is not None or until is not None:
+            start = bisect_left(dates, (timestamp(since),)) if since is not None else 0
+            stop = (bisect_right(dates, (timestamp(until), float('inf')))
+                    if until is not None else len(dates))
+            dates = dates[start:stop]
+            if order != 'published':
+                candidates.append(sorted(position for _, position in dates))
+
+        if order == 'published':
+            allowed = _intersect(candidates) if candidates else None
+            ids = [position for _, position in dates if allowed is None or position in allowed]
+        elif candidates:
+            ids = sorted(_intersect(candidates))
+        else:
+            ids = list(range(len(self._articles)))
+
+        if reverse:
+            ids.reverse()
+        return ids
+
+    def by_ids(self, ids):
+        """ Отдаёт статьи с номерами ids в том же порядке. """
+
+        articles = self._articles
+        return (articles[position] for position in ids)
+
+    def close(self):
+        pass
+
+
+def _intersect(lists) -> set:
+    """ Пересечение списков номеров, начиная с самого короткого. """
+
+    lists = sorted(lists, key=len)
+    result = set(lists[0])
+    for other in lists[1:]:
+        result.intersection_update(other)
+    return result
+
+
+class SQLiteStorage:
+    """ Хранилище статей в базе SQLite.
+        Статьи добавляются пакетами в одной транзакции и читаются лениво.
+        Ссылка, источник, дата и автор проиндексированы, теги хранятся в отдельной
+        проиндексированной таблице. Номер статьи (id) - ключ её строки в базе.
+
+    path: путь к файлу базы. Если файла нет, он создаётся.
+
+    """
+
+    # Сколько строк читать из базы за раз при переборе статей.
+    FETCH_SIZE = 500
+
+    COLUMNS = 'link, source, published, author, headline, text, links, extra'
+
+    def __init__(self, path: str | Path) -> None:
+
+        # sqlite3 загружается только при открытии хранилища, а не при импорте пакета.
+        import sqlite3
+
+        self.path = Path(path)
+        self._lock = RLock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        has_tags = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tags'").fetchone()
+        self._db.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                link TEXT NOT NULL,
+                site TEXT,
+                source TEXT,
+                published TEXT,
+                published_ts REAL,
+                author TEXT,
+                headline TEXT,
+                text TEXT,
+                links TEXT,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS articles_site ON articles (site);
+            CREATE INDEX IF NOT EXISTS articles_source ON articles (source);
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published_ts);
+            CREATE INDEX IF NOT EXISTS articles_author ON articles (author);
+            CREATE TABLE IF NOT EXISTS tags (article INTEGER NOT NULL, tag TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag, article);
+        ''')
+        self._count = self._db.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+        if not has_tags and self._count:
+            self._index_tags()
+
+    def __iter__(self):
+        return self._query(f'SELECT {self.COLUMNS} FROM articles ORDER BY id')
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def name(self) -> str | None:
+        """ Название коллекции, сохранённое в базе. """
+
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'name'").fetchone()
+        return row[0] if row else None
+
+    @name.setter
+    def name(self, value: str):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('name', ?)", (value,))
+
+    def add(self, articles) -> int:
+        """ Добавляет статьи в одной транзакции. Статьи, ссылки которых уже есть в базе, пропускаются.
+        Возвращает количество добавленных. """
+
+        rows = [(self._row(art), article_tags(art)) for art in articles]
+        added = 0
+
+        with self._lock, self._db:
+            for row, tags in rows:
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO articles (url, link, site, source, published, published_ts, '
+                    'author, headline, text, links, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    row)
+                if not cursor.rowcount:
+                    continue
+                added += 1
+                if tags:
+                    self._db.executemany('INSERT INTO tags VALUES (?, ?)',
+                        [(cursor.lastrowid, tag) for tag in tags])
+            self._count += added
+
+        log.debug('В базу %s добавлено статей: %s', self.path, added)
+        return added
+
+    def get(self, index):
+        """ Возвращает статью по номеру или список статей по срезу. """
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step != 1 or start >= stop:
+                return [self.get(i) for i in range(start, stop, step)]
+            return list(self._query(
+                f'SELECT {self.COLUMNS} FROM articles ORDER BY id LIMIT ? OFFSET ?',
+                (stop - start, start)))
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('Номер статьи вне коллекции')
+
+        return next(self._query(
+            f'SELECT {self.COLUMNS} FROM articles ORDER BY id LIMIT 1 OFFSET ?', (index,)))
+
+    def get_url(self, key: str):
+        """ Возвращает статью по нормализованной ссылке. Если её нет, вызывает KeyError. """
+
+        for art in self._query(f'SELECT {self.COLUMNS} FROM articles WHERE url = ?', (key,)):
+            return art
+        raise KeyError(key)
+
+    def has_url(self, key: str) -> bool:
+        """ Проверяет наличие статьи с нормализованной ссылкой. """
+
+        with self._lock:
+            return self._db.execute(
+                'SELECT 1 FROM articles WHERE url = ?', (key,)).fetchone() is not None
+
+    def find(self, source: str | None=None, author: str | None=None, tag: str | None=None,
+             since: datetime | None=None, until: datetime | None=None):
+        """ Отдаёт статьи, подходящие под все указанные условия (см. MemoryStorage.find).
+        Отбор выполняется по индексам базы. """
+
+        where, params = self._where(source, author, tag, since, until)
+
+        return self._query(f'SELECT {self.COLUMNS} FROM articles {where} ORDER BY id', params)
+
+    def ids(self, source: str | None=None, author: str | None=None, tag: str | None=None,
+            since: datetime | None=None, until: datetime | None=None,
+            order: str | None=None, reverse: bool=False) -> list:
+        """ Возвращает номера статей, подходящих под условия, по индексам базы
+        (см. MemoryStorage.ids). """
+
+        where, params = self._where(source, author, tag, since, until)
+        direction = ' DESC' if reverse else ''
+        order_by = f'published_ts{direction}, id{direction}' if order == 'published' else f'id{direction}'
+
+        with self._lock:
+            rows = self._db.execute(f'SELECT id FROM articles {where} ORDER BY {order_by}', params)
+            return [row[0] for row in rows]
+
+    def by_ids(self, ids):
+        """ Лениво отдаёт статьи с номерами ids в том же порядке, читая их порциями по FETCH_SIZE. """
+
+        ids = list(ids)
+
+        for start in range(0, len(ids), self.FETCH_SIZE):
+            chunk = ids[start:start + self.FETCH_SIZE]
+            with self._lock:
+                rows = self._db.execute(
+                    f'SELECT id, {self.COLUMNS} FROM articles '
+                    f'WHERE id IN ({", ".join("?" * len(chunk))})', chunk).fetchall()
+            found = {row[0]: row[1:] for row in rows}
+            for article_id in chunk:
+                yield self._article(found[article_id])
+
+    def _where(self, source, author, tag, since, until) -> tuple:
+        """ Условие WHERE и его параметры для отбора статей. """
+
+        conditions = []
+        params = []
+
+        if source is not None:
+            conditions.append('(source = ? OR site = ?)')
+            params += [source, source]
+        if author is not None:
+            conditions.append('author = ?')
+            params.append(author)
+        if tag is not None:
+            conditions.append('id IN (SELECT article FROM tags WHERE tag = ?)')
+            params.append(tag.casefold())
+        if since is not None:
+            conditions.append('published_ts >= ?')
+            params.append(timestamp(since))
+        if until is not None:
+            conditions.append('published_ts <= ?')
+            params.append(timestamp(until))
+
+        return (f'WHERE {" AND ".join(conditions)}' if conditions else ''), params
+
+    def _index_tags(self):
+        """ Заполняет таблицу тегов для статей базы, созданной до её появления. """
+
+        with self._lock, self._db:
+            rows = self._db.execute('SELECT id, extra FROM articles WHERE extra IS NOT NULL').fetchall()
+            for article_id, extra in rows:
+                tags = {tag.casefold() for tag in json.loads(extra).get('tags') or () if tag}
+                self._db.executemany('INSERT INTO tags VALUES (?, ?)',
+                    [(article_id, tag) for tag in tags])
+
+        log.info('В базе %s проиндексированы теги статей', self.path)
+
+    def close(self):
+        """ Закрывает базу. """
+
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _row(art) -> tuple:
+        extra = {key: value for key, value in art.info.items() if key not in BASE_KEYS}
+        return (
+            normalize_url(art.link), art.link, article_site(art), art.source_name,
+            art.published.isoformat(), timestamp(art.published), art.author, art.headline,
+            art.full_text, json.dumps(art.links, ensure_ascii=False),
+            json.dumps(extra, ensure_ascii=False) if extra else None
+        )
+
+    @staticmethod
+    def _article(row) -> Article:
+        link, source, published, author, headline, text, links, extra = row
+        return Article(source, datetime.fromisoformat(published), author, headline, link,
+            text, json.loads(links), json.loads(extra) if extra else None)
+
+    def _query(self, sql: str, params=()):
+        """ Выполняет запрос и лениво отдаёт статьи порциями по FETCH_SIZE строк. """
+
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            rows = cursor.fetchmany(self.FETCH_SIZE)
+
+        while rows:
+            for row in rows:
+                yield self._article(row)
+            with self._lock:
+                rows = cursor.fetchmany(self.FETCH_SIZE)
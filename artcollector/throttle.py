@@ -0,0 +1,236 @@
+""" Модуль throttle.
+    Описание: Управление запросами к сайтам.
+        Для каждого сайта ведётся своё ограничение частоты запросов (token bucket),
+        которое снижается при ответах 429 и постепенно восстанавливается при успешных,
+        считаются неудачи, определяется пауза перед повтором (экспоненциальная с разбросом,
+        с учётом Retry-After), а сайт, который раз за разом не отвечает, временно отключается
+        (circuit breaker): запросы к нему ждут, пока пробный запрос не покажет, что сайт
+        снова отвечает. Остальные сайты при этом загружаются как обычно.
+
+"""
+
+import random
+from collections import deque
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+from threading import Condition, Lock
+from time import monotonic, sleep, time
+
+import artcollector.aclogger
+
+log = getLogger(__name__)
+
+
+class TokenBucket:
+    """ Ограничение частоты запросов: rate запросов в секунду, не больше burst подряд.
+    rate=None - без ограничения. """
+
+    def __init__(self, rate: float | None, burst: int=1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = monotonic()
+        self._lock = Lock()
+
+    def reserve(self) -> float:
+        """ Забирает жетон и возвращает время в секундах, которое нужно подождать до запроса.
+        Жетоны выдаются в долг, поэтому одновременные запросы выстраиваются в очередь. """
+
+        with self._lock:
+            if self.rate is None:
+                return 0
+
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class _HostState:
+    """ Состояние одного сайта. """
+
+    def __init__(self, rate: float | None, burst: int) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.failures = 0
+        self.paused_until = 0
+        self.open_until = 0
+        # До какого времени ждать результата пробного запроса к сайту после его отключения.
+        self.probe_until = 0
+        # Время последних запросов: по нему оценивается фактическая частота запросов.
+        self.recent = deque(maxlen=10)
+        self.lock = Lock()
+        self.ready = Condition(self.lock)
+
+
+class HostThrottle:
+    """ Управляет запросами к сайтам.
+
+    rate: наибольшая частота запросов к одному сайту в секунду (None - не ограничена,
+        пока сайт не ответит 429).
+    burst: сколько запросов к сайту можно отправить подряд без пауз.
+    min_rate: нижняя граница частоты запросов при её снижении.
+    retries: сколько раз повторять запрос после неудачи (429, 5xx, таймаут, обрыв соединения).
+    backoff: пауза перед первым повтором в секундах; перед каждым следующим она удваивается.
+    max_delay: наибольшая пауза перед повтором. Если сервер просит подождать дольше (Retry-After),
+        пауза сокращается до max_delay.
+    failures: число неудач подряд, после которого сайт отключается.
+    cooldown: на сколько секунд отключается сайт. Запросы к нему в это время ждут, затем
+        к сайту отправляется один пробный запрос: после успешного запросы возобновляются,
+        после неудачного сайт снова отключается. Результата пробного запроса ждут
+        не дольше cooldown.
+
+    """
+
+    # На сколько запросов в секунду повышается частота после каждого успешного запроса.
+    INCREASE = 0.05
+
+    def __init__(self, rate: float | None=None, burst: int=1, min_rate: float=0.1, retries: int=3,
+                 backoff: float=1.0, max_delay: float=60, failures: int=5, cooldown: float=60) -> None:
+
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.failures = failures
+        self.cooldown = cooldown
+
+        self._hosts = {}
+        self._lock = Lock()
+
+    def host(self, host: str) -> _HostState:
+        """ Возвращает состояние сайта, создавая его при первом обращении. """
+
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(self.rate, self.burst)
+            return state
+
+    def rate_of(self, host: str) -> float | None:
+        """ Текущая частота запросов к сайту (None - не ограничена). """
+
+        return self.host(host).bucket.rate
+
+    def wait(self, host: str):
+        """ Ждёт, пока к сайту можно будет отправить запрос.
+        Пока сайт отключён или к нему идёт пробный запрос, ждёт их окончания. """
+
+        state = self.host(host)
+
+        with state.ready:
+            while True:
+                now = monotonic()
+                until = max(state.open_until, state.probe_until)
+                if until <= now:
+                    break
+                state.ready.wait(until - now)
+
+            if state.open_until:
+                # Отключение закончилось: этот запрос пробный, остальные ждут его результата.
+                state.open_until = 0
+                state.probe_until = now + self.cooldown
+
+            pause = max(state.paused_until - now, 0)
+
+        pause += state.bucket.reserve()
+        if pause:
+            sleep(pause)
+
+        with state.lock:
+            state.recent.append(monotonic())
+
+    def success(self, host: str):
+        """ Учитывает успешный запрос: сбрасывает счётчик неудач и понемногу повышает частоту. """
+
+        state = self.host(host)
+        with state.lock:
+            state.failures = 0
+            if state.probe_until:
+                state.probe_until = 0
+                state.ready.notify_all()
+                log.info('Сайт %s снова отвечает, запросы к нему возобновлены', host)
+            bucket = state.bucket
+            if bucket.rate is not None and (self.rate is None or bucket.rate < self.rate):
+                bucket.rate += self.INCREASE
+
+    def failure(self, host: str, attempt: int, retry_after: float | None=None,
+                throttled: bool=False) -> float | None:
+        """ Учитывает неудачный запрос.
+
+        attempt: номер попытки, начиная с 0.
+        retry_after: пауза, о которой попросил сервер (заголовок Retry-After), в секундах.
+        throttled: сервер ответил 429 (слишком много запросов) - частота запросов снижается вдвое.
+
+        Возвращает паузу в секундах перед повтором или None, если повторять не нужно.
+
+        """
+
+        state = self.host(host)
+        now = monotonic()
+
+        with state.lock:
+            state.failures += 1
+
+            if throttled:
+                self._slow_down(host, state)
+
+            if retry_after is not None:
+                if retry_after > self.max_delay:
+                    log.info('Сайт %s просит подождать %.0f с, пауза сокращена до %.0f с',
+                        host, retry_after, self.max_delay)
+                    retry_after = self.max_delay
+                state.paused_until = max(state.paused_until, now + retry_after)
+
+            # Отключаем сайт, если он ещё не отключён: неудачи запросов, отправленных
+            # до отключения, его не продлевают. Неудачный пробный запрос отключает сайт снова.
+            if state.failures >= self.failures and state.open_until <= now:
+                state.open_until = now + self.cooldown
+                state.probe_until = 0
+                state.ready.notify_all()
+                log.warning('Сайт %s отключён на %.0f с после %s неудач подряд',
+                    host, self.cooldown, state.failures)
+
+        if attempt >= self.retries:
+            return
+
+        # Экспоненциальная пауза с разбросом, чтобы повторы из разных потоков не совпадали.
+        delay = min(self.backoff * 2 ** attempt, self.max_delay)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+
+        return max(delay, retry_after or 0)
+
+    def _slow_down(self, host: str, state: _HostState):
+        bucket = state.bucket
+
+        if bucket.rate is None:
+            # Частота не была ограничена: отталкиваемся от фактической частоты последних запросов.
+            recent = state.recent
+            span = recent[-1] - recent[0] if len(recent) > 2 else 0
+            current = (len(recent) - 1) / span if span else 1.0
+        else:
+            current = bucket.rate
+
+        bucket.rate = max(current / 2, self.min_rate)
+        log.info('Сайт %s ответил 429, частота запросов снижена до %.2f в секунду', host, bucket.rate)
+
+
+def retry_after(response) -> float | None:
+    """ Возвращает паузу из заголовка Retry-After ответа в секундах или None. """
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+    except (TypeError, ValueError):
+        return
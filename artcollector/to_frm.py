@@ -5,12 +5,118 @@
 
 """
 
+import csv
+import json
+from io import StringIO
 from logging import getLogger
+from pathlib import Path
 
 import artcollector.aclogger
+from artcollector.article import BASE_KEYS
 
 log = getLogger(__name__)
 
+# Реестр потоковых выгрузок: формат -> функция (коллекция, текстовый поток) -> число записанных символов.
+EXPORTERS = {}
+
+# Сжатие выгрузки в файл: имя -> расширение файла.
+COMPRESSIONS = {
+    'gzip': '.gz',
+    'bz2': '.bz2',
+    'xz': '.xz',
+    'zstd': '.zst'
+}
+
+
+def exporter(frm: str):
+    """ Декоратор, регистрирующий функцию потоковой выгрузки в формате frm.
+    Функция получает коллекцию (или любой итератор статей) и открытый текстовый поток,
+    возвращает количество записанных символов. """
+
+    def register(func):
+        EXPORTERS[frm] = func
+        return func
+
+    return register
+
+
+def export(collection, frm: str='txt', stream=None, path: str | Path | None=None,
+           compress: str | None=None, append: bool=False):
+    """ Выгружает коллекцию в указанном формате.
+
+    collection: коллекция статей. Для форматов jsonl и csv подойдёт любой итератор статей,
+        например, результат ArticleCollection.find.
+    frm: формат выгрузки, ключ EXPORTERS.
+    stream: открытый текстовый поток для записи.
+    path: путь к файлу для записи (если не указан stream).
+    compress: сжатие файла, ключ COMPRESSIONS. Если не указано, определяется по расширению path.
+    append: дописывать в конец существующего файла, а не перезаписывать его.
+
+    Возвращает: количество записанных символов или None при ошибке.
+    Если не указаны ни stream, ни path, возвращает выгрузку целиком
+    (для txt - кортеж из оглавления и полных текстов, как to_txt).
+
+    """
+
+    if frm not in EXPORTERS:
+        log.error('Неизвестный формат %s', frm)
+        return
+
+    if stream is not None:
+        return EXPORTERS[frm](collection, stream)
+
+    if path is not None:
+        # Заголовок CSV при дописывании в непустой файл не повторяется.
+        header = not (append and Path(path).exists() and Path(path).stat().st_size > 0)
+        file = open_export(path, compress, append)
+        if file is None:
+            return
+        with file:
+            if EXPORTERS[frm] is write_csv:
+                return write_csv(collection, file, header=header)
+            return EXPORTERS[frm](collection, file)
+
+    if frm == 'txt':
+        return to_txt(collection)
+
+    buffer = StringIO()
+    EXPORTERS[frm](collection, buffer)
+    return buffer.getvalue()
+
+
+def open_export(path: str | Path, compress: str | None=None, append: bool=False):
+    """ Открывает файл выгрузки на запись в текстовом режиме, при необходимости со сжатием.
+    Возвращает текстовый поток или None, если сжатие не поддерживается. """
+
+    path = Path(path)
+    mode = 'at' if append else 'wt'
+
+    if compress is None:
+        compress = next((name for name, suffix in COMPRESSIONS.items() if path.suffix == suffix), None)
+
+    match compress:
+        case None:
+            return open(path, mode, encoding='utf-8', newline='')
+        case 'gzip':
+            import gzip
+            return gzip.open(path, mode, encoding='utf-8', newline='')
+        case 'bz2':
+            import bz2
+            return bz2.open(path, mode, encoding='utf-8', newline='')
+        case 'xz':
+            import lzma
+            return lzma.open(path, mode, encoding='utf-8', newline='')
+        case 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                log.error('Для сжатия zstd требуется модуль zstandard')
+                return
+            return zstandard.open(path, mode, encoding='utf-8', newline='')
+        case _:
+            log.error('Неизвестное сжатие %s', compress)
+            return
+
 
 def to_txt(collection):
     """ Конвертирует коллекцию статей в текстовый формат.
@@ -25,21 +131,133 @@ def to_txt(collection):
         log.info('Пустая коллекция %s', collection.collection_name)
         return ('', '')
 
-    new_line = '\n'
-    toc = 'Содержание\n'
-    body = 'Полные тексты\n'
+    toc = 'Содержание\n' + ''.join(_txt_header(art) for art in collection)
+    body = 'Полные тексты\n' + ''.join(_txt_entry(art) for art in collection)
+
+    return toc, body
+
+
+def iter_txt(collection):
+    """ Отдаёт выгрузку коллекции в текстовом формате по частям (по одной статье).
+
+    collection: Коллекция статей.
 
+    Склеенные части образуют полный документ: название коллекции, оглавление и полные тексты,
+    в том же виде, что и collection_name + '\n' * 2 + toc + '\n' + body из to_txt.
+    Дополнительная память не зависит от размера коллекции.
+
+    """
+
+    yield collection.collection_name + '\n' * 2
+
+    if len(collection) == 0:
+        log.info('Пустая коллекция %s', collection.collection_name)
+        yield '\n'
+        return
+
+    yield 'Содержание\n'
     for art in collection:
+        yield _txt_header(art)
 
-        header = (f"{art['source']}, {art['date']}, "
-            f"{f'{art.author}, ' if art.author else ''}{art.headline}{new_line}")
+    yield '\n' + 'Полные тексты\n'
+    for art in collection:
+        yield _txt_entry(art)
 
-        toc += header
 
-        body += (f"{new_line}###{new_line*2}{header}"
-            f"{'Теги: ' + ', '.join(art['tags']) + new_line if art.info.get('tags', False) else ''}"
-            f"{'Аннотация: ' + art['annotation'] + new_line if art.info.get('annotation', False) else ''}"
-            f"{art.link}{new_line}{art.full_text}{new_line}"
-            f"{f'Ссылки:{new_line}{new_line.join(art.links)}' if art.info.get('links', False) else ''}{new_line}")
+@exporter('txt')
+def write_txt(collection, stream) -> int:
+    """ Записывает коллекцию в текстовом формате в открытый текстовый поток.
 
-    return toc, body
+    collection: Коллекция статей.
+    stream: поток с методом write (файл, sys.stdout, io.StringIO и т. п.).
+
+    Возвращает: количество записанных символов.
+
+    """
+
+    written = 0
+    for chunk in iter_txt(collection):
+        written += stream.write(chunk) or 0
+    return written
+
+
+def article_record(art) -> dict:
+    """ Возвращает полную информацию о статье (info) для машиночитаемых выгрузок.
+    Дополнительно содержит дату публикации в формате ISO 8601 (published). """
+
+    record = dict(art.info)
+    record['published'] = art.published.isoformat()
+    return record
+
+
+@exporter('jsonl')
+def write_jsonl(collection, stream) -> int:
+    """ Записывает статьи в формате JSON Lines: по одному объекту JSON (article_record) на строку.
+
+    collection: Коллекция статей или любой итератор статей.
+    stream: открытый текстовый поток.
+
+    Возвращает: количество записанных символов.
+
+    """
+
+    written = 0
+    for art in collection:
+        written += stream.write(json.dumps(article_record(art), ensure_ascii=False) + '\n') or 0
+    return written
+
+
+# Столбцы выгрузки в CSV. Списки (ссылки, теги) записываются в ячейку в виде JSON,
+# прочие дополнительные данные сайта - в столбец extra.
+CSV_COLUMNS = BASE_KEYS + ('published', 'tags', 'annotation', 'extra')
+
+
+@exporter('csv')
+def write_csv(collection, stream, header: bool=True) -> int:
+    """ Записывает статьи в формате CSV, по одной статье на строку (столбцы CSV_COLUMNS).
+
+    collection: Коллекция статей или любой итератор статей.
+    stream: открытый текстовый поток (файл следует открывать с newline='').
+    header: записывать строку заголовков.
+
+    Возвращает: количество записанных символов.
+
+    """
+
+    writer = csv.writer(stream)
+    written = 0
+
+    if header:
+        written += writer.writerow(CSV_COLUMNS) or 0
+
+    for art in collection:
+        record = article_record(art)
+        extra = {key: record.pop(key) for key in list(record) if key not in CSV_COLUMNS}
+        record['extra'] = extra or None
+        written += writer.writerow(
+            json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+            for value in (record.get(column) for column in CSV_COLUMNS)) or 0
+
+    return written
+
+
+def _txt_header(art) -> str:
+    """ Заголовок статьи для оглавления и полного текста. """
+
+    new_line = '\n'
+
+    return (f"{art['source']}, {art['date']}, "
+        f"{f'{art.author}, ' if art.author else ''}{art.headline}{new_line}")
+
+
+def _txt_entry(art) -> str:
+    """ Статья целиком: заголовок, теги, аннотация, ссылка, текст и ссылки из текста. """
+
+    new_line = '\n'
+    header = _txt_header(art)
+
+    return (f"{new_line}###{new_line*2}{header}"
+        f"{'Теги: ' + ', '.join(art['tags']) + new_line if art.info.get('tags', False) else ''}"
+        f"{'Аннотация: ' + art['annotation'] + new_line if art.info.get('annotation', False) else ''}"
+        f"{art.link}{new_line}{art.full_text}{new_line}"
+        f"{f'Ссылки:{new_line}{new_line.join(art.links)}' if art.info.get('links', False) else ''}{new_line}")
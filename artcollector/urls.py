@@ -0,0 +1,55 @@
+""" Модуль urls.
+    Описание: Приведение ссылок к единому виду.
+        Нормализованная ссылка служит ключом при поиске статьи в коллекции и в кэше,
+        поэтому почти одинаковые ссылки на одну статью считаются одной ссылкой.
+
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Параметры запроса, которые добавляют рассылки и счётчики переходов.
+# На содержимое страницы они не влияют.
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'yclid', 'ysclid', 'mc_cid', 'mc_eid', '_openstat', 'from', 'ref', 'rss'
+})
+TRACKING_PREFIXES = ('utm_',)
+
+
+def normalize_url(url: str) -> str:
+    """ Приводит ссылку к единому виду:
+    * схема http заменяется на https, имя сайта приводится к нижнему регистру без www. и порта по умолчанию;
+    * удаляются якорь (#...), завершающая косая черта пути и параметры отслеживания (utm_* и т. п.);
+    * оставшиеся параметры запроса сортируются.
+    Возвращает нормализованную ссылку. Некорректная ссылка (например, с нечисловым портом
+    или незакрытой скобкой адреса IPv6) возвращается без изменений, кроме обрезки пробелов. """
+
+    url = url.strip()
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().removeprefix('www.')
+
+    if ':' in host:
+        # Адрес IPv6 записывается в ссылке в квадратных скобках.
+        host = f'[{host}]'
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host += f':{port}'
+
+    if scheme == 'http':
+        scheme = 'https'
+
+    path = parts.path.rstrip('/') or '/'
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ))
+
+    return urlunsplit((scheme, host, path, query, ''))
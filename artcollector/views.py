@@ -0,0 +1,137 @@
+""" Модуль views.
+    Описание: Представления коллекции статей.
+        Представление (ArticleView) - ленивый отбор, сортировка и срез статей коллекции:
+        операции только запоминаются и выполняются при обращении к статьям. Отбор по источнику,
+        автору, тегу и дате и сортировка по дате публикации идут по индексам хранилища
+        (см. модуль storage), а представление хранит только номера статей, не копируя их.
+        Представление можно передать в to_txt и другие выгрузки так же, как коллекцию.
+
+"""
+
+from datetime import datetime
+from operator import attrgetter
+
+from artcollector.to_frm import export
+
+# Условия отбора, которые выполняются по индексам хранилища.
+INDEXED = ('source', 'author', 'tag', 'since', 'until')
+
+
+class ArticleView:
+    """ Ленивое представление статей коллекции.
+    Создаётся методами коллекции view, filter и sort; методы filter и sort и срез
+    представления возвращают новое представление, исходное при этом не меняется:
+
+        collection.filter(source='tass.ru', since=week_ago).sort(reverse=True)[:10]
+
+    collection: коллекция статей (ArticleCollection).
+    collection_name: название для выгрузки (по умолчанию - название коллекции).
+
+    """
+
+    def __init__(self, collection, collection_name: str | None=None, _parent=None,
+                 _operation=None) -> None:
+
+        self._collection = collection
+        self.collection_name = collection_name or collection.collection_name
+        self._parent = _parent
+        self._operation = _operation
+        # Номера статей вместе с размером хранилища, для которого они вычислены.
+        self._cache = None
+
+    def __iter__(self):
+        return self._storage.by_ids(self._ids())
+
+    def __len__(self):
+        return len(self._ids())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._derive(('slice', index))
+        return next(self._storage.by_ids([self._ids()[index]]))
+
+    def __repr__(self) -> str:
+        return f'ArticleView({self.collection_name!r}, {len(self)} статей)'
+
+    @property
+    def _storage(self):
+        return self._collection.storage
+
+    def filter(self, where=None, source: str | None=None, author: str | None=None,
+               tag: str | None=None, since: datetime | None=None, until: datetime | None=None):
+        """ Возвращает представление со статьями, подходящими под все условия.
+        where: функция, получающая статью и возвращающая истину для подходящих;
+        source: полное имя источника или сайт (например, 'tass.ru');
+        author: автор;
+        tag: тег (без учёта регистра);
+        since, until: границы даты публикации (включительно).
+        Все условия, кроме where, проверяются по индексам хранилища. """
+
+        conditions = {key: value for key, value in
+                      zip(INDEXED, (source, author, tag, since, until)) if value is not None}
+
+        view = self._derive(('filter', conditions)) if conditions else self
+        return view._derive(('where', where)) if where is not None else view
+
+    def sort(self, key='published', reverse: bool=False):
+        """ Возвращает представление, упорядоченное по key.
+        key: 'published' - по дате публикации (по индексу хранилища), имя другого свойства
+            статьи (например, 'headline') или функция, получающая статью.
+            Статьи без значения свойства (None) идут последними.
+        reverse: обратный порядок. """
+
+        return self._derive(('sort', key, reverse))
+
+    def to(self, frm: str='txt', stream=None, path: str | None=None, compress: str | None=None,
+           append: bool=False):
+        """ Выгружает статьи представления (см. ArticleCollection.to). """
+
+        return export(self, frm, stream=stream, path=path, compress=compress, append=append)
+
+    def _derive(self, operation: tuple):
+        return ArticleView(self._collection, self.collection_name, self, operation)
+
+    def _ids(self) -> list:
+        """ Номера статей представления. Пересчитываются, только если хранилище пополнилось. """
+
+        size = len(self._storage)
+        if self._cache is None or self._cache[0] != size:
+            self._cache = (size, self._evaluate())
+        return self._cache[1]
+
+    def _evaluate(self) -> list:
+        storage = self._storage
+
+        if self._parent is None:
+            return storage.ids()
+
+        parent = self._parent._ids()
+
+        match self._operation:
+            case ('filter', conditions):
+                # Отбор по индексу с сохранением порядка исходного представления.
+                if self._parent._parent is None:
+                    return storage.ids(**conditions)
+                allowed = set(storage.ids(**conditions))
+                return [i for i in parent if i in allowed]
+
+            case ('where', where):
+                return [i for i, art in zip(parent, storage.by_ids(parent)) if where(art)]
+
+            case ('sort', 'published', reverse):
+                ids = storage.ids(order='published', reverse=reverse)
+                if self._parent._parent is None:
+                    return ids
+                allowed = set(parent)
+                return [i for i in ids if i in allowed]
+
+            case ('sort', key, reverse):
+                get = attrgetter(key) if isinstance(key, str) else key
+                values = [get(art) for art in storage.by_ids(parent)]
+                present = sorted((i for i, value in enumerate(values) if value is not None),
+                                 key=values.__getitem__, reverse=reverse)
+                missing = [i for i, value in enumerate(values) if value is None]
+                return [parent[i] for i in present + missing]
+
+            case ('slice', window):
+                return parent[window]
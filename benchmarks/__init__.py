@@ -0,0 +1 @@
+""" Замеры производительности сборщика статей на сохранённых страницах, без обращения к сети. """
@@ -0,0 +1,218 @@
+""" Замер скорости извлечения статей на сохранённых страницах (benchmarks/fixtures), без обращения к сети.
+    Для каждого сайта выводит время разбора страницы, время каждого шага извлечения,
+    количество страниц в секунду и пиковую память на одну страницу,
+    а затем сравнивает результат с сохранённой базой (benchmarks/baseline.json).
+
+    Скорость сравнивается не в страницах в секунду, а относительно эталонной работы
+    (разбора одной и той же страницы, не зависящего от кода пакета): каждая серия извлечений
+    замеряется вместе с эталонной работой непосредственно до и после неё, в том же процессе.
+    Поэтому база, записанная на одной машине, пригодна для сравнения и на другой,
+    а колебания нагрузки во время замера почти не влияют на результат.
+    Извлечённые данные и сохранённые страницы сравниваются с базой по контрольным суммам.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.bench_extract [--repeat N] [--parser lxml] [--save] [--tolerance 0.2]
+
+    Код возврата 1 означает замедление больше допустимого, изменение извлечённых данных
+    или изменение сохранённых страниц после записи базы.
+
+"""
+
+import hashlib
+import json
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+from bs4 import BeautifulSoup
+
+from artcollector.rules import ExtractionError
+from artcollector.sites import DEFAULT_PARSER
+from benchmarks.common import load_fixtures
+
+BASELINE = Path(__file__).parent / 'baseline.json'
+
+# Замер каждой страницы повторяется ROUNDS раз, скорость - медиана повторов.
+ROUNDS = 5
+
+# Эталонная страница для замера скорости машины и число её разборов в одном замере.
+CALIBRATION_PAGE = '<html><body>' + ''.join(
+    f'<div class="c{i % 7}"><p>Абзац {i} <a href="/l/{i}">ссылка</a> <b>текст</b></p></div>'
+    for i in range(300)
+) + '</body></html>'
+CALIBRATION_REPEAT = 3
+
+
+def calibrate() -> float:
+    """ Скорость машины: разборов эталонной страницы в секунду. """
+
+    start = perf_counter()
+    for _ in range(CALIBRATION_REPEAT):
+        BeautifulSoup(CALIBRATION_PAGE, 'html.parser').get_text()
+    return CALIBRATION_REPEAT / (perf_counter() - start)
+
+
+def run_once(site_class, link: str, raw_data: bytes, parser: str, timings: dict):
+    """ Извлекает статью из страницы, прибавляя время каждого этапа к timings. """
+
+    art = site_class.__new__(site_class)
+    art._link = link
+
+    start = perf_counter()
+    art._parse(raw_data, parser)
+    timings['parse'] = timings.get('parse', 0) + perf_counter() - start
+
+    art._init_fields()
+    for step in art.STEPS:
+        start = perf_counter()
+        getattr(art, step)()
+        timings[step] = timings.get(step, 0) + perf_counter() - start
+
+    art._release()
+    return art
+
+
+def fingerprint(art) -> str:
+    """ Контрольная сумма извлечённых данных, чтобы замечать изменения результата. """
+
+    info = dict(art.info, published=art.published.isoformat())
+    return hashlib.sha1(json.dumps(info, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+def peak_memory(site_class, link: str, raw_data: bytes, parser: str) -> int:
+    """ Пиковая память в байтах при извлечении одной статьи. """
+
+    tracemalloc.start()
+    run_once(site_class, link, raw_data, parser, {})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def measure(repeat: int, parser: str) -> dict:
+    """ Выполняет замеры по всем сохранённым страницам. """
+
+    results = {}
+    machine = []
+
+    for name, (link, site_class, raw_data) in load_fixtures().items():
+        fixture = hashlib.sha1(raw_data).hexdigest()
+        timings = {}
+        rates = []
+        relative = []
+        try:
+            art = run_once(site_class, link, raw_data, parser, {})
+            for _ in range(ROUNDS):
+                before = calibrate()
+                start = perf_counter()
+                for _ in range(repeat):
+                    run_once(site_class, link, raw_data, parser, timings)
+                rate = repeat / (perf_counter() - start)
+                speed = (before + calibrate()) / 2
+                rates.append(rate)
+                relative.append(rate / speed)
+                machine.append(speed)
+        except ExtractionError as error:
+            results[name] = {'fixture': fixture, 'error': str(error)}
+            continue
+
+        results[name] = {
+            'fixture': fixture,
+            'pages_per_sec': median(rates),
+            'relative': median(relative),
+            'ms': {stage: seconds / repeat / ROUNDS * 1000 for stage, seconds in timings.items()},
+            'peak_kb': peak_memory(site_class, link, raw_data, parser) / 1024,
+            'fingerprint': fingerprint(art)
+        }
+
+    return {'calibration': median(machine) if machine else None, 'sites': results}
+
+
+def report(results: dict):
+    results = results['sites']
+    stages = ('parse',) + next((tuple(r['ms'])[1:] for r in results.values() if 'ms' in r), ())
+
+    print(f'{"сайт":<15}{"стр/с":>9}{"пик, КБ":>10}' + ''.join(f'{s.strip("_"):>13}' for s in stages))
+    for name, result in results.items():
+        if 'error' in result:
+            print(f'{name:<15}ошибка извлечения: {result["error"]}')
+            continue
+        print(f'{name:<15}{result["pages_per_sec"]:>9.1f}{result["peak_kb"]:>10.0f}'
+              + ''.join(f'{result["ms"].get(s, 0):>11.2f}мс' for s in stages))
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """ Сравнивает замеры с базой. Возвращает False, если есть ухудшения.
+    Скорость сравнивается относительно эталонной работы (см. calibrate). """
+
+    ok = True
+
+    for name, result in results['sites'].items():
+        base = baseline['sites'].get(name)
+        if not base:
+            continue
+        if base.get('fixture') != result.get('fixture'):
+            print(f'{name}: сохранённая страница изменилась, нужна новая база (--save)')
+            ok = False
+            continue
+        if 'error' in base:
+            continue
+        if 'error' in result:
+            print(f'{name}: извлечение перестало работать ({result["error"]})')
+            ok = False
+            continue
+
+        ratio = result['relative'] / base['relative']
+        if ratio < 1 - tolerance:
+            print(f'{name}: замедление {1 / ratio:.2f}x относительно эталонной работы '
+                  f'({base["pages_per_sec"]:.1f} -> {result["pages_per_sec"]:.1f} стр/с, '
+                  f'скорость машины {results["calibration"] / baseline["calibration"]:.2f} от базы)')
+            ok = False
+        if result['fingerprint'] != base['fingerprint']:
+            print(f'{name}: извлечённые данные изменились')
+            ok = False
+
+    return ok
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=20, help='повторов на каждую страницу')
+    parser.add_argument('--parser', default=DEFAULT_PARSER, help='разборщик HTML для BeautifulSoup')
+    parser.add_argument('--save', action='store_true', help='сохранить результат как новую базу')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='допустимое замедление относительно базы (доля)')
+    args = parser.parse_args()
+
+    print(f'Разборщик: {args.parser}')
+    results = measure(args.repeat, args.parser)
+    report(results)
+
+    baseline_key = args.parser
+
+    if args.save:
+        baseline = json.loads(BASELINE.read_text(encoding='utf-8')) if BASELINE.exists() else {}
+        baseline[baseline_key] = results
+        BASELINE.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        print(f'База сохранена в {BASELINE}')
+        return
+
+    if not BASELINE.exists():
+        print('База не найдена, сравнение пропущено (запустите с --save)')
+        return
+
+    baseline = json.loads(BASELINE.read_text(encoding='utf-8')).get(baseline_key)
+    if not baseline or 'calibration' not in baseline:
+        print(f'База для разборщика {args.parser} не найдена или устарела, сравнение пропущено '
+              '(запустите с --save)')
+        return
+    if not compare(results, baseline, args.tolerance):
+        sys.exit(1)
+    print('Ухудшений относительно базы нет')
+
+
+if __name__ == '__main__':
+    main()
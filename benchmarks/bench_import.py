@@ -0,0 +1,148 @@
+""" Замер времени импорта пакета artcollector и основных классов (ExtArt, ArticleCollection).
+    Каждый импорт выполняется и замеряется в отдельном интерпретаторе.
+    Дополнительно проверяется, что импорт пакета не загружает requests и bs4,
+    импорт классов не загружает кэш, архив и sqlite3, а ни импорт, ни создание
+    ExtArt и ArticleCollection не создают каталог журналов.
+
+    Время импорта классов почти целиком уходит на requests и bs4, без которых они не работают,
+    и сильно колеблется вместе с ними. Поэтому с целевым временем классов сравнивается
+    только время загрузки модулей самого пакета (по python -X importtime).
+
+    Запуск из корня репозитория:
+        python -m benchmarks.bench_import [--repeat N] [--target 5] [--entry-target 40]
+
+    Код возврата 1 означает, что импорт дольше целевого времени или имеет побочные эффекты.
+
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from os import environ
+from pathlib import Path
+from statistics import median
+
+import artcollector
+
+ROOT = Path(__file__).parent.parent
+
+# Что импортируется в каждом замере.
+IMPORTS = {
+    'artcollector': 'import artcollector',
+    'ArticleCollection': 'from artcollector import ArticleCollection',
+    'ExtArt': 'from artcollector import ExtArt'
+}
+
+# Модули, которые не должны загружаться при импорте пакета.
+HEAVY = ('requests', 'bs4', 'sqlite3', 'multiprocessing')
+
+# Модули, которые не должны загружаться при импорте ExtArt и ArticleCollection:
+# они нужны только кэшу, архиву и хранилищу SQLite.
+DEFERRED = ('sqlite3', 'artcollector.archive', 'artcollector.http_cache', 'multiprocessing')
+
+# Целевое время импорта пакета в миллисекундах.
+TARGET_MS = 5
+# Целевое время загрузки модулей пакета при импорте ExtArt или ArticleCollection, мс.
+ENTRY_TARGET_MS = 40
+
+
+def run(code: str, cwd: str) -> float:
+    """ Время выполнения code в новом интерпретаторе, в миллисекундах. """
+
+    env = dict(environ, PYTHONPATH=str(ROOT))
+    timed = f'from time import perf_counter; t = perf_counter(); {code}; print(perf_counter() - t)'
+    result = subprocess.run([sys.executable, '-c', timed], cwd=cwd, env=env, check=True,
+        capture_output=True, text=True)
+    return float(result.stdout) * 1000
+
+
+def own_time(name: str, cwd: str) -> float:
+    """ Время загрузки модулей пакета при импорте name, в миллисекундах (по python -X importtime).
+    Модуль, в котором определено имя, импортируется явно: python -X importtime не замеряет модули,
+    загруженные через importlib, а пакет загружает их так при первом обращении к имени. """
+
+    module = 'artcollector' if name == 'artcollector' else f'artcollector.{artcollector._LAZY[name]}'
+    env = dict(environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=env, check=True, capture_output=True, text=True)
+
+    total = 0
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip().startswith('artcollector'):
+            total += int(fields[0].rpartition(':')[2])
+    return total / 1000
+
+
+def loaded(code: str, modules: tuple, cwd: str) -> list:
+    """ Какие из модулей modules загружены после выполнения code. """
+
+    env = dict(environ, PYTHONPATH=str(ROOT))
+    check = f'{code}; import sys; print(*[m for m in {modules!r} if m in sys.modules])'
+    return subprocess.run([sys.executable, '-c', check], cwd=cwd, env=env, check=True,
+        capture_output=True, text=True).stdout.split()
+
+
+def side_effects(cwd: str) -> list:
+    """ Возвращает список побочных эффектов импорта пакета и создания основных классов. """
+
+    effects = [f'импорт пакета загружает {module}'
+               for module in loaded('import artcollector', HEAVY, cwd)]
+    for name in ('ExtArt', 'ArticleCollection'):
+        effects += [f'импорт {name} загружает {module}'
+                    for module in loaded(IMPORTS[name], DEFERRED, cwd)]
+
+    logs = Path(cwd) / 'logs'
+    for name, code in IMPORTS.items():
+        if name != 'artcollector':
+            code = f'{code}; {name}()'
+        loaded(code, (), cwd)
+        if logs.exists():
+            effects.append(f'{code} создаёт каталог logs')
+            shutil.rmtree(logs)
+    return effects
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=10, help='повторов каждого замера')
+    parser.add_argument('--target', type=float, default=TARGET_MS,
+                        help='целевое время импорта пакета, мс')
+    parser.add_argument('--entry-target', type=float, default=ENTRY_TARGET_MS,
+                        help='целевое время загрузки модулей пакета при импорте ExtArt '
+                             'или ArticleCollection, мс')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        times = {}
+        own = {}
+        print(f'{"импорт":<20}{"всего":>10}{"пакет":>10}')
+        for name, code in IMPORTS.items():
+            times[name] = median(run(code, cwd) for _ in range(args.repeat))
+            own[name] = median(own_time(name, cwd) for _ in range(args.repeat))
+            print(f'{name:<20}{times[name]:>7.1f} мс{own[name]:>7.1f} мс')
+
+        effects = side_effects(cwd)
+
+    ok = True
+    if times['artcollector'] > args.target:
+        print(f'Импорт пакета дольше целевых {args.target:.0f} мс')
+        ok = False
+    for name in ('ExtArt', 'ArticleCollection'):
+        if own[name] > args.entry_target:
+            print(f'Модули пакета при импорте {name} загружаются дольше целевых '
+                  f'{args.entry_target:.0f} мс')
+            ok = False
+    for effect in effects:
+        print(f'Побочный эффект: {effect}')
+        ok = False
+
+    if not ok:
+        sys.exit(1)
+    print('Импорт укладывается в цель и не имеет побочных эффектов')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+""" Замер памяти, занимаемой коллекцией статей.
+    Сравнивает объекты классов сайтов, хранящие деревья страниц (как было до появления Article),
+    с компактными записями Article.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.bench_memory [--count N]
+
+"""
+
+import gc
+import tracemalloc
+from argparse import ArgumentParser
+
+from artcollector.rules import ExtractionError
+from benchmarks.common import load_fixtures
+
+
+def retained(build, count: int) -> int:
+    """ Возвращает объём памяти в байтах, удерживаемый count объектами, созданными build. """
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+
+    kept = [build() for _ in range(count)]
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - start
+
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--count', type=int, default=50, help='статей каждого сайта')
+    args = parser.parse_args()
+
+    print(f'{"сайт":<15}{"с деревьями, КБ":>18}{"Article, КБ":>14}{"выигрыш":>10}')
+
+    for name, (link, site_class, raw_data) in load_fixtures().items():
+
+        # Класс сайта, не освобождающий деревья после извлечения.
+        keep_trees = type(site_class.__name__, (site_class,), {'_release': lambda self: None})
+
+        try:
+            full = retained(lambda: keep_trees(link, raw_data=raw_data), args.count)
+            compact = retained(lambda: site_class(link, raw_data=raw_data).to_article(), args.count)
+        except ExtractionError as error:
+            print(f'{name:<15}ошибка извлечения: {error}')
+            continue
+
+        print(f'{name:<15}{full / 1024 / args.count:>18.1f}{compact / 1024 / args.count:>14.1f}'
+              f'{full / compact:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
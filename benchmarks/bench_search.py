@@ -0,0 +1,98 @@
+""" Замер скорости полнотекстового поиска (SearchIndex) на синтетической коллекции.
+    Слова статей выбираются по закону Ципфа: самые частые из них - служебные слова,
+    за ними следуют слова, встречающиеся в большей части статей, и длинный хвост редких слов.
+    Для каждого запроса выводится медиана времени поиска.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.bench_search [--count 100000] [--repeat N] [--target 20]
+
+    Код возврата 1 означает, что медиана какого-либо запроса дольше целевого времени.
+
+"""
+
+import random
+import sys
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from statistics import median
+from time import perf_counter
+
+from artcollector.article import Article
+from artcollector.search import SearchIndex
+
+# Служебные слова, с которых начинается словарь.
+FUNCTION_WORDS = ('и', 'в', 'не', 'на', 'что', 'с', 'по', 'как', 'это', 'а', 'к', 'из', 'о',
+                  'за', 'для', 'от', 'но', 'же', 'так', 'у')
+
+VOCABULARY = 50_000
+TEXT_WORDS = 120
+SOURCES = ('habr.com', 'tass.ru', 'inosmi.ru', 'naked-science.ru')
+TAGS = tuple(f'тег{i}' for i in range(200))
+
+# Целевое время запроса в миллисекундах.
+TARGET_MS = 20
+
+
+def make_articles(count: int, seed: int=1):
+    """ Создаёт count синтетических статей. """
+
+    rnd = random.Random(seed)
+    words = FUNCTION_WORDS + tuple(f'слово{i}' for i in range(VOCABULARY - len(FUNCTION_WORDS)))
+    weights = list(accumulate(1 / rank for rank in range(1, VOCABULARY + 1)))
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    for i in range(count):
+        text = rnd.choices(words, cum_weights=weights, k=TEXT_WORDS)
+        site = SOURCES[i % len(SOURCES)]
+        yield Article(
+            site, start + timedelta(minutes=i), None, ' '.join(text[:8]), f'https://{site}/{i}',
+            ' '.join(text[8:]), [], {'tags': rnd.sample(TAGS, 3)})
+
+
+def queries() -> dict:
+    """ Имя замера -> параметры поиска. """
+
+    return {
+        'редкое слово': {'query': 'слово30000'},
+        'частое слово': {'query': 'слово0'},
+        'три частых слова': {'query': 'слово0 слово1 слово2'},
+        'частое и редкое': {'query': 'слово0 слово5000'},
+        'три частых + тег': {'query': 'слово0 слово1 слово2', 'tag': 'тег7'},
+        'три частых + сайт': {'query': 'слово0 слово1 слово2', 'source': 'tass.ru'},
+        'со служебными': {'query': 'и в на слово3'},
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--count', type=int, default=100_000, help='статей в коллекции')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов каждого запроса')
+    parser.add_argument('--target', type=float, default=TARGET_MS, help='целевое время запроса, мс')
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    started = perf_counter()
+    for art in make_articles(args.count):
+        index.add(art)
+    print(f'Индекс из {len(index)} статей построен за {perf_counter() - started:.1f} с')
+
+    slow = []
+    for name, params in queries().items():
+        times = []
+        for _ in range(args.repeat):
+            started = perf_counter()
+            found = index.search(**params)
+            times.append((perf_counter() - started) * 1000)
+        print(f'{name:<20}{median(times):>8.2f} мс{len(found):>5} найдено')
+        if median(times) > args.target:
+            slow.append(name)
+
+    if slow:
+        print(f'Дольше целевых {args.target:.0f} мс: {", ".join(slow)}')
+        sys.exit(1)
+    print(f'Все запросы укладываются в {args.target:.0f} мс')
+
+
+if __name__ == '__main__':
+    main()
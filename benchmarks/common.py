@@ -0,0 +1,26 @@
+""" Общие данные замеров: сохранённые страницы поддерживаемых сайтов. """
+
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+# Имя страницы -> (ссылка, с которой она условно загружена, имя класса сайта).
+FIXTURES = {
+    'habr': ('https://habr.com/ru/post/710654/', 'ExtractHabrArticle'),
+    'naked_science': ('https://naked-science.ru/article/astronomy/active-venus',
+                      'ExtractNakedscienceArticle'),
+    'tass': ('https://tass.ru/politika/16814463', 'ExtractTassArticle'),
+    'inosmi': ('https://inosmi.ru/20230121/krym-259919930.html', 'ExtractInoSMIArticle'),
+}
+
+
+def load_fixtures() -> dict:
+    """ Возвращает словарь: имя страницы -> (ссылка, класс сайта, HTML-код в байтах). """
+
+    import artcollector.sites
+
+    return {
+        name: (link, getattr(artcollector.sites, class_name),
+               (FIXTURES_DIR / f'{name}.html').read_bytes())
+        for name, (link, class_name) in FIXTURES.items()
+    }
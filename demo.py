@@ -9,7 +9,5 @@ if __name__ == '__main__':
 
     ac.load_from_urls('demo_urls.txt')
 
-    toc, body = ac.to('txt')
-
     with open('example.txt', 'w', encoding='utf-8', newline='') as result:
-        result.write(ac.collection_name + '\n' * 2 + toc + '\n' + body)
+        ac.to('txt', stream=result)
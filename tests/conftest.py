@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+from requests.exceptions import HTTPError
+
+import artcollector.aclogger
+
+# Сохранённые страницы поддерживаемых сайтов (общие с замерами в benchmarks).
+FIXTURES_DIR = Path(__file__).parent.parent / 'benchmarks' / 'fixtures'
+
+# Имя страницы -> ссылка, с которой она условно загружена.
+PAGES = {
+    'habr': 'https://habr.com/ru/post/710654/',
+    'naked_science': 'https://naked-science.ru/article/astronomy/active-venus',
+    'tass': 'https://tass.ru/politika/16814463',
+    'inosmi': 'https://inosmi.ru/20230121/krym-259919930.html',
+}
+
+
+@pytest.fixture(autouse=True)
+def no_log_files(monkeypatch):
+    """ Тесты не создают каталог журналов. """
+
+    monkeypatch.setattr(artcollector.aclogger, 'AUTO_SETUP', False)
+
+
+@pytest.fixture
+def page():
+    """ Функция, возвращающая HTML-код сохранённой страницы по имени (см. PAGES) в байтах. """
+
+    def read(name: str) -> bytes:
+        return (FIXTURES_DIR / f'{name}.html').read_bytes()
+
+    return read
+
+
+class Response:
+    """ Ответ сервера с телом body. """
+
+    def __init__(self, status_code: int=200, body: bytes=b'', headers: dict | None=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, size):
+        yield self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f'{self.status_code} Error')
+
+    def close(self):
+        pass
+
+
+class Session:
+    """ Сеанс, который отвечает заданными ответами по очереди; исключение в очереди вызывается. """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, link, **kwargs):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,127 @@
+""" Архив страниц: запись и чтение, переход к новому сегменту и восстановление индекса
+    после аварийного завершения. """
+
+import random
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from artcollector.archive import ArchiveFetcher, NotArchived, PageArchive
+
+ROOT = Path(__file__).parent.parent
+URL = 'https://tass.ru/politika/1'
+
+
+def body(number: int) -> bytes:
+    """ Тело страницы, которое почти не сжимается: около 1 КБ в архиве. """
+
+    return f'<html>{number}</html>'.encode() + random.Random(number).randbytes(1000)
+
+
+def test_store_and_get(tmp_path):
+    with PageArchive(tmp_path) as archive:
+        archive.store(URL, 'Статья'.encode('cp1251'), 'cp1251', 200,
+                      {'ETag': '"1"', 'Set-Cookie': 'id=1'})
+
+        page = archive.get(URL)
+        assert page.url == URL
+        assert page.body.decode(page.encoding) == 'Статья'
+        assert page.status == 200
+        assert page.headers == {'ETag': '"1"'}
+
+        # Ссылка ищется в нормализованном виде.
+        assert 'HTTPS://TASS.RU/politika/1#comments' in archive
+        assert archive.get('https://tass.ru/politika/2') is None
+
+        # Более поздняя запись страницы заменяет более раннюю.
+        archive.store(URL, b'<html>2</html>')
+        assert archive.get(URL).body == b'<html>2</html>'
+        assert len(archive) == 1
+
+    with PageArchive(tmp_path) as archive:
+        assert ArchiveFetcher(archive).get(URL) == '<html>2</html>'
+        with pytest.raises(NotArchived):
+            ArchiveFetcher(archive).get('https://tass.ru/politika/2')
+
+
+def test_segment_rollover(tmp_path):
+    links = [f'{URL}{i}' for i in range(10)]
+
+    with PageArchive(tmp_path, segment_bytes=3000) as archive:
+        for i, link in enumerate(links):
+            archive.store(link, body(i))
+
+        stats = archive.stats()
+        assert stats['pages'] == 10
+        assert stats['segments'] > 2
+        assert all(path.stat().st_size <= 3000 for path in tmp_path.glob('*.warc.gz'))
+        assert list(archive.urls()) == links
+        assert [page.body for page in archive.pages()] == [body(i) for i in range(10)]
+
+
+def crash_after_storing(path: Path, count: int, segment_bytes: int, commit_every: int=100):
+    """ Записывает count страниц в архив в отдельном процессе и завершает его аварийно. """
+
+    subprocess.run([sys.executable, '-c',
+        'import os, sys\n'
+        'from artcollector.archive import PageArchive\n'
+        f'PageArchive.COMMIT_EVERY = {commit_every}\n'
+        f'archive = PageArchive(sys.argv[1], segment_bytes={segment_bytes})\n'
+        f'for i in range({count}):\n'
+        f"    archive.store(f'{URL}{{i}}', os.urandom(1000))\n"
+        'os._exit(0)\n', str(path)], env={'PYTHONPATH': str(ROOT)}, check=True)
+
+
+def test_crash_recovery(tmp_path):
+    crash_after_storing(tmp_path, 10, PageArchive.SEGMENT_BYTES)
+
+    with PageArchive(tmp_path) as archive:
+        assert len(archive) == 10
+
+
+def test_crash_recovery_across_segments(tmp_path):
+    crash_after_storing(tmp_path, 10, 3000, commit_every=1000)
+
+    with PageArchive(tmp_path) as archive:
+        assert archive.stats()['segments'] > 2
+        assert list(archive.urls()) == [f'{URL}{i}' for i in range(10)]
+
+
+def test_lost_index_restored_from_all_segments(tmp_path):
+    with PageArchive(tmp_path, segment_bytes=3000) as archive:
+        for i in range(10):
+            archive.store(f'{URL}{i}', body(i))
+
+    (tmp_path / 'index.sqlite').unlink()
+
+    with PageArchive(tmp_path, segment_bytes=3000) as archive:
+        assert len(archive) == 10
+        assert archive.get(f'{URL}0').body == body(0)
+
+
+def test_partial_record_truncated(tmp_path):
+    with PageArchive(tmp_path) as archive:
+        archive.store(f'{URL}0', body(0))
+        _, offset, length = archive._locate(f'{URL}0')
+        archive.store(f'{URL}1', body(1))
+    end = offset + length
+
+    # Вторая запись дописана наполовину и в индекс не попала.
+    segment = tmp_path / 'archive-00000.warc.gz'
+    with open(segment, 'r+b') as file:
+        file.truncate((end + segment.stat().st_size) // 2)
+    with sqlite3.connect(tmp_path / 'index.sqlite') as db:
+        db.execute('DELETE FROM pages WHERE url = ?', (f'{URL}1',))
+    db.close()
+
+    with PageArchive(tmp_path) as archive:
+        assert list(archive.urls()) == [f'{URL}0']
+        assert segment.stat().st_size == end
+
+        # Следующая запись пишется сразу за последней целой.
+        archive.store(f'{URL}2', body(2))
+        assert archive.get(f'{URL}2').body == body(2)
+        assert archive.get(f'{URL}0').body == body(0)
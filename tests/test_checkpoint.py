@@ -0,0 +1,35 @@
+""" Журнал загрузки хранит настоящую причину неудачи по каждой ссылке. """
+
+import pytest
+from requests.exceptions import HTTPError
+
+from artcollector import ArticleCollection, ExtArt
+from artcollector.checkpoint import FAILED, Checkpoint
+from artcollector.sites import UNSUPPORTED
+
+
+class MissingPages:
+    """ Загрузчик, у которого любая страница отвечает 404. """
+
+    metrics = None
+
+    def get(self, link):
+        raise HTTPError(f'404 Client Error: Not Found for url: {link}')
+
+    def get_raw(self, link):
+        return self.get(link)
+
+
+@pytest.mark.parametrize('processes', [None, 2])
+def test_failure_reason_is_journaled(tmp_path, processes):
+    journal_path = tmp_path / 'load.journal'
+    collection = ArticleCollection(art_factor=ExtArt(fetcher=MissingPages()))
+
+    collection.load_from_urls(['https://tass.ru/politika/1', 'https://example.com/1'],
+                              processes=processes, checkpoint=journal_path)
+
+    with Checkpoint(journal_path) as journal:
+        status, reason = journal.status('https://tass.ru/politika/1')
+        assert status == FAILED
+        assert reason == 'HTTPError: 404 Client Error: Not Found for url: https://tass.ru/politika/1'
+        assert journal.status('https://example.com/1') == (FAILED, UNSUPPORTED)
@@ -0,0 +1,163 @@
+""" Обход сайтов по ссылкам: глубина, бюджет страниц, очередь без повторов,
+    порядок обхода и паузы между запросами к одному сайту. """
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+import pytest
+
+from artcollector import ArticleCollection
+from artcollector.article import Article
+from artcollector.crawler import Crawler
+from artcollector.metrics import NULL_METRICS
+
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+class Sites:
+    """ Загрузчик статей по графу ссылок: ссылка -> (номер дня публикации, ссылки из статьи).
+    Поддерживаются сайты a.test и b.test; ссылка с FAIL вызывает ошибку. """
+
+    metrics = NULL_METRICS
+
+    def __init__(self, graph: dict, pause: float=0) -> None:
+        self.graph = graph
+        self.pause = pause
+        self.fetched = []
+        self.active = {}
+        self.most_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url):
+        host = urlsplit(url).hostname
+        with self._lock:
+            self.fetched.append(url)
+            self.active[host] = self.active.get(host, 0) + 1
+            self.most_active = max(self.most_active, self.active[host])
+        try:
+            time.sleep(self.pause)
+            if 'FAIL' in url:
+                raise RuntimeError('сбой')
+            day, links = self.graph.get(url, (0, []))
+            return Article('Сайт', START + timedelta(days=day), None, url, url, '', links)
+        finally:
+            with self._lock:
+                self.active[host] -= 1
+
+    def supports(self, url):
+        return urlsplit(url).hostname.removeprefix('www.') in ('a.test', 'b.test')
+
+
+def crawl(graph: dict, seeds, **kwargs) -> tuple:
+    sites = Sites(graph, kwargs.pop('pause', 0))
+    crawler = Crawler(sites, **{'workers': 1, 'delay': 0, **kwargs})
+    links = [art.link for art in crawler.crawl(seeds)]
+    return links, sites, crawler.stats
+
+
+CHAIN = {
+    'https://a.test/0': (0, ['https://a.test/1']),
+    'https://a.test/1': (1, ['https://a.test/2']),
+    'https://a.test/2': (2, ['https://a.test/3']),
+    'https://a.test/3': (3, []),
+}
+
+
+@pytest.mark.parametrize('max_depth, count', [(0, 1), (1, 2), (2, 3), (5, 4)])
+def test_max_depth(max_depth, count):
+    links, _, _ = crawl(CHAIN, ['https://a.test/0'], max_depth=max_depth)
+    assert links == [f'https://a.test/{i}' for i in range(count)]
+
+
+def test_max_pages():
+    links, sites, stats = crawl(CHAIN, ['https://a.test/0'], max_depth=5, max_pages=2)
+    assert links == ['https://a.test/0', 'https://a.test/1']
+    assert stats['fetched'] == 2
+
+
+def test_frontier_deduplicates_links():
+    graph = {
+        'https://a.test/0': (0, ['https://a.test/1', 'https://www.a.test/1#comments',
+                                 'https://a.test/1?utm_source=rss', '/0', 'https://a.test/2']),
+        'https://a.test/1': (1, ['https://a.test/0', 'https://a.test/2']),
+        'https://a.test/2': (2, ['https://a.test/1', 'HTTPS://A.TEST/0']),
+    }
+
+    links, sites, _ = crawl(graph, ['https://a.test/0', 'https://a.test/0 ', ''], max_depth=5)
+
+    assert links == ['https://a.test/0', 'https://a.test/1', 'https://a.test/2']
+    assert sites.fetched == links
+
+
+def test_only_supported_links_followed():
+    graph = {'https://a.test/0': (0, ['/1', 'https://b.test/2', 'https://c.test/3',
+                                      'mailto:editor@a.test', 'ftp://a.test/4', 'https://a.test/tag/5'])}
+
+    links, _, _ = crawl(graph, ['https://a.test/0'])
+    assert links == ['https://a.test/0', 'https://a.test/1', 'https://b.test/2', 'https://a.test/tag/5']
+
+    links, _, _ = crawl(graph, ['https://a.test/0'], follow=r'^https://a\.test/\d+$')
+    assert links == ['https://a.test/0', 'https://a.test/1']
+
+
+# Из начальной статьи ведут ссылки на старую и свежую статьи, из них - ещё по одной.
+TREE = {
+    'https://a.test/seed': (5, ['https://a.test/old', 'https://a.test/new']),
+    'https://a.test/old': (1, ['https://a.test/old/next']),
+    'https://a.test/new': (9, ['https://a.test/new/next']),
+}
+
+
+def test_newest_order():
+    links, _, _ = crawl(TREE, ['https://a.test/seed'], order='newest')
+    assert links == ['https://a.test/seed', 'https://a.test/old', 'https://a.test/new',
+                     'https://a.test/new/next', 'https://a.test/old/next']
+
+
+def test_depth_order():
+    links, _, _ = crawl(TREE, ['https://a.test/seed'], order='depth')
+    assert links == ['https://a.test/seed', 'https://a.test/old', 'https://a.test/new',
+                     'https://a.test/old/next', 'https://a.test/new/next']
+
+
+def test_unknown_order():
+    with pytest.raises(ValueError):
+        Crawler(Sites({}), order='random')
+
+
+def test_failed_page_does_not_stop_crawl():
+    graph = {'https://a.test/0': (0, ['https://a.test/FAIL', 'https://a.test/2'])}
+
+    links, _, stats = crawl(graph, ['https://a.test/0'])
+
+    assert links == ['https://a.test/0', 'https://a.test/2']
+    assert stats == {'fetched': 3, 'articles': 2, 'failed': 1, 'known': 0}
+
+
+def test_per_host_politeness():
+    graph = {'https://a.test/0': (0, [f'https://{host}/{i}' for i in range(1, 4)
+                                      for host in ('a.test', 'b.test')])}
+
+    links, sites, _ = crawl(graph, ['https://a.test/0'], workers=4, per_host=1, pause=0.05)
+    assert len(links) == 7
+    assert sites.most_active == 1
+
+    start = time.monotonic()
+    links, _, _ = crawl(graph, ['https://a.test/0'], workers=4, delay=0.1)
+    # Четыре запроса к a.test с паузой 0.1 с между ними.
+    assert time.monotonic() - start >= 0.3
+
+
+def test_collection_crawl_skips_known_articles():
+    sites = Sites(CHAIN)
+    collection = ArticleCollection(art_factor=sites)
+    collection.add([sites('https://a.test/0')])
+    sites.fetched.clear()
+
+    added = collection.crawl(['https://a.test/0'], max_depth=2, delay=0)
+
+    assert added == 2
+    assert sites.fetched == ['https://a.test/1', 'https://a.test/2']
+    assert [art.link for art in collection] == [f'https://a.test/{i}' for i in range(3)]
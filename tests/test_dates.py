@@ -0,0 +1,39 @@
+""" Разбор дат публикации ТАСС: дата текущего года без года, сокращённое название месяца. """
+
+from datetime import datetime
+
+import pytest
+
+from artcollector.dates import MSK
+from artcollector.sites import ExtractTassArticle
+
+LINK = 'https://tass.ru/politika/1'
+
+PAGE = """<html><body><main>
+<div class="ds_ext_marker-kFsBk ds_ext_marker--font_weight_medium-wX2ql
+ds_ext_marker--color_secondary-z2ssC">{date}</div>
+<h1>Заголовок</h1><article><p>Текст.</p></article>
+</main></body></html>"""
+
+
+def tass_date(source_date: str) -> datetime:
+    return ExtractTassArticle.from_html(LINK, PAGE.format(date=source_date)).published
+
+
+@pytest.mark.parametrize('source_date, expected', [
+    ('17 января 2023,&nbsp;10:15', datetime(2023, 1, 17, 10, 15, tzinfo=MSK)),
+    ('17 янв. 2023,&nbsp;10:15', datetime(2023, 1, 17, 10, 15, tzinfo=MSK)),
+    ('17 января 2023 10:15', datetime(2023, 1, 17, 10, 15, tzinfo=MSK)),
+])
+def test_date_with_year(source_date, expected):
+    assert tass_date(source_date) == expected
+
+
+@pytest.mark.parametrize('source_date, month, day, time', [
+    ('17 января,&nbsp;10:15', 1, 17, (10, 15)),
+    ('3 мая,&nbsp;09:00', 5, 3, (9, 0)),
+    ('17 янв.,&nbsp;10:15', 1, 17, (10, 15)),
+])
+def test_date_without_year(source_date, month, day, time):
+    year = datetime.now(MSK).year
+    assert tass_date(source_date) == datetime(year, month, day, *time, tzinfo=MSK)
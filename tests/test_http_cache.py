@@ -0,0 +1,54 @@
+""" Дисковый кэш страниц: одновременное сохранение одной страницы из нескольких потоков
+    и учёт промахов. """
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from requests.exceptions import ConnectionError, HTTPError
+
+from artcollector.fetcher import Fetcher
+from artcollector.http_cache import HttpCache
+from artcollector.throttle import HostThrottle
+from conftest import Response, Session
+
+URL = 'https://tass.ru/politika/1'
+
+
+def test_concurrent_store_same_url(tmp_path):
+    cache = HttpCache(tmp_path)
+    bodies = [bytes([i]) * 50_000 for i in range(8)]
+
+    def store(body):
+        for _ in range(50):
+            cache.store(URL, body)
+
+    with ThreadPoolExecutor(len(bodies)) as pool:
+        list(pool.map(store, bodies))
+
+    entry = cache.lookup(URL)
+    assert entry.body in bodies
+    assert not list(tmp_path.rglob('*.tmp'))
+    cache.close()
+
+
+def fetcher(cache, *responses):
+    return Fetcher(session=Session(*responses), cache=cache, throttle=HostThrottle(retries=0))
+
+
+def test_misses_counted_on_lookup(tmp_path):
+    cache = HttpCache(tmp_path, ttl=0)
+
+    with pytest.raises(ConnectionError):
+        fetcher(cache, ConnectionError('обрыв')).get_raw(URL)
+    with pytest.raises(HTTPError):
+        fetcher(cache, Response(404)).get_raw(URL)
+    assert cache.stats['misses'] == 2
+
+    fetcher(cache, Response(200, b'<html></html>', {'ETag': '"1"'})).get_raw(URL)
+    # Запись устарела (ttl=0): обращение - промах, даже если сервер подтвердил запись.
+    assert fetcher(cache, Response(304)).get_raw(URL)[0] == b'<html></html>'
+
+    assert cache.stats['misses'] == 4
+    assert cache.stats['revalidated'] == 1
+    assert cache.stats['hits'] == 0
+    cache.close()
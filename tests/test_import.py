@@ -0,0 +1,32 @@
+""" Импорт пакета и создание основных классов: без лишних модулей и без каталога журналов. """
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def run(code: str, cwd: Path) -> list:
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env={'PYTHONPATH': str(ROOT)},
+        check=True, capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def test_entry_points_do_not_load_storage_modules(tmp_path):
+    loaded = run('import sys\n'
+                 'from artcollector import ArticleCollection, ExtArt\n'
+                 "print(*[m for m in ('sqlite3', 'artcollector.archive', 'artcollector.http_cache') "
+                 'if m in sys.modules])', tmp_path)
+    assert loaded == []
+
+
+def test_logs_created_on_first_record(tmp_path):
+    run('from artcollector import ArticleCollection, ExtArt\n'
+        'ExtArt(); ArticleCollection()', tmp_path)
+    assert not (tmp_path / 'logs').exists()
+
+    run('import logging\n'
+        'from artcollector import ExtArt\n'
+        "ExtArt(); logging.getLogger('artcollector.sites').debug('запись')", tmp_path)
+    assert (tmp_path / 'logs' / 'sites.log').read_text(encoding='utf-8').strip().endswith('запись')
@@ -0,0 +1,89 @@
+""" Пул процессов извлекает статьи с разборщиком и реестром сайтов основного процесса
+    и переживает аварийное завершение процесса на одной из страниц. """
+
+import os
+import time
+
+from artcollector import ArticleCollection, ExtArt, parse_pool
+from artcollector.metrics import Metrics
+from artcollector.parse_pool import ParsePool
+from artcollector.registry import SiteRegistry
+from artcollector.sites import ExtractTassArticle
+
+LINK = 'https://mirror.test/politika/16814463'
+
+
+class MirrorPages:
+    """ Загрузчик, который на любую ссылку отдаёт одну и ту же страницу. """
+
+    metrics = None
+
+    def __init__(self, raw_data: bytes):
+        self.raw_data = raw_data
+
+    def get(self, link):
+        return self.raw_data.decode('utf-8')
+
+
+class CrashingTass(ExtractTassArticle):
+    """ Страница ТАСС: на ссылке с CRASH процесс завершается, с SLOW разбор идёт медленно. """
+
+    def _parse(self, raw_data, parser, encoding=None):
+        if 'CRASH' in self._link:
+            os._exit(1)
+        if 'SLOW' in self._link:
+            time.sleep(1)
+        super()._parse(raw_data, parser, encoding)
+
+
+def test_workers_use_custom_registry(page):
+    registry = SiteRegistry({'mirror.test': ExtractTassArticle}, entry_points=False)
+    art_factor = ExtArt(fetcher=MirrorPages(page('tass')), registry=registry)
+    collection = ArticleCollection(art_factor=art_factor)
+
+    collection.load_from_urls([LINK], processes=2)
+
+    assert [art.link for art in collection] == [LINK]
+
+
+def test_init_worker(monkeypatch):
+    monkeypatch.setattr(parse_pool, '_worker_factor', None)
+    registry = SiteRegistry({'mirror.test': 'artcollector.sites:ExtractTassArticle'})
+
+    parse_pool.init_worker('html.parser', registry.spec())
+
+    assert parse_pool._worker_factor.parser == 'html.parser'
+    assert parse_pool._worker_factor.registry.for_url(LINK) is ExtractTassArticle
+    assert parse_pool._worker_factor.registry.for_url('https://tass.ru/1') is None
+
+
+def test_crash_blames_only_crashing_page(page):
+    raw_data = page('tass')
+    registry = SiteRegistry({'crash.test': CrashingTass}, entry_points=False)
+    links = ['https://crash.test/1', 'https://crash.test/SLOW', 'https://crash.test/CRASH',
+             'https://crash.test/4', 'https://crash.test/5']
+
+    with ParsePool(2, registry=registry) as pool:
+        results = list(pool.imap((link, link, raw_data) for link in links))
+
+    assert [tag for tag, _, _ in results] == links
+    failed = [tag for tag, art, _ in results if art is None]
+    assert failed == ['https://crash.test/CRASH']
+    assert results[2][2] == 'процесс обработки аварийно завершился'
+
+
+def test_failure_on_unsupported_site_is_counted_by_host(monkeypatch):
+    monkeypatch.setattr(parse_pool, '_worker_factor', ExtArt())
+
+    def broken(link, raw_data=None):
+        raise RuntimeError('сбой')
+
+    monkeypatch.setattr(parse_pool._worker_factor, 'extract', broken)
+
+    art, error, raw = parse_pool.extract_page('https://www.example.com/1', '<html></html>', True)
+
+    assert art is None
+    assert error == 'RuntimeError: сбой'
+    metrics = Metrics()
+    metrics.merge(raw)
+    assert metrics.snapshot()['counters']['failures'] == {'example.com': 1}
@@ -0,0 +1,78 @@
+""" Правила извлечения: поля, атрибуты, блоки текста и ошибки на неполных страницах. """
+
+import pytest
+from bs4 import BeautifulSoup
+
+from artcollector.rules import ExtractionError, FieldRule, TextRule
+from artcollector.sites import ExtractArticleData
+
+PAGE = '''
+<div id="main">
+  <time datetime="2023-01-16T07:02:35Z">16 января</time>
+  <h1> Заголовок </h1>
+  <ul class="tags"><li>наука</li><li> космос </li></ul>
+  <a class="tag" href="/t/1">один</a><a class="tag">два</a><a class="tag" href="/t/3">три</a>
+  <div class="body"><p>Первый <a href="https://example.org/">абзац</a></p><h2>Раздел</h2><div>реклама</div></div>
+</div>
+'''
+
+
+@pytest.fixture
+def tree():
+    return BeautifulSoup(PAGE, 'html.parser')
+
+
+def test_field_text_and_attr(tree):
+    assert FieldRule('headline', {'select': 'h1'}).extract(tree) == 'Заголовок'
+    assert FieldRule('date', {'select': 'time', 'attr': 'datetime'}).extract(tree) == '2023-01-16T07:02:35Z'
+    tags = {'select': 'ul.tags', 'sep': '\n', 'strip_each': True, 'split': '\n'}
+    assert FieldRule('tags', tags).extract(tree) == ['наука', 'космос']
+
+
+def test_field_all_skips_elements_without_attr(tree):
+    rule = FieldRule('links', {'select': 'a.tag', 'attr': 'href', 'all': True})
+    assert rule.extract(tree) == ['/t/1', '/t/3']
+
+
+def test_missing_element(tree):
+    with pytest.raises(ExtractionError):
+        FieldRule('author', {'select': '.author'}).extract(tree)
+    assert FieldRule('author', {'select': '.author', 'required': False}).extract(tree) is None
+
+
+def test_missing_attr(tree):
+    with pytest.raises(ExtractionError):
+        FieldRule('date', {'select': 'time', 'attr': 'data-published'}).extract(tree)
+    rule = FieldRule('date', {'select': 'time', 'attr': 'data-published', 'required': False})
+    assert rule.extract(tree) is None
+
+
+def test_text_blocks(tree):
+    article = ExtractArticleData.__new__(ExtractArticleData)
+    article._links = []
+    rule = TextRule({'select': '.body', 'blocks': [('h2', 'heading'), ('div', 'skip')]})
+
+    assert rule.extract(tree, article) == 'Первый абзац (https://example.org/)\n\nРаздел'
+    assert article._links == ['https://example.org/']
+
+
+def test_missing_text_block(tree):
+    with pytest.raises(ExtractionError):
+        TextRule({'select': '.content'}).extract(tree, None)
+
+
+class ExtractTestArticle(ExtractArticleData):
+    SOURCE_SITE = 'example.org'
+    MAIN_SEL = '#main'
+    RULES = {
+        'date': {'select': 'time', 'attr': 'datetime', 'format': '%Y-%m-%dT%H:%M:%S%z'},
+        'headline': {'select': 'h1'}
+    }
+
+
+def test_missing_main_container():
+    with pytest.raises(ExtractionError):
+        ExtractTestArticle('https://example.org/1', raw_data=PAGE.replace('main', 'other'))
+
+    art = ExtractTestArticle('https://example.org/1', raw_data=PAGE)
+    assert art.headline == 'Заголовок'
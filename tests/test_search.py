@@ -0,0 +1,99 @@
+""" Поиск по индексу с ранней остановкой даёт те же результаты, что и полный перебор. """
+
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from math import log as ln
+
+import pytest
+
+from artcollector.article import Article
+from artcollector.search import SearchIndex, tokenize
+
+SINCE = datetime(2023, 1, 2, tzinfo=timezone.utc)
+
+SOURCES = ('habr.com', 'tass.ru', 'inosmi.ru', 'naked-science.ru')
+TAGS = tuple(f'тег{i}' for i in range(20))
+
+
+def make_articles(count: int, vocabulary: int=5000, seed: int=1):
+    """ Создаёт count синтетических статей, слова которых выбираются по закону Ципфа:
+    служебные слова, затем частые слова и длинный хвост редких. """
+
+    rnd = random.Random(seed)
+    words = ('и', 'в', 'не', 'на', 'что') + tuple(f'слово{i}' for i in range(vocabulary))
+    weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    for i in range(count):
+        text = rnd.choices(words, cum_weights=weights, k=120)
+        site = SOURCES[i % len(SOURCES)]
+        yield Article(
+            site, start + timedelta(minutes=i), None, ' '.join(text[:8]), f'https://{site}/{i}',
+            ' '.join(text[8:]), [], {'tags': rnd.sample(TAGS, 3)})
+
+
+@pytest.fixture(scope='module')
+def collection():
+    articles = list(make_articles(3000))
+    index = SearchIndex()
+    index.IMPACT_MIN = 20
+    for art in articles:
+        index.add(art)
+    return index, articles
+
+
+def brute_force(index, articles, query, limit, source=None, tag=None, since=None):
+    """ Оценки BM25 всех подходящих статей без списков по убыванию вклада. """
+
+    total = len(index)
+    avg_length = index._total_length / total
+    k1, b = index.K1, index.B
+
+    terms = []
+    for word in set(tokenize(query)) - index.STOPWORDS:
+        if word in index._postings:
+            docs, freqs = index._postings[word]
+            idf = ln(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            terms.append((dict(zip(docs, freqs)), idf))
+
+    found = []
+    for doc, art in enumerate(articles):
+        if source is not None and source != art.source_name:
+            continue
+        if tag is not None and tag not in art['tags']:
+            continue
+        if since is not None and art.published < since:
+            continue
+        score = 0
+        for freqs, idf in terms:
+            freq = freqs.get(doc)
+            if freq:
+                norm = k1 * (1 - b + b * index._lengths[doc] / avg_length)
+                score += idf * freq * (k1 + 1) / (freq + norm)
+        if score:
+            found.append(score)
+
+    return sorted(found, reverse=True)[:limit]
+
+
+@pytest.mark.parametrize('query, filters', [
+    ('слово0', {}),
+    ('слово0 слово1 слово2', {}),
+    ('слово0 слово300', {}),
+    ('слово5 слово9', {'tag': 'тег7'}),
+    ('слово0 слово1', {'source': 'tass.ru'}),
+    ('слово0 слово1', {'source': 'tass.ru', 'tag': 'тег3'}),
+    ('слово2 слово40 слово1000', {'since': SINCE}),
+])
+@pytest.mark.parametrize('limit', [1, 10, 50])
+def test_search_matches_brute_force(collection, query, filters, limit):
+    index, articles = collection
+    found = index.search(query, limit, **filters)
+    expected = brute_force(index, articles, query, limit, **filters)
+    assert [score for _, score in found] == pytest.approx(expected)
+
+
+def test_stopwords_only(collection):
+    index, _ = collection
+    assert index.search('и в на') == []
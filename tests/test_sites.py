@@ -0,0 +1,69 @@
+""" Извлечение статей по правилам на сохранённых страницах.
+    Ожидаемые данные (expected_articles.json) получены прежними извлекателями (методами _ext_*
+    классов сайтов до перехода на правила) и отличаются от их результата только там,
+    где прежний результат был ошибочным:
+        - даты публикации получают часовой пояс сайта (модуль dates);
+        - абзац Хабра, следующий сразу за <br> верхнего уровня, больше не пропускается
+          (прежний цикл удалял <br> из перебираемого списка и перескакивал следующий элемент).
+
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from artcollector.registry import SITES
+from artcollector.sites import ExtArt
+from conftest import PAGES
+
+EXPECTED = json.loads((Path(__file__).parent / 'expected_articles.json').read_text(encoding='utf-8'))
+
+try:
+    import lxml
+except ImportError:
+    PARSERS = ['html.parser']
+else:
+    PARSERS = ['html.parser', 'lxml']
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+@pytest.mark.parametrize('name', PAGES)
+def test_extraction_matches_expected(page, name, parser):
+    link = PAGES[name]
+    art = SITES.for_url(link)(link, raw_data=page(name), parser=parser)
+
+    assert dict(art.info, published=art.published.isoformat()) == EXPECTED[name]
+
+
+def strip(raw_data: bytes, css: str, attr: str | None=None) -> str:
+    """ Удаляет со страницы элементы css (или только их атрибут attr). """
+
+    tree = BeautifulSoup(raw_data, 'html.parser')
+    found = tree.select(css)
+    assert found
+    for element in found:
+        if attr:
+            del element[attr]
+        else:
+            element.decompose()
+    return str(tree)
+
+
+@pytest.mark.parametrize('name, css, attr', [
+    ('habr', 'article', None),
+    ('habr', 'time', 'datetime'),
+    ('naked_science', '.content', None),
+    ('naked_science', '.echo_date', 'data-published'),
+    ('tass', 'main', None),
+    ('tass', 'h1', None),
+    ('inosmi', '#content', None),
+    ('inosmi', 'div.article__info-original', None),
+    ('inosmi', 'a.article__article-link', None),
+])
+def test_missing_element_is_extraction_error(page, name, css, attr):
+    art, error = ExtArt().extract(PAGES[name], strip(page(name), css, attr))
+
+    assert art is None
+    assert error.startswith('ExtractionError: ')
@@ -0,0 +1,159 @@
+""" Хранилища статей: сохранение в SQLite и чтение обратно, отбор по индексам
+    и одинаковые ответы хранилища в памяти и в базе. """
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from artcollector import ArticleCollection
+from artcollector.article import Article
+from artcollector.storage import MemoryStorage, SQLiteStorage
+
+MSK = timezone(timedelta(hours=3))
+
+
+def make_articles():
+    """ Статьи разных сайтов, авторов и тегов; даты с разными часовыми поясами и без пояса. """
+
+    return [
+        Article('ТАСС', datetime(2023, 1, 3, 12, 0, tzinfo=MSK), None, 'Заголовок 0',
+                'https://tass.ru/politika/0', 'Текст 0', ['https://tass.ru/1'], {'tags': ['Политика']}),
+        Article('Хабр', datetime(2023, 1, 2, 8, 0, tzinfo=timezone.utc), 'Автор', 'Заголовок 1',
+                'https://habr.com/ru/post/1/', 'Текст 1', [], {'tags': ['Python', 'SQLite']}),
+        Article('ТАСС', datetime(2023, 1, 3, 8, 30), 'Автор', 'Заголовок 2',
+                'https://tass.ru/politika/2', 'Текст 2', [], {'tags': ['python']}),
+        Article('ИноСМИ', datetime(2023, 1, 1, 0, 0, tzinfo=MSK), 'Другой автор', 'Заголовок 3',
+                'https://inosmi.ru/3.html', 'Текст 3', [], {'original_link': 'https://example.com'}),
+        Article('Хабр', datetime(2023, 1, 4, 0, 0, tzinfo=timezone.utc), None, 'Заголовок 4',
+                'https://habr.com/ru/post/4/', 'Текст 4', []),
+    ]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    storage = MemoryStorage() if request.param == 'memory' else SQLiteStorage(tmp_path / 'arts.db')
+    storage.add(make_articles())
+    yield storage
+    storage.close()
+
+
+def same(first, second) -> bool:
+    return first.info == second.info and first.published == second.published
+
+
+def test_sqlite_round_trip(tmp_path):
+    articles = make_articles()
+
+    storage = SQLiteStorage(tmp_path / 'arts.db')
+    assert storage.add(articles) == 5
+    storage.name = 'Новости'
+    storage.close()
+
+    storage = SQLiteStorage(tmp_path / 'arts.db')
+    assert len(storage) == 5
+    assert storage.name == 'Новости'
+    assert all(same(art, expected) for art, expected in zip(storage, articles, strict=True))
+    assert storage.get(2).published.tzinfo is None
+    assert storage.get(0).published.utcoffset() == timedelta(hours=3)
+    storage.close()
+
+
+def test_duplicates_skipped(storage):
+    again = make_articles()[:2] + [
+        Article('ТАСС', datetime(2023, 1, 5, tzinfo=MSK), None, 'Заголовок 5',
+                'HTTPS://www.tass.ru/politika/5?utm_source=rss', 'Текст 5', [])]
+
+    assert storage.add(again) == 1
+    assert storage.add(again) == 0
+    assert len(storage) == 6
+    assert storage.has_url('https://tass.ru/politika/5')
+
+
+def test_get(storage):
+    articles = make_articles()
+
+    assert same(storage.get(1), articles[1])
+    assert same(storage.get(-1), articles[-1])
+    assert [art.link for art in storage.get(slice(1, 3))] == [art.link for art in articles[1:3]]
+    assert [art.link for art in storage.get(slice(None, None, 2))] == [
+        art.link for art in articles[::2]]
+    assert same(storage.get_url('https://habr.com/ru/post/1'), articles[1])
+
+    with pytest.raises(IndexError):
+        storage.get(5)
+    with pytest.raises(KeyError):
+        storage.get_url('https://habr.com/ru/post/2')
+
+
+@pytest.mark.parametrize('query, expected', [
+    ({}, [0, 1, 2, 3, 4]),
+    ({'source': 'ТАСС'}, [0, 2]),
+    ({'source': 'habr.com'}, [1, 4]),
+    ({'author': 'Автор'}, [1, 2]),
+    ({'tag': 'PYTHON'}, [1, 2]),
+    ({'tag': 'python', 'source': 'tass.ru'}, [2]),
+    ({'since': datetime(2023, 1, 3, 8, 30, tzinfo=timezone.utc)}, [0, 2, 4]),
+    ({'until': datetime(2023, 1, 2, 8, 0, tzinfo=timezone.utc)}, [1, 3]),
+    ({'since': datetime(2023, 1, 3, tzinfo=timezone.utc),
+      'until': datetime(2023, 1, 3, 23, 59, tzinfo=timezone.utc)}, [0, 2]),
+    ({'source': 'lenta.ru'}, []),
+])
+def test_find(storage, query, expected):
+    links = [make_articles()[i].link for i in expected]
+
+    assert [art.link for art in storage.find(**query)] == links
+    assert [art.link for art in storage.by_ids(storage.ids(**query))] == links
+
+
+def test_ids_by_published(storage):
+    # 0 - 09:00 UTC 3 января, 2 - 08:30 UTC (дата без пояса).
+    assert storage.ids(order='published') == [
+        storage.ids()[i] for i in (3, 1, 2, 0, 4)]
+    assert storage.ids(order='published', reverse=True, author='Автор') == [
+        storage.ids()[i] for i in (2, 1)]
+
+
+def test_sqlite_queries_use_indexes(tmp_path):
+    storage = SQLiteStorage(tmp_path / 'arts.db')
+
+    def plan(where: str, params) -> str:
+        rows = storage._db.execute(f'EXPLAIN QUERY PLAN SELECT id FROM articles {where}', params)
+        return ' '.join(row[-1] for row in rows)
+
+    def query_plan(**query) -> str:
+        return plan(*storage._where(**{
+            'source': None, 'author': None, 'tag': None, 'since': None, 'until': None, **query}))
+
+    assert 'sqlite_autoindex_articles' in plan('WHERE url = ?', ['https://tass.ru/1'])
+    assert 'articles_author' in query_plan(author='Автор')
+    assert 'articles_published' in query_plan(since=datetime(2023, 1, 1, tzinfo=timezone.utc))
+    assert 'tags_tag' in query_plan(tag='python')
+    assert {'articles_site', 'articles_source'} <= set(query_plan(source='tass.ru').split())
+    storage.close()
+
+
+def test_tags_indexed_for_old_database(tmp_path):
+    storage = SQLiteStorage(tmp_path / 'arts.db')
+    storage.add(make_articles())
+    storage._db.execute('DROP TABLE tags')
+    storage.close()
+
+    storage = SQLiteStorage(tmp_path / 'arts.db')
+    assert [art.link for art in storage.find(tag='python')] == [
+        'https://habr.com/ru/post/1/', 'https://tass.ru/politika/2']
+    storage.close()
+
+
+def test_collection_grows_across_runs(tmp_path):
+    path = str(tmp_path / 'arts.db')
+    articles = make_articles()
+
+    with ArticleCollection.open(path, 'Новости') as collection:
+        assert collection.add(articles[:3]) == 3
+
+    with ArticleCollection.open(path) as collection:
+        assert collection.collection_name == 'Новости'
+        assert collection.add(articles) == 2
+        assert len(collection) == 5
+        assert 'https://www.inosmi.ru/3.html' in collection
+        assert same(collection['https://tass.ru/politika/2'], articles[2])
@@ -0,0 +1,185 @@
+""" Управление запросами к сайтам: ограничение частоты, паузы перед повтором
+    и отключение сайта после череды неудач. """
+
+import threading
+import time
+
+import pytest
+
+from artcollector import throttle
+from artcollector.fetcher import Fetcher
+from artcollector.throttle import HostThrottle, TokenBucket
+from conftest import Response, Session
+
+HOST = 'tass.ru'
+
+
+class Clock:
+    """ Часы, которые идут только по команде. """
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    """ Пауза перед повтором без разброса: всегда наибольшая. """
+
+    monkeypatch.setattr(throttle.random, 'uniform', lambda low, high: high)
+
+
+def test_token_bucket(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+
+    # Два запроса подряд без паузы, следующие - в долг, в очередь по 0.1 с.
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, pytest.approx(0.1), pytest.approx(0.2)]
+
+    clock.now += 1
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_without_limit():
+    bucket = TokenBucket(rate=None)
+    assert [bucket.reserve() for _ in range(100)] == [0] * 100
+
+
+def test_backoff_doubles_up_to_max_delay(clock, no_jitter):
+    hosts = HostThrottle(backoff=1, max_delay=4, retries=5, failures=100)
+
+    assert [hosts.failure(HOST, attempt) for attempt in range(5)] == [1, 2, 4, 4, 4]
+    assert hosts.failure(HOST, 5) is None
+
+
+def test_backoff_jitter(clock):
+    hosts = HostThrottle(backoff=4, failures=100)
+    assert all(2 <= hosts.failure(HOST, 0) <= 4 for _ in range(50))
+
+
+def test_long_retry_after_is_clamped(clock, no_jitter):
+    hosts = HostThrottle(backoff=1, max_delay=30)
+
+    assert hosts.failure(HOST, 0, retry_after=3600) == 30
+    assert hosts.host(HOST).paused_until == clock.now + 30
+    assert hosts.host(HOST).open_until == 0
+
+
+def test_retry_after_longer_than_backoff(clock, no_jitter):
+    hosts = HostThrottle(backoff=1)
+    assert hosts.failure(HOST, 0, retry_after=5) == 5
+
+
+def test_throttled_halves_rate_and_success_restores_it(clock):
+    hosts = HostThrottle(rate=10)
+
+    hosts.failure(HOST, 0, throttled=True)
+    assert hosts.rate_of(HOST) == 5
+
+    hosts.success(HOST)
+    assert hosts.rate_of(HOST) == pytest.approx(5 + HostThrottle.INCREASE)
+    assert hosts.rate_of('habr.com') == 10
+
+
+def test_breaker_opens_after_failures(clock):
+    hosts = HostThrottle(failures=3, cooldown=60)
+
+    for attempt in range(2):
+        hosts.failure(HOST, attempt)
+    assert hosts.host(HOST).open_until == 0
+
+    hosts.failure(HOST, 2)
+    assert hosts.host(HOST).open_until == clock.now + 60
+
+    # Неудачи запросов, отправленных до отключения, отключение не продлевают.
+    clock.now += 10
+    hosts.failure(HOST, 0)
+    assert hosts.host(HOST).open_until == clock.now + 50
+
+
+def open_breaker(hosts: HostThrottle):
+    for attempt in range(hosts.failures):
+        hosts.failure(HOST, attempt)
+
+
+def waiter(hosts: HostThrottle, host: str=HOST) -> threading.Thread:
+    thread = threading.Thread(target=hosts.wait, args=(host,), daemon=True)
+    thread.start()
+    return thread
+
+
+def test_open_breaker_blocks_until_half_open():
+    hosts = HostThrottle(failures=2, cooldown=0.3)
+    open_breaker(hosts)
+
+    start = time.monotonic()
+    hosts.wait(HOST)
+    assert time.monotonic() - start >= 0.25
+
+    # Остальные сайты не ждут.
+    start = time.monotonic()
+    hosts.wait('habr.com')
+    assert time.monotonic() - start < 0.1
+
+
+def test_half_open_success_closes_breaker():
+    hosts = HostThrottle(failures=2, cooldown=0.2)
+    open_breaker(hosts)
+    hosts.wait(HOST)
+
+    # Пока идёт пробный запрос, остальные запросы ждут его результата.
+    other = waiter(hosts)
+    other.join(0.1)
+    assert other.is_alive()
+
+    hosts.success(HOST)
+    other.join(1)
+    assert not other.is_alive()
+
+    start = time.monotonic()
+    hosts.wait(HOST)
+    assert time.monotonic() - start < 0.1
+
+
+def test_half_open_failure_reopens_breaker():
+    hosts = HostThrottle(failures=2, cooldown=0.2)
+    open_breaker(hosts)
+    hosts.wait(HOST)
+
+    other = waiter(hosts)
+    hosts.failure(HOST, 0)
+    assert hosts.host(HOST).open_until > time.monotonic()
+
+    other.join(0.1)
+    assert other.is_alive()
+    other.join(1)
+    assert not other.is_alive()
+
+
+def test_lost_probe_expires():
+    hosts = HostThrottle(failures=2, cooldown=0.2)
+    open_breaker(hosts)
+    hosts.wait(HOST)
+
+    # О пробном запросе не сообщили ни успеха, ни неудачи: его результата ждут не дольше cooldown.
+    start = time.monotonic()
+    hosts.wait(HOST)
+    assert 0.15 <= time.monotonic() - start < 1
+
+
+def test_fetcher_waits_out_open_breaker():
+    hosts = HostThrottle(backoff=0, failures=1, cooldown=0.2)
+    body = b'<html></html>'
+    fetcher = Fetcher(session=Session(Response(503), Response(200, body)), throttle=hosts)
+
+    start = time.monotonic()
+    assert fetcher.get_raw(f'https://{HOST}/politika/1')[0] == body
+    assert time.monotonic() - start >= 0.15
@@ -0,0 +1,143 @@
+""" Выгрузки коллекции: реестр форматов, JSON Lines и CSV, сжатие и дописывание файла. """
+
+import csv
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+import pytest
+
+from artcollector import ArticleCollection, to_frm
+from artcollector.article import Article
+from artcollector.to_frm import CSV_COLUMNS, EXPORTERS, export, exporter, to_txt
+
+MSK = timezone(timedelta(hours=3))
+
+
+def make_collection(count: int=2, start: int=0) -> ArticleCollection:
+    collection = ArticleCollection('Новости')
+    collection.add(
+        Article('ТАСС', datetime(2023, 1, 3, 12, i, tzinfo=MSK), 'Автор' if i % 2 else None,
+                f'Заголовок {i}', f'https://tass.ru/politika/{i}', f'Текст {i}\nвторая строка',
+                [f'https://tass.ru/{i}'], {'tags': ['Политика', 'Тег'], 'annotation': 'Кратко',
+                                           'rubric': 'Политика'})
+        for i in range(start, start + count))
+    return collection
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """ Реестр выгрузок, изменения которого не переживают тест. """
+
+    monkeypatch.setattr(to_frm, 'EXPORTERS', dict(EXPORTERS))
+    return to_frm.EXPORTERS
+
+
+def read_csv(text: str) -> list:
+    return list(csv.DictReader(StringIO(text)))
+
+
+def test_builtin_formats():
+    assert {'txt', 'jsonl', 'csv'} <= set(EXPORTERS)
+
+
+def test_registered_exporter(registry):
+
+    @exporter('links')
+    def write_links(collection, stream) -> int:
+        return sum(stream.write(art.link + '\n') for art in collection)
+
+    assert registry['links'] is write_links
+
+    collection = make_collection()
+    assert collection.to('links') == 'https://tass.ru/politika/0\nhttps://tass.ru/politika/1\n'
+
+    stream = StringIO()
+    assert export(collection.find(author='Автор'), 'links', stream=stream) == 27
+    assert stream.getvalue() == 'https://tass.ru/politika/1\n'
+
+
+def test_unknown_format_and_compression(tmp_path):
+    collection = make_collection()
+
+    assert collection.to('xml') is None
+    assert collection.to('jsonl', path=tmp_path / 'arts.jsonl', compress='rar') is None
+    assert not (tmp_path / 'arts.jsonl').exists()
+
+
+def test_txt():
+    collection = make_collection()
+    toc, body = to_txt(collection)
+
+    assert collection.to() == (toc, body)
+
+    stream = StringIO()
+    written = collection.to('txt', stream=stream)
+    assert stream.getvalue() == 'Новости\n\n' + toc + '\n' + body
+    assert written == len(stream.getvalue())
+
+
+def test_jsonl(tmp_path):
+    collection = make_collection()
+    path = tmp_path / 'arts.jsonl'
+
+    written = collection.to('jsonl', path=path)
+
+    text = path.read_text(encoding='utf-8')
+    assert written == len(text)
+    records = [json.loads(line) for line in text.splitlines()]
+    assert records == [dict(art.info, published=art.published.isoformat()) for art in collection]
+    assert records[0]['rubric'] == 'Политика'
+    assert collection.to('jsonl') == text
+
+
+def test_csv():
+    collection = make_collection()
+
+    rows = read_csv(collection.to('csv'))
+
+    assert list(rows[0]) == list(CSV_COLUMNS)
+    assert rows[0]['text'] == 'Текст 0\nвторая строка'
+    assert rows[0]['author'] == ''
+    assert rows[1]['author'] == 'Автор'
+    assert json.loads(rows[0]['tags']) == ['Политика', 'Тег']
+    assert json.loads(rows[0]['links']) == ['https://tass.ru/0']
+    assert json.loads(rows[0]['extra']) == {'rubric': 'Политика'}
+    assert rows[0]['published'] == '2023-01-03T12:00:00+03:00'
+
+
+@pytest.mark.parametrize('name', ['arts.csv', 'arts.csv.gz'])
+def test_csv_append_writes_header_once(tmp_path, name):
+    path = tmp_path / name
+
+    make_collection(2).to('csv', path=path, append=True)
+    make_collection(1, start=2).to('csv', path=path, append=True)
+
+    text = (gzip.open(path, 'rt', encoding='utf-8', newline='') if name.endswith('.gz')
+            else open(path, encoding='utf-8', newline='')).read()
+    rows = read_csv(text)
+    assert [row['link'] for row in rows] == [f'https://tass.ru/politika/{i}' for i in range(3)]
+
+
+def test_jsonl_append_compressed(tmp_path):
+    path = tmp_path / 'arts.jsonl.gz'
+
+    make_collection(2).to('jsonl', path=path)
+    make_collection(1, start=2).to('jsonl', path=path, append=True)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        assert [json.loads(line)['link'] for line in file] == [
+            f'https://tass.ru/politika/{i}' for i in range(3)]
+
+
+def test_replaced_csv_exporter_used_for_files(tmp_path, registry):
+
+    @exporter('csv')
+    def write_semicolon_csv(collection, stream) -> int:
+        return sum(stream.write(f'{art.headline};{art.link}\n') for art in collection)
+
+    path = tmp_path / 'arts.csv'
+    make_collection(1).to('csv', path=path)
+
+    assert path.read_text(encoding='utf-8') == 'Заголовок 0;https://tass.ru/politika/0\n'
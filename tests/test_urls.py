@@ -0,0 +1,52 @@
+""" Приведение ссылок к единому виду и некорректные ссылки. """
+
+import pytest
+
+from artcollector import ArticleCollection, ExtArt
+from artcollector.checkpoint import FAILED, Checkpoint
+from artcollector.sites import UNSUPPORTED
+from artcollector.urls import normalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('http://WWW.Tass.ru/politika/1/', 'https://tass.ru/politika/1'),
+    ('https://tass.ru:443/politika/1', 'https://tass.ru/politika/1'),
+    ('http://tass.ru:80/politika/1', 'https://tass.ru/politika/1'),
+    ('https://tass.ru:8443/politika/1', 'https://tass.ru:8443/politika/1'),
+    ('https://tass.ru/politika/1#comments', 'https://tass.ru/politika/1'),
+    ('https://tass.ru/1?b=2&utm_source=x&a=1&fbclid=y', 'https://tass.ru/1?a=1&b=2'),
+    ('https://tass.ru/1?a=1&b=2', 'https://tass.ru/1?a=1&b=2'),
+    ('https://tass.ru', 'https://tass.ru/'),
+    ('http://[::1]:8080/x', 'https://[::1]:8080/x'),
+    ('https://[2001:DB8::1]/x', 'https://[2001:db8::1]/x'),
+])
+def test_normalize(url, expected):
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize('url', ['https://tass.ru:abc/1', 'http://[::1/x', 'https://tass.ru:99999/1'])
+def test_malformed_url_is_returned_as_is(url):
+    assert normalize_url(f' {url}\n') == url
+
+
+class NoNetwork:
+    """ Загрузчик, к которому не должно быть обращений. """
+
+    metrics = None
+
+    def get(self, link):
+        raise AssertionError(f'загрузка {link}')
+
+
+def test_malformed_url_does_not_stop_loading(tmp_path):
+    journal_path = tmp_path / 'load.journal'
+    collection = ArticleCollection(art_factor=ExtArt(fetcher=NoNetwork()))
+    urls = ['https://tass.ru:abc/1', 'http://[::1/x', 'https://example.com/1']
+
+    collection.load_from_urls(urls, checkpoint=journal_path)
+
+    assert len(collection) == 0
+    assert 'https://tass.ru:abc/1' not in collection
+    with Checkpoint(journal_path) as journal:
+        for url in urls:
+            assert journal.status(url) == (FAILED, UNSUPPORTED)
@@ -0,0 +1,136 @@
+""" Представления коллекции: ленивый отбор по индексам, сортировка, срезы и выгрузка
+    в хранилище в памяти и в базе SQLite. """
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from artcollector import ArticleCollection
+from artcollector.article import Article
+from artcollector.storage import SQLiteStorage
+from artcollector.to_frm import to_txt
+from artcollector.views import ArticleView
+
+UTC = timezone.utc
+
+# Даты выбраны так, что порядок строк date ('%d.%m.%Y %H:%M') не совпадает с порядком публикации.
+ARTICLES = [
+    ('tass.ru', datetime(2023, 2, 1, tzinfo=UTC), None, 'В', ['Политика']),
+    ('habr.com', datetime(2023, 1, 2, tzinfo=UTC), 'Автор', 'Б', ['Python']),
+    ('tass.ru', datetime(2022, 12, 31, tzinfo=UTC), 'Автор', 'Г', ['python', 'Политика']),
+    ('habr.com', datetime(2023, 1, 15, tzinfo=UTC), 'Другой', 'А', []),
+    ('tass.ru', datetime(2023, 1, 3, tzinfo=UTC), None, 'Д', ['Политика']),
+]
+
+
+def make_article(i: int, site: str, published: datetime, author, headline: str, tags) -> Article:
+    return Article(site, published, author, headline, f'https://{site}/{i}', f'Текст {i}', [],
+                   {'tags': tags})
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def collection(request, tmp_path):
+    storage = SQLiteStorage(tmp_path / 'arts.db') if request.param == 'sqlite' else None
+    collection = ArticleCollection('Новости', storage=storage)
+    collection.add(make_article(i, *fields) for i, fields in enumerate(ARTICLES))
+    yield collection
+    collection.close()
+
+
+def numbers(view) -> list:
+    """ Номера статей представления в ARTICLES. """
+
+    return [int(art.link.rsplit('/', 1)[1]) for art in view]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ({'source': 'tass.ru'}, [0, 2, 4]),
+    ({'author': 'Автор'}, [1, 2]),
+    ({'tag': 'PYTHON'}, [1, 2]),
+    ({'since': datetime(2023, 1, 3, tzinfo=UTC)}, [0, 3, 4]),
+    ({'until': datetime(2023, 1, 2, tzinfo=UTC)}, [1, 2]),
+    ({'source': 'tass.ru', 'tag': 'политика', 'since': datetime(2023, 1, 1, tzinfo=UTC)}, [0, 4]),
+    ({'where': lambda art: art.headline < 'В'}, [1, 3]),
+])
+def test_filter(collection, query, expected):
+    view = collection.filter(**query)
+
+    assert isinstance(view, ArticleView)
+    assert numbers(view) == expected
+    assert len(view) == len(expected)
+
+
+def test_filters_compose(collection):
+    view = collection.filter(source='tass.ru').filter(tag='политика').filter(
+        lambda art: art.author is None)
+    assert numbers(view) == [0, 4]
+
+
+def test_sort_by_published_uses_datetime(collection, monkeypatch):
+    # Сортировка по дате публикации не форматирует дату статей.
+    monkeypatch.setattr(Article, 'date', property(lambda art: pytest.fail('date при сортировке')))
+
+    assert numbers(collection.sort()) == [2, 1, 4, 3, 0]
+    assert numbers(collection.sort(reverse=True)) == [0, 3, 4, 1, 2]
+
+
+def test_sort_by_key(collection):
+    assert numbers(collection.sort('headline')) == [3, 1, 0, 2, 4]
+    # Статьи без автора идут последними в любом порядке.
+    assert numbers(collection.sort('author')) == [1, 2, 3, 0, 4]
+    assert numbers(collection.sort('author', reverse=True)) == [3, 1, 2, 0, 4]
+    assert numbers(collection.sort(lambda art: len(art['tags']))) == [3, 0, 1, 4, 2]
+
+
+def test_filter_keeps_sort_order(collection):
+    view = collection.sort(reverse=True).filter(source='tass.ru')
+    assert numbers(view) == [0, 4, 2]
+
+    view = collection.filter(source='tass.ru').sort()
+    assert numbers(view) == [2, 4, 0]
+
+
+def test_slices(collection):
+    newest = collection.sort(reverse=True)
+
+    assert isinstance(newest[:3], ArticleView)
+    assert numbers(newest[:3]) == [0, 3, 4]
+    assert numbers(newest[1:][:2]) == [3, 4]
+    assert numbers(newest[::2]) == [0, 4, 2]
+    assert newest[-1].link == 'https://tass.ru/2'
+    assert numbers(newest[:3].sort()) == [4, 3, 0]
+
+    with pytest.raises(IndexError):
+        newest[5]
+
+
+def test_views_are_lazy_and_independent(collection):
+    tass = collection.filter(source='tass.ru')
+    newest = tass.sort(reverse=True)
+
+    assert numbers(tass) == [0, 2, 4]
+    assert numbers(newest) == [0, 4, 2]
+
+    collection.add([make_article(5, 'tass.ru', datetime(2023, 3, 1, tzinfo=UTC), None, 'Е', [])])
+
+    # Представления пересчитываются после пополнения коллекции.
+    assert numbers(tass) == [0, 2, 4, 5]
+    assert numbers(newest) == [5, 0, 4, 2]
+    assert numbers(newest[:1]) == [5]
+
+
+def test_export_view(collection):
+    view = collection.filter(source='habr.com').sort()
+
+    toc, body = to_txt(view)
+    assert toc == 'Содержание\n' + ''.join(
+        f"habr.com, {art.date}, {f'{art.author}, ' if art.author else ''}{art.headline}\n"
+        for art in view)
+    assert body.count('###') == 2
+
+    records = [json.loads(line) for line in view.to('jsonl').splitlines()]
+    assert [record['link'] for record in records] == ['https://habr.com/1', 'https://habr.com/3']
+
+    assert view.collection_name == 'Новости'
+    assert collection.view('Хабр').collection_name == 'Хабр'